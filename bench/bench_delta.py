@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+
+'''
+bench_delta.py
+
+benchmarks applying N-Triples deltas to a loaded OntoDS instance with
+addTriples and removeTriples against reloading the whole ontology,
+on a synthetic place hierarchy, reporting timings as JSON.
+
+example :
+  python bench_delta.py --depth 4 --fanout 8 --delta 1000 --out results.json
+'''
+
+#############
+#  IMPORTS  #
+#############
+# standard python packages
+import argparse, json, logging, os, platform, shutil, sys, tempfile, time
+
+srcPath = os.path.abspath( __file__ + "/../../src" )
+if not srcPath in sys.path :
+  sys.path.append( srcPath )
+import OntoDS
+
+import synthetic
+
+
+################
+#  PARSE ARGS  #
+################
+def parseArgs( argv ) :
+
+  parser = argparse.ArgumentParser( description="benchmark OntoDS delta ingestion against full reloads" )
+
+  # ontology shape
+  parser.add_argument( "--depth",        type=int,   default=3,     help="levels below the root places" )
+  parser.add_argument( "--fanout",       type=int,   default=8,     help="children per place" )
+  parser.add_argument( "--roots",        type=int,   default=4,     help="places on the top level" )
+
+  # delta shape
+  parser.add_argument( "--delta",        type=int,   default=500,   help="new places in the delta" )
+  parser.add_argument( "--docs",         type=int,   default=1000,  help="documents verified to compare the results" )
+  parser.add_argument( "--seed",         type=int,   default=0 )
+
+  # ontods configuration
+  parser.add_argument( "--backend",      default="dict", choices=[ "dict", "array" ] )
+  parser.add_argument( "--no-graph",     action="store_true", help="stream the ontology without an rdflib Graph" )
+
+  parser.add_argument( "--out",          default=None,  help="write the JSON report here instead of stdout" )
+
+  return parser.parse_args( argv )
+
+
+################
+#  NEW ONTODS  #
+################
+# build an OntoDS instance configured from the command line args.
+def newOntoDS( args ) :
+  return OntoDS.OntoDS( "pickledb", retainGraph=not args.no_graph, backend=args.backend )
+
+
+###########
+#  TIMED  #
+###########
+# return the seconds taken by calling fn on the given args.
+def timed( fn, *args ) :
+
+  start = time.time()
+  fn( *args )
+  return time.time() - start
+
+
+#################
+#  BENCH DELTA  #
+#################
+def benchDelta( argv ) :
+
+  logging.basicConfig( format='%(levelname)s:%(message)s', level=logging.WARNING )
+
+  args    = parseArgs( argv )
+  report  = { "config"   : vars( args ),
+              "platform" : { "python" : platform.python_version(), "system" : platform.system() } }
+  results = {}
+
+  tmpDir = tempfile.mkdtemp()
+  try :
+
+    # --------------------------------------------------------------- #
+    # base ontology, delta, and base plus delta
+
+    basePath   = os.path.join( tmpDir, "places.nt" )
+    deltaPath  = os.path.join( tmpDir, "delta.nt" )
+    mergedPath = os.path.join( tmpDir, "merged.nt" )
+
+    numBase  = synthetic.writeOntology( basePath, args.depth, args.fanout, args.roots )
+    numDelta = synthetic.writeLines( deltaPath, synthetic.placeDelta( args.delta, args.depth, args.fanout, args.roots, args.seed ) )
+
+    fo = open( mergedPath, "w" )
+    for path in [ basePath, deltaPath ] :
+      fi = open( path )
+      shutil.copyfileobj( fi, fo )
+      fi.close()
+    fo.close()
+
+    results[ "triples" ] = { "base" : numBase, "delta" : numDelta }
+
+    # --------------------------------------------------------------- #
+    # full reload of base plus delta, closure included
+
+    reloaded = newOntoDS( args )
+    results[ "reload_seconds" ] = timed( lambda : ( reloaded.loadOntology( mergedPath ), reloaded.refreshClosure() ) )
+
+    # --------------------------------------------------------------- #
+    # incremental add and remove on a loaded base, closure included
+
+    ontods = newOntoDS( args )
+    ontods.loadOntology( basePath )
+    ontods.refreshClosure()
+
+    results[ "add_seconds" ] = timed( lambda : ( ontods.addTriples( deltaPath ), ontods.refreshClosure() ) )
+
+    ignoreList = synthetic.fillerKeys( args.depth, 0 )
+    docs       = list( synthetic.workload( args.docs, args.depth, args.fanout, args.roots, args.depth + 1, args.docs, 0.1, args.seed ) )
+    results[ "verdicts_agree" ] = [ ontods.verify( doc, ignoreList ) for doc in docs ] == [ reloaded.verify( doc, ignoreList ) for doc in docs ]
+
+    results[ "remove_seconds" ] = timed( lambda : ( ontods.removeTriples( deltaPath ), ontods.refreshClosure() ) )
+
+    results[ "speedup_add" ]    = results[ "reload_seconds" ] / results[ "add_seconds" ] if results[ "add_seconds" ] > 0 else None
+    results[ "speedup_remove" ] = results[ "reload_seconds" ] / results[ "remove_seconds" ] if results[ "remove_seconds" ] > 0 else None
+
+  finally :
+    shutil.rmtree( tmpDir )
+
+  report[ "results" ] = results
+
+  output = json.dumps( report, indent=2, sort_keys=True )
+  if args.out :
+    fo = open( args.out, "w" )
+    fo.write( output + "\n" )
+    fo.close()
+  else :
+    print( output )
+
+
+#########################
+#  THREAD OF EXECUTION  #
+#########################
+benchDelta( sys.argv[ 1: ] )
+
+
+#########
+#  EOF  #
+#########
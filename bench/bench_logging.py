@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+
+'''
+bench_logging.py
+
+measures the cost of OntoDS debug instrumentation on verify throughput.
+with tracing off, throughput at the INFO logging level should match
+throughput with logging disabled outright.
+'''
+
+#############
+#  IMPORTS  #
+#############
+# standard python packages
+import json, logging, os, sys, time
+
+srcPath = os.path.abspath( __file__ + "/../../src" )
+if not srcPath in sys.path :
+  sys.path.append( srcPath )
+import OntoDS
+
+ONTOLOGY_PATH = os.path.join( srcPath, "example_ontology.ttl" )
+NUM_VERIFIES  = 20000
+NUM_ROUNDS    = 5
+
+
+###################
+#  TIME VERIFIES  #
+###################
+# return the best rate of verify calls per second over NUM_ROUNDS rounds
+# on a mix of passing and failing inserts.
+def timeVerifies( ontods ) :
+
+  inserts = [ { "name":"Elsa", "age":21, "City":"arendelle", "Country":"norway" },
+              { "name":"Anna", "age":18, "City":"losangeles", "Country":"norway" } ]
+
+  best = 0.0
+  for r in range( NUM_ROUNDS ) :
+    start = time.time()
+    for i in range( NUM_VERIFIES ) :
+      ontods.verify( inserts[ i % 2 ], [ 'name', 'age' ] )
+    best = max( best, NUM_VERIFIES / ( time.time() - start ) )
+
+  return best
+
+
+###################
+#  BENCH LOGGING  #
+###################
+def benchLogging() :
+
+  logging.basicConfig( format='%(levelname)s:%(message)s', level=logging.INFO )
+
+  # disable the check result cache so every verify runs every check
+  ontods = OntoDS.OntoDS( "pickledb", cacheSize=0 )
+  ontods.loadOntology( ONTOLOGY_PATH )
+
+  results = {}
+
+  OntoDS.DEBUG = False
+  results[ "tracing_off_info_level" ] = timeVerifies( ontods )
+
+  OntoDS.DEBUG = True
+  results[ "tracing_on_info_level" ] = timeVerifies( ontods )
+
+  OntoDS.DEBUG = False
+  logging.disable( logging.CRITICAL )
+  results[ "logging_disabled" ] = timeVerifies( ontods )
+  logging.disable( logging.NOTSET )
+
+  results[ "tracing_off_overhead" ] = results[ "logging_disabled" ] / results[ "tracing_off_info_level" ] - 1.0
+
+  print( json.dumps( results, indent=2, sort_keys=True ) )
+
+
+#########################
+#  THREAD OF EXECUTION  #
+#########################
+benchLogging()
+
+
+#########
+#  EOF  #
+#########
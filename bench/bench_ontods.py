@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+
+'''
+bench_ontods.py
+
+benchmarks OntoDS ontology loading and verification on a synthetic
+place hierarchy and insert workload, reporting throughput, p50/p99
+latency, and peak RSS as JSON.
+
+example :
+  python bench_ontods.py --depth 4 --fanout 8 --docs 20000 --failure-rate 0.2 --out results.json
+'''
+
+#############
+#  IMPORTS  #
+#############
+# standard python packages
+import argparse, json, logging, os, platform, resource, shutil, sys, tempfile, time
+
+srcPath = os.path.abspath( __file__ + "/../../src" )
+if not srcPath in sys.path :
+  sys.path.append( srcPath )
+import OntoDS
+
+import synthetic
+
+
+################
+#  PARSE ARGS  #
+################
+def parseArgs( argv ) :
+
+  parser = argparse.ArgumentParser( description="benchmark OntoDS on synthetic place ontologies" )
+
+  # ontology shape
+  parser.add_argument( "--depth",        type=int,   default=3,     help="levels below the root places" )
+  parser.add_argument( "--fanout",       type=int,   default=8,     help="children per place" )
+  parser.add_argument( "--roots",        type=int,   default=4,     help="places on the top level" )
+  parser.add_argument( "--max-triples",  type=int,   default=None,  help="cap on generated triples" )
+
+  # workload shape
+  parser.add_argument( "--docs",         type=int,   default=5000,  help="insert documents to verify" )
+  parser.add_argument( "--width",        type=int,   default=6,     help="keys per document, padded with ignored keys" )
+  parser.add_argument( "--cardinality",  type=int,   default=500,   help="distinct places drawn by the workload" )
+  parser.add_argument( "--failure-rate", type=float, default=0.1,   help="fraction of documents that fail" )
+  parser.add_argument( "--seed",         type=int,   default=0 )
+
+  # ontods configuration
+  parser.add_argument( "--backend",      default="dict", choices=[ "dict", "array" ] )
+  parser.add_argument( "--cache-size",   type=int,   default=10000 )
+  parser.add_argument( "--no-graph",     action="store_true", help="stream the ontology without an rdflib Graph" )
+
+  parser.add_argument( "--out",          default=None,  help="write the JSON report here instead of stdout" )
+
+  return parser.parse_args( argv )
+
+
+###################
+#  LATENCY STATS  #
+###################
+# summarize a list of per call latencies in seconds.
+def latencyStats( latencies ) :
+
+  latencies = sorted( latencies )
+  total     = sum( latencies )
+  n         = len( latencies )
+
+  return { "calls"          : n,
+           "throughput_ops" : n / total if total > 0 else None,
+           "p50_ms"         : latencies[ n // 2 ] * 1000.0 if n else None,
+           "p99_ms"         : latencies[ min( n - 1, int( n * 0.99 ) ) ] * 1000.0 if n else None,
+           "mean_ms"        : total / n * 1000.0 if n else None }
+
+
+################
+#  TIME CALLS  #
+################
+# return the latency of calling fn on each of the given args tuples.
+def timeCalls( fn, argsList ) :
+
+  latencies = []
+
+  for args in argsList :
+    start = time.time()
+    fn( *args )
+    latencies.append( time.time() - start )
+
+  return latencies
+
+
+##############
+#  PEAK RSS  #
+##############
+# return the peak resident set size of this process in kilobytes.
+def peakRSS() :
+
+  rss = resource.getrusage( resource.RUSAGE_SELF ).ru_maxrss
+
+  # darwin reports bytes, linux reports kilobytes
+  if platform.system() == "Darwin" :
+    rss = rss // 1024
+
+  return rss
+
+
+################
+#  NEW ONTODS  #
+################
+# build an OntoDS instance configured from the command line args.
+def newOntoDS( args ) :
+  return OntoDS.OntoDS( "pickledb", cacheSize=args.cache_size, retainGraph=not args.no_graph, backend=args.backend )
+
+
+##################
+#  BENCH ONTODS  #
+##################
+def benchOntoDS( argv ) :
+
+  logging.basicConfig( format='%(levelname)s:%(message)s', level=logging.WARNING )
+
+  args    = parseArgs( argv )
+  report  = { "config"   : vars( args ),
+              "platform" : { "python" : platform.python_version(), "system" : platform.system() } }
+  results = {}
+
+  tmpDir = tempfile.mkdtemp()
+  try :
+
+    # --------------------------------------------------------------- #
+    # load
+
+    ontoPath   = os.path.join( tmpDir, "places.nt" )
+    numTriples = synthetic.writeOntology( ontoPath, args.depth, args.fanout, args.roots, args.max_triples )
+
+    ontods = newOntoDS( args )
+    start  = time.time()
+    ontods.loadOntology( ontoPath )
+    elapsed = time.time() - start
+
+    results[ "load" ] = { "triples"            : numTriples,
+                          "seconds"            : elapsed,
+                          "throughput_triples" : numTriples / elapsed if elapsed > 0 else None,
+                          "peak_rss_kb"        : peakRSS() }
+
+    # --------------------------------------------------------------- #
+    # workload
+
+    ignoreList = synthetic.fillerKeys( args.depth, args.width )
+    docs       = list( synthetic.workload( args.docs, args.depth, args.fanout, args.roots, args.width, args.cardinality, args.failure_rate, args.seed ) )
+
+    results[ "verify" ]  = latencyStats( timeCalls( ontods.verify, [ ( doc, ignoreList ) for doc in docs ] ) )
+    results[ "explain" ] = latencyStats( timeCalls( ontods.explain, [ ( doc, ignoreList ) for doc in docs ] ) )
+
+    multiKeyArgs = [ ( k, doc[ k ], doc ) for doc in docs for k in doc if not k in ignoreList ]
+    results[ "multi_key" ] = latencyStats( timeCalls( ontods.passesMultiKeySubsumption, multiKeyArgs ) )
+
+    start    = time.time()
+    verdicts = list( ontods.verifyMany( iter( docs ), ignoreList ) )
+    elapsed  = time.time() - start
+    results[ "verify_many" ] = { "calls"          : len( verdicts ),
+                                 "throughput_ops" : len( verdicts ) / elapsed if elapsed > 0 else None,
+                                 "pass_rate"      : float( sum( verdicts ) ) / len( verdicts ) if verdicts else None }
+
+    results[ "cache" ] = ontods.getCacheStats()
+
+  finally :
+    shutil.rmtree( tmpDir )
+
+  report[ "results" ]     = results
+  report[ "peak_rss_kb" ] = peakRSS()
+
+  output = json.dumps( report, indent=2, sort_keys=True )
+  if args.out :
+    fo = open( args.out, "w" )
+    fo.write( output + "\n" )
+    fo.close()
+  else :
+    print( output )
+
+
+#########################
+#  THREAD OF EXECUTION  #
+#########################
+benchOntoDS( sys.argv[ 1: ] )
+
+
+#########
+#  EOF  #
+#########
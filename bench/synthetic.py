@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+
+'''
+synthetic.py
+
+generators for synthetic place ontologies and insert workloads
+used by the OntoDS benchmarks.
+'''
+
+#############
+#  IMPORTS  #
+#############
+# standard python packages
+import random
+
+# place levels from the top of the hierarchy down
+LEVELS = [ "Country", "State", "County", "City", "District", "Neighborhood", "Block" ]
+
+CLASS_URI    = "<http://schema.org/%s>"
+PLACE_URI    = "<http://example.org/%s%d>"
+CONTAINED_IN = "<http://www.schema.org/containedInPlace>"
+RDF_TYPE     = "<http://www.w3.org/1999/02/22-rdf-syntax-ns#type>"
+FOAF_NAME    = "<http://xmlns.com/foaf/0.1/name>"
+
+
+####################
+#  PLACE ONTOLOGY  #
+####################
+# yield N-Triples lines for a place hierarchy with the given number of levels
+# below the roots. every place has fanout children on the next level down.
+# generation stops early once maxTriples lines have been yielded.
+def placeOntology( depth, fanout, roots=1, maxTriples=None ) :
+
+  levels = LEVELS[ : depth + 1 ]
+
+  # class hierarchy
+  for i in range( len( levels ) - 1 ) :
+    yield "%s %s %s .\n" % ( CLASS_URI % levels[ i + 1 ], CONTAINED_IN, CLASS_URI % levels[ i ] )
+
+  numTriples = len( levels ) - 1
+
+  # places, level by level
+  numPlaces = roots
+  for level, name in enumerate( levels ) :
+    for i in range( numPlaces ) :
+
+      if maxTriples and numTriples + 3 > maxTriples :
+        return
+
+      place = PLACE_URI % ( name.lower(), i )
+      yield "%s %s %s .\n" % ( place, RDF_TYPE, CLASS_URI % name )
+      yield "%s %s \"%s%d\" .\n" % ( place, FOAF_NAME, name.lower(), i )
+      numTriples += 2
+
+      if level > 0 :
+        yield "%s %s %s .\n" % ( place, CONTAINED_IN, PLACE_URI % ( levels[ level - 1 ].lower(), i // fanout ) )
+        numTriples += 1
+
+    numPlaces *= fanout
+
+
+####################
+#  WRITE ONTOLOGY  #
+####################
+# write a place hierarchy to the given path, returning the number of triples.
+def writeOntology( path, depth, fanout, roots=1, maxTriples=None ) :
+
+  numTriples = 0
+
+  fo = open( path, "w" )
+  for line in placeOntology( depth, fanout, roots, maxTriples ) :
+    fo.write( line )
+    numTriples += 1
+  fo.close()
+
+  return numTriples
+
+
+#################
+#  PLACE DELTA  #
+#################
+# yield N-Triples lines for numPlaces new places on the deepest level of a
+# place hierarchy built with the same depth, fanout, and roots. every new
+# place is contained in a random existing place on the level above.
+def placeDelta( numPlaces, depth, fanout, roots=1, seed=0 ) :
+
+  rng    = random.Random( seed )
+  levels = LEVELS[ : depth + 1 ]
+  name   = levels[ -1 ]
+
+  numLeaves  = roots * fanout ** depth
+  numParents = roots * fanout ** ( depth - 1 ) if depth > 0 else 0
+
+  for i in range( numLeaves, numLeaves + numPlaces ) :
+    place = PLACE_URI % ( name.lower(), i )
+    yield "%s %s %s .\n" % ( place, RDF_TYPE, CLASS_URI % name )
+    yield "%s %s \"%s%d\" .\n" % ( place, FOAF_NAME, name.lower(), i )
+    if numParents :
+      yield "%s %s %s .\n" % ( place, CONTAINED_IN, PLACE_URI % ( levels[ -2 ].lower(), rng.randrange( numParents ) ) )
+
+
+#################
+#  WRITE LINES  #
+#################
+# write the given N-Triples lines to the given path, returning the number of lines.
+def writeLines( path, lines ) :
+
+  numLines = 0
+
+  fo = open( path, "w" )
+  for line in lines :
+    fo.write( line )
+    numLines += 1
+  fo.close()
+
+  return numLines
+
+
+##############
+#  WORKLOAD  #
+##############
+# yield numDocs insert documents against a place hierarchy built with the same
+# depth, fanout, and roots. each document names a place on the deepest level,
+# drawn from a pool of cardinality places, plus all of its ancestors, and is
+# padded with filler keys up to width keys. a failureRate fraction of
+# documents carry an unknown top level place, so they fail verification.
+def workload( numDocs, depth, fanout, roots=1, width=4, cardinality=100, failureRate=0.0, seed=0 ) :
+
+  rng    = random.Random( seed )
+  levels = LEVELS[ : depth + 1 ]
+
+  numLeaves = roots * fanout ** depth
+  pool      = [ rng.randrange( numLeaves ) for i in range( cardinality ) ]
+
+  for d in range( numDocs ) :
+
+    doc  = {}
+    leaf = rng.choice( pool )
+    for level in reversed( range( len( levels ) ) ) :
+      doc[ levels[ level ] ] = "%s%d" % ( levels[ level ].lower(), leaf )
+      leaf = leaf // fanout
+
+    if rng.random() < failureRate :
+      doc[ levels[0] ] = "nowhere%d" % rng.randrange( cardinality )
+
+    for f in fillerKeys( depth, width ) :
+      doc[ f ] = rng.randrange( 1000 )
+
+    yield doc
+
+
+#################
+#  FILLER KEYS  #
+#################
+# return the filler keys padding workload documents, which verification should ignore.
+def fillerKeys( depth, width ) :
+  return [ "field%d" % i for i in range( max( 0, width - depth - 1 ) ) ]
+
+
+#########
+#  EOF  #
+#########
@@ -0,0 +1,301 @@
+#!/usr/bin/env python
+
+##########################################################################
+# ArrayStore usage notes:
+#
+# 1. A compact OntoDS triple store backend for large ontologies.
+# 2. Terms are interned into a term table, and their int32 table
+#    positions serve as handles.
+# 3. Triples are kept in three permutations, SPO, POS, and OSP. Each
+#    permutation is a sorted array of 64 bit keys packing its first two
+#    handles, plus a parallel int32 array of its third handle, so
+#    lookups are binary searches.
+# 4. New triples land in a small delta dict, and removed triples are
+#    tombstoned in a removed set rather than cut out of the arrays. Both
+#    are merged into the sorted arrays by compact once they outgrow them.
+#
+##########################################################################
+
+# -------------------------------------- #
+import array, bisect, logging, sys
+
+# -------------------------------------- #
+
+
+# typecode of a 64 bit signed array item
+try :
+  array.array( "q" )
+  KEY_TYPE = "q"
+except ValueError :
+  KEY_TYPE = "l"
+
+if array.array( KEY_TYPE ).itemsize != 8 :
+  sys.exit( "  ARRAY STORE : ERROR : no 64 bit array type available on this platform" )
+
+# handles are packed into the low and high 32 bits of a key
+KEY_SHIFT = 32
+KEY_MASK  = ( 1 << KEY_SHIFT ) - 1
+
+# compact once the delta and tombstones hold this many triples, or as many as the arrays
+MIN_DELTA = 1024
+
+
+class ArrayStore( object ) :
+
+
+  ################
+  #  ATTRIBUTES  #
+  ################
+  terms    = None   # the term table, mapping handles to terms
+  termIds  = None   # map of terms to handles
+  spKeys   = None   # sorted ( subject, predicate ) keys of the SPO permutation
+  spVals   = None   # objects parallel to spKeys
+  poKeys   = None   # sorted ( predicate, object ) keys of the POS permutation
+  poVals   = None   # subjects parallel to poKeys
+  osKeys   = None   # sorted ( object, subject ) keys of the OSP permutation
+  osVals   = None   # predicates parallel to osKeys
+  delta    = None   # map of ( subject, object ) pairs to predicates added since the last compact
+  numDelta = 0      # the number of triples in the delta
+  removed  = None   # set of ( subject, predicate, object ) triples removed from the arrays since the last compact
+
+
+  ##########
+  #  INIT  #
+  ##########
+  def __init__( self ) :
+
+    self.terms   = []
+    self.termIds = {}
+
+    self.spKeys = array.array( KEY_TYPE )
+    self.spVals = array.array( "i" )
+    self.poKeys = array.array( KEY_TYPE )
+    self.poVals = array.array( "i" )
+    self.osKeys = array.array( KEY_TYPE )
+    self.osVals = array.array( "i" )
+
+    self.delta    = {}
+    self.numDelta = 0
+    self.removed  = set()
+
+
+  ############
+  #  INTERN  #
+  ############
+  # return the handle for the given term, adding it to the term table if new.
+  def intern( self, term ) :
+
+    handle = self.termIds.get( term )
+
+    if handle is None :
+      handle = len( self.terms )
+      self.terms.append( term )
+      self.termIds[ term ] = handle
+
+    return handle
+
+
+  ##########
+  #  TERM  #
+  ##########
+  # return the term for the given handle.
+  def term( self, handle ) :
+    return self.terms[ handle ]
+
+
+  ############
+  #  HANDLE  #
+  ############
+  # return the handle for the given term, or None if it was never interned.
+  def handle( self, term ) :
+    return self.termIds.get( term )
+
+
+  #########
+  #  ADD  #
+  #########
+  # add the triple with the given handles to the store.
+  # return True if the triple is new, False otherwise.
+  def add( self, s, p, o ) :
+
+    if p in self.predicates( s, o ) :
+      return False
+
+    # a tombstoned triple is still in the arrays
+    if ( s, p, o ) in self.removed :
+      self.removed.discard( ( s, p, o ) )
+      return True
+
+    self.delta.setdefault( ( s, o ), [] ).append( p )
+    self.numDelta += 1
+    self.compactIfFull()
+
+    return True
+
+
+  ############
+  #  REMOVE  #
+  ############
+  # remove the triple with the given handles from the store.
+  # return True if the triple was in the store, False otherwise.
+  # terms stay interned, so handles remain valid.
+  def remove( self, s, p, o ) :
+
+    preds = self.delta.get( ( s, o ) )
+
+    if preds is not None and p in preds :
+      preds.remove( p )
+      if not preds :
+        del self.delta[ ( s, o ) ]
+      self.numDelta -= 1
+      return True
+
+    if ( s, p, o ) in self.removed or self.find( self.spKeys, self.spVals, ( s << KEY_SHIFT ) | p, o ) is None :
+      return False
+
+    # deleting from the sorted arrays would shift their tails on every
+    # removal, so tombstone the triple until the next compact
+    self.removed.add( ( s, p, o ) )
+    self.compactIfFull()
+
+    return True
+
+
+  #####################
+  #  COMPACT IF FULL  #
+  #####################
+  # compact once the delta and tombstones outgrow the arrays.
+  def compactIfFull( self ) :
+
+    if self.numDelta + len( self.removed ) >= max( MIN_DELTA, len( self.spKeys ) ) :
+      self.compact()
+
+
+  ##########
+  #  FIND  #
+  ##########
+  # return the position of the given key and value in the given
+  # sorted key and parallel value arrays, or None if absent.
+  def find( self, keys, vals, key, val ) :
+
+    lo = bisect.bisect_left( keys, key )
+    hi = bisect.bisect_right( keys, key, lo )
+
+    for i in range( lo, hi ) :
+      if vals[ i ] == val :
+        return i
+
+    return None
+
+
+  ##############
+  #  HAS PAIR  #
+  ##############
+  # check whether any predicate relates subject s to object o.
+  def hasPair( self, s, o ) :
+
+    if ( s, o ) in self.delta :
+      return True
+
+    if self.removed :
+      return len( self.predicates( s, o ) ) > 0
+
+    key = ( o << KEY_SHIFT ) | s
+    i   = bisect.bisect_left( self.osKeys, key )
+    return i < len( self.osKeys ) and self.osKeys[ i ] == key
+
+
+  ################
+  #  PREDICATES  #
+  ################
+  # return the list of predicates relating subject s to object o.
+  def predicates( self, s, o ) :
+
+    preds = self.lookup( self.osKeys, self.osVals, ( o << KEY_SHIFT ) | s )
+
+    if self.removed :
+      preds = [ p for p in preds if not ( s, p, o ) in self.removed ]
+
+    return preds + self.delta.get( ( s, o ), [] )
+
+
+  ############
+  #  LOOKUP  #
+  ############
+  # binary search the given sorted keys, returning the list
+  # of values parallel to every copy of the given key.
+  def lookup( self, keys, vals, key ) :
+
+    lo = bisect.bisect_left( keys, key )
+    hi = bisect.bisect_right( keys, key, lo )
+
+    return vals[ lo:hi ].tolist()
+
+
+  #############
+  #  TRIPLES  #
+  #############
+  # yield the handles of every triple in the store.
+  def triples( self ) :
+
+    removed = self.removed
+
+    for i in range( len( self.spKeys ) ) :
+      key    = self.spKeys[ i ]
+      triple = ( key >> KEY_SHIFT, key & KEY_MASK, self.spVals[ i ] )
+      if not triple in removed :
+        yield triple
+
+    for ( s, o ) in self.delta :
+      for p in self.delta[ ( s, o ) ] :
+        yield ( s, p, o )
+
+
+  #############
+  #  COMPACT  #
+  #############
+  # merge the delta into, and drop the tombstoned triples from,
+  # the sorted permutation arrays.
+  def compact( self ) :
+
+    if not self.delta and not self.removed :
+      return
+
+    logging.debug( "  ARRAY STORE COMPACT : merging %s triples into %s, dropping %s",
+                   self.numDelta, len( self.spKeys ), len( self.removed ) )
+
+    triples = list( self.triples() )
+
+    self.spKeys, self.spVals = self.permute( ( ( s << KEY_SHIFT ) | p, o ) for ( s, p, o ) in triples )
+    self.poKeys, self.poVals = self.permute( ( ( p << KEY_SHIFT ) | o, s ) for ( s, p, o ) in triples )
+    self.osKeys, self.osVals = self.permute( ( ( o << KEY_SHIFT ) | s, p ) for ( s, p, o ) in triples )
+
+    self.delta    = {}
+    self.numDelta = 0
+    self.removed  = set()
+
+
+  #############
+  #  PERMUTE  #
+  #############
+  # sort the given ( key, val ) pairs into parallel key and value arrays.
+  def permute( self, pairs ) :
+
+    pairs = sorted( pairs )
+
+    keys = array.array( KEY_TYPE, [ key for ( key, val ) in pairs ] )
+    vals = array.array( "i", [ val for ( key, val ) in pairs ] )
+
+    return keys, vals
+
+
+  #########
+  #  LEN  #
+  #########
+  def __len__( self ) :
+    return len( self.spKeys ) + self.numDelta - len( self.removed )
+
+
+#########
+#  EOF  #
+#########
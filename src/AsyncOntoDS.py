@@ -0,0 +1,300 @@
+#!/usr/bin/env python
+
+##########################################################################
+# AsyncOntoDS usage notes:
+#
+# 1. A non-blocking verification gateway in front of database writes.
+# 2. Verification runs in the ParallelOntoDS worker pool, so callers get
+#    back AsyncResult handles, or callbacks, instead of blocking.
+# 3. guardedInsert returns at once with a GuardedInsert handle. A feeder
+#    thread reads the input stream and starts verifying each batch in
+#    the pool, and a writer thread writes the accepted documents of each
+#    verified batch, so the write of one batch overlaps the verification
+#    of the following ones. The two threads meet at a queue of at most
+#    maxPending batches, so a slow writer throttles how fast the input
+#    stream is read. Wait on the handle, or pass a callback, for the
+#    final counts. Only the handle's wait and get block the caller.
+# 4. Writers are plain callables taking a list of accepted documents,
+#    e.g. a pymongo collection's insert_many. They and onReject run on
+#    the writer thread.
+# 5. close waits for the guarded inserts still running before
+#    shutting the pool down.
+#
+##########################################################################
+
+# -------------------------------------- #
+import logging, Queue, sys, threading
+
+# import sibling packages HERE!!!
+import ParallelOntoDS
+
+# -------------------------------------- #
+
+
+class AsyncOntoDS( ParallelOntoDS.ParallelOntoDS ) :
+
+
+  ################
+  #  ATTRIBUTES  #
+  ################
+  maxPending = None   # the maximum number of batches verified ahead of the writer
+  inserts    = None   # the GuardedInsert handles started on this gateway
+
+
+  ##########
+  #  INIT  #
+  ##########
+  # start a pool of workers verifying against the ontology
+  # currently loaded in the given OntoDS instance.
+  def __init__( self, ontods, workers=None, maxPending=4 ) :
+
+    ParallelOntoDS.ParallelOntoDS.__init__( self, ontods, workers )
+    self.maxPending = maxPending
+    self.inserts    = []
+
+    logging.debug( "  ...instantiated AsyncOntoDS instance with maxPending '%s'", maxPending )
+
+
+  ##################
+  #  VERIFY ASYNC  #
+  ##################
+  # start verifying the given insert/update query, returning an AsyncResult
+  # whose get() returns the verdict. if given, callback is called with the
+  # verdict from a pool thread once verification completes.
+  def verifyAsync( self, queryMap, ignoreList, callback=None ) :
+
+    if callback is None :
+      return self.pool.apply_async( verifyOne, [ ( queryMap, ignoreList ) ] )
+
+    return self.pool.apply_async( verifyOne, [ ( queryMap, ignoreList ) ], callback=callback )
+
+
+  ########################
+  #  VERIFY BATCH ASYNC  #
+  ########################
+  # start verifying a list of insert/update queries, returning an AsyncResult
+  # whose get() returns the list of verdicts in input order.
+  def verifyBatchAsync( self, batch, ignoreList, callback=None ) :
+
+    if callback is None :
+      return self.pool.apply_async( ParallelOntoDS.verifyBatch, [ ( batch, ignoreList ) ] )
+
+    return self.pool.apply_async( ParallelOntoDS.verifyBatch, [ ( batch, ignoreList ) ], callback=callback )
+
+
+  ####################
+  #  GUARDED INSERT  #
+  ####################
+  # verify a stream of insert queries in batches and hand each batch of
+  # accepted queries to writer, in input order, while later batches are
+  # still being verified. rejected queries are passed one at a time to
+  # onReject, if given. neither verification nor writing blocks the caller.
+  # return a GuardedInsert handle whose get() returns the map of the number
+  # of accepted and rejected queries. if given, callback is called with
+  # that map from the writer thread once the last batch is written.
+  def guardedInsert( self, queryMaps, ignoreList, writer, batchSize=100, onReject=None, callback=None ) :
+
+    handle = GuardedInsert( callback )
+    queue  = Queue.Queue( self.maxPending )
+
+    feeder = threading.Thread( target=self.feedBatches, args=( queryMaps, ignoreList, batchSize, queue, handle ) )
+    writes = threading.Thread( target=self.writeBatches, args=( queue, writer, onReject, handle ) )
+
+    for thread in [ feeder, writes ] :
+      thread.daemon = True
+      thread.start()
+
+    self.inserts.append( handle )
+
+    return handle
+
+
+  ##################
+  #  FEED BATCHES  #
+  ##################
+  # read the input stream on the feeder thread, start verifying each batch,
+  # and queue it for the writer. put blocks while the queue is full.
+  # a None batch tells the writer the stream is done.
+  def feedBatches( self, queryMaps, ignoreList, batchSize, queue, handle ) :
+
+    batch = []
+
+    try :
+
+      for queryMap in queryMaps :
+
+        batch.append( queryMap )
+
+        if len( batch ) >= batchSize :
+          queue.put( ( batch, self.verifyBatchAsync( batch, ignoreList ) ) )
+          batch = []
+
+        # stop reading once the writer gave up
+        if handle.error is not None :
+          return
+
+      if batch :
+        queue.put( ( batch, self.verifyBatchAsync( batch, ignoreList ) ) )
+
+    except Exception :
+      handle.fail( sys.exc_info() )
+
+    finally :
+      queue.put( None )
+
+
+  ###################
+  #  WRITE BATCHES  #
+  ###################
+  # write the queued batches in order on the writer thread, then finish
+  # the handle. after an error, keep draining the queue so the feeder
+  # never blocks on a full one.
+  def writeBatches( self, queue, writer, onReject, handle ) :
+
+    stats = { "accepted" : 0, "rejected" : 0 }
+
+    while True :
+
+      pendingBatch = queue.get()
+      if pendingBatch is None :
+        break
+
+      if handle.error is not None :
+        continue
+
+      try :
+        self.writeBatch( pendingBatch, writer, onReject, stats )
+      except Exception :
+        handle.fail( sys.exc_info() )
+
+    handle.finish( stats )
+
+
+  #################
+  #  WRITE BATCH  #
+  #################
+  # wait on the verdicts for a pending batch, then write its accepted queries.
+  def writeBatch( self, pendingBatch, writer, onReject, stats ) :
+
+    batch, result = pendingBatch
+
+    accepted = []
+    for queryMap, verdict in zip( batch, result.get() ) :
+      if verdict :
+        accepted.append( queryMap )
+      else :
+        stats[ "rejected" ] += 1
+        if onReject :
+          onReject( queryMap )
+
+    if accepted :
+      writer( accepted )
+      stats[ "accepted" ] += len( accepted )
+
+
+  ###########
+  #  CLOSE  #
+  ###########
+  # wait for the running guarded inserts, then shut the pool down.
+  def close( self ) :
+
+    for handle in self.inserts :
+      handle.wait()
+
+    ParallelOntoDS.ParallelOntoDS.close( self )
+
+
+class GuardedInsert( object ) :
+
+
+  ################
+  #  ATTRIBUTES  #
+  ################
+  stats    = None   # the map of accepted and rejected counts, None until done
+  error    = None   # the exc_info of the first error raised by the pipeline, None if none
+  callback = None   # called with stats once done, if given
+  done     = None   # an Event set once the last batch is written
+
+
+  ##########
+  #  INIT  #
+  ##########
+  def __init__( self, callback=None ) :
+
+    self.callback = callback
+    self.done     = threading.Event()
+
+
+  ###########
+  #  READY  #
+  ###########
+  # check whether the guarded insert is done.
+  def ready( self ) :
+    return self.done.is_set()
+
+
+  ##########
+  #  WAIT  #
+  ##########
+  # block until the guarded insert is done, or the timeout in seconds runs out.
+  # return True if it is done.
+  def wait( self, timeout=None ) :
+    self.done.wait( timeout )
+    return self.done.is_set()
+
+
+  #########
+  #  GET  #
+  #########
+  # block until the guarded insert is done and return its counts,
+  # re-raising the first error the reader, verifier, or writer raised.
+  def get( self, timeout=None ) :
+
+    if not self.wait( timeout ) :
+      raise RuntimeError( "guarded insert still running after " + str( timeout ) + " seconds" )
+
+    if self.error is not None :
+      raise self.error[0], self.error[1], self.error[2]
+
+    return self.stats
+
+
+  ##########
+  #  FAIL  #
+  ##########
+  # record the first error raised by the pipeline.
+  def fail( self, excInfo ) :
+
+    logging.debug( "  GUARDED INSERT : failed : %s", excInfo[1] )
+
+    if self.error is None :
+      self.error = excInfo
+
+
+  ############
+  #  FINISH  #
+  ############
+  # record the final counts and wake the waiters.
+  def finish( self, stats ) :
+
+    self.stats = stats
+    self.done.set()
+
+    if self.callback is not None and self.error is None :
+      self.callback( stats )
+
+
+################
+#  VERIFY ONE  #
+################
+# verify a single insert/update query in a worker process.
+def verifyOne( args ) :
+
+  queryMap, ignoreList = args
+
+  return ParallelOntoDS.WORKER_ONTODS.verify( queryMap, ignoreList )
+
+
+#########
+#  EOF  #
+#########
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+
+##########################################################################
+# BloomFilter usage notes:
+#
+# 1. A compact probabilistic set of hashable items. Membership tests
+#    never miss an added item, and wrongly report an item that was never
+#    added with probability about errorRate.
+# 2. Sized for capacity items. Past that the error rate climbs, so
+#    owners should rebuild once isFull reports True.
+# 3. Items are hashed with the builtin hash, so filters are only valid
+#    in processes hashing alike. isCurrent checks a filter unpickled
+#    from another process.
+#
+##########################################################################
+
+# -------------------------------------- #
+import logging, math
+
+# -------------------------------------- #
+
+
+# the second hash of an item is the hash of the item paired with this salt
+HASH_SALT = "bloom"
+
+# processes hashing this item alike hash every item alike
+HASH_PROBE = ( "bloom", "probe" )
+
+
+class BloomFilter( object ) :
+
+
+  ################
+  #  ATTRIBUTES  #
+  ################
+  capacity  = 0      # the number of items the filter is sized for
+  errorRate = None   # the false positive rate at capacity
+  numBits   = 0      # the number of bits in the filter
+  numHashes = 0      # the number of bits set per item
+  bits      = None   # a bytearray holding the bits
+  count     = 0      # the number of items added
+  hashProbe = None   # the hash of HASH_PROBE in the process that built the filter
+
+
+  ##########
+  #  INIT  #
+  ##########
+  def __init__( self, capacity, errorRate=0.01 ) :
+
+    if not 0.0 < errorRate < 1.0 :
+      raise ValueError( "BloomFilter error rate must be between 0 and 1, got " + str( errorRate ) )
+
+    self.capacity  = max( int( capacity ), 1 )
+    self.errorRate = errorRate
+    self.numBits   = max( int( math.ceil( -self.capacity * math.log( errorRate ) / ( math.log( 2 ) ** 2 ) ) ), 8 )
+    self.numHashes = max( int( round( float( self.numBits ) / self.capacity * math.log( 2 ) ) ), 1 )
+    self.bits      = bytearray( ( self.numBits + 7 ) // 8 )
+    self.count     = 0
+    self.hashProbe = hash( HASH_PROBE )
+
+    logging.debug( "  ...instantiated BloomFilter instance with %s bits and %s hashes", self.numBits, self.numHashes )
+
+
+  #########
+  #  ADD  #
+  #########
+  def add( self, item ) :
+
+    for i in self.positions( item ) :
+      self.bits[ i >> 3 ] |= 1 << ( i & 7 )
+
+    self.count += 1
+
+
+  ###############
+  #  POSITIONS  #
+  ###############
+  # return the bit positions of the given item, by double hashing.
+  def positions( self, item ) :
+
+    h1 = hash( item )
+    h2 = hash( ( item, HASH_SALT ) ) | 1
+
+    return [ ( h1 + i * h2 ) % self.numBits for i in range( self.numHashes ) ]
+
+
+  ##############
+  #  CONTAINS  #
+  ##############
+  # check whether the given item may have been added.
+  # raises TypeError for unhashable items.
+  def __contains__( self, item ) :
+
+    bits = self.bits
+
+    for i in self.positions( item ) :
+      if not bits[ i >> 3 ] & ( 1 << ( i & 7 ) ) :
+        return False
+
+    return True
+
+
+  ################
+  #  IS CURRENT  #
+  ################
+  # check whether the filter was built by a process hashing items like this one.
+  def isCurrent( self ) :
+    return self.hashProbe == hash( HASH_PROBE )
+
+
+  #############
+  #  IS FULL  #
+  #############
+  # check whether the filter holds twice the items it was sized for.
+  def isFull( self ) :
+    return self.count > 2 * self.capacity
+
+
+  ###############
+  #  GET STATS  #
+  ###############
+  # return the sizing and memory use of the filter, with the false
+  # positive rate expected for the items added so far.
+  def getStats( self ) :
+
+    expected = ( 1.0 - math.exp( -float( self.numHashes ) * self.count / self.numBits ) ) ** self.numHashes
+
+    return { "capacity"     : self.capacity,
+             "count"        : self.count,
+             "errorRate"    : self.errorRate,
+             "expectedRate" : expected,
+             "numBits"      : self.numBits,
+             "numHashes"    : self.numHashes,
+             "bytes"        : len( self.bits ) }
+
+
+#########
+#  EOF  #
+#########
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+
+##########################################################################
+# DictStore usage notes:
+#
+# 1. The default OntoDS triple store backend.
+# 2. Terms are their own handles, and triples are kept in a dict
+#    mapping ( subject, object ) pairs to the predicates relating them.
+#
+##########################################################################
+
+# -------------------------------------- #
+import logging
+
+# -------------------------------------- #
+
+
+class DictStore( object ) :
+
+
+  ################
+  #  ATTRIBUTES  #
+  ################
+  pairIndex  = None   # map of ( subject, object ) pairs to the predicates relating them
+  numTriples = 0      # the number of triples in the store
+
+
+  ##########
+  #  INIT  #
+  ##########
+  def __init__( self ) :
+    self.pairIndex  = {}
+    self.numTriples = 0
+
+
+  ############
+  #  INTERN  #
+  ############
+  # return the handle for the given term.
+  def intern( self, term ) :
+    return term
+
+
+  ##########
+  #  TERM  #
+  ##########
+  # return the term for the given handle.
+  def term( self, handle ) :
+    return handle
+
+
+  ############
+  #  HANDLE  #
+  ############
+  # return the handle for the given term, without interning it.
+  def handle( self, term ) :
+    return term
+
+
+  #########
+  #  ADD  #
+  #########
+  # add the triple with the given handles to the store.
+  # return True if the triple is new, False otherwise.
+  def add( self, s, p, o ) :
+
+    preds = self.pairIndex.setdefault( ( s, o ), [] )
+
+    if p in preds :
+      return False
+
+    preds.append( p )
+    self.numTriples += 1
+    return True
+
+
+  ############
+  #  REMOVE  #
+  ############
+  # remove the triple with the given handles from the store.
+  # return True if the triple was in the store, False otherwise.
+  def remove( self, s, p, o ) :
+
+    preds = self.pairIndex.get( ( s, o ) )
+
+    if preds is None or not p in preds :
+      return False
+
+    preds.remove( p )
+    if not preds :
+      del self.pairIndex[ ( s, o ) ]
+
+    self.numTriples -= 1
+    return True
+
+
+  ##############
+  #  HAS PAIR  #
+  ##############
+  # check whether any predicate relates subject s to object o.
+  def hasPair( self, s, o ) :
+    return ( s, o ) in self.pairIndex
+
+
+  ################
+  #  PREDICATES  #
+  ################
+  # return the list of predicates relating subject s to object o.
+  def predicates( self, s, o ) :
+    return list( self.pairIndex.get( ( s, o ), [] ) )
+
+
+  #############
+  #  TRIPLES  #
+  #############
+  # yield the handles of every triple in the store.
+  def triples( self ) :
+
+    for ( s, o ) in self.pairIndex :
+      for p in self.pairIndex[ ( s, o ) ] :
+        yield ( s, p, o )
+
+
+  #############
+  #  COMPACT  #
+  #############
+  # nothing to compact, writes go straight into the pair index.
+  def compact( self ) :
+    pass
+
+
+  #########
+  #  LEN  #
+  #########
+  def __len__( self ) :
+    return self.numTriples
+
+
+#########
+#  EOF  #
+#########
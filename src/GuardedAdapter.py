@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+
+##########################################################################
+# GuardedAdapter usage notes:
+#
+# 1. Base class of the guarded write adapters. Inserts and updates are
+#    verified against an OntoDS instance in batches, and only the
+#    passing documents are written, in bulk.
+# 2. Rejected documents go to the onReject side channel together with
+#    their reason : the Verdict explaining a verification failure, or
+#    the database error for documents the database refused.
+# 3. Subclasses implement fetch, writeInserts, and writeUpdates for a
+#    particular database. The base versions raise NotImplementedError.
+#
+##########################################################################
+
+# -------------------------------------- #
+import logging
+
+# -------------------------------------- #
+
+
+class GuardedAdapter( object ) :
+
+
+  ################
+  #  ATTRIBUTES  #
+  ################
+  ontods     = None   # the OntoDS instance verifying writes
+  ignoreList = None   # the keys to skip during verification
+  batchSize  = None   # the number of documents verified and written at once
+  onReject   = None   # called with every rejected document and its reason
+  rejects    = None   # the ( document, reason ) pairs rejected, if no onReject is given
+
+
+  ##########
+  #  INIT  #
+  ##########
+  def __init__( self, ontods, ignoreList, batchSize=1000, onReject=None ) :
+
+    self.ontods     = ontods
+    self.ignoreList = ignoreList
+    self.batchSize  = batchSize
+
+    if onReject is None :
+      self.rejects  = []
+      self.onReject = self.keepReject
+    else :
+      self.onReject = onReject
+
+    logging.debug( "  ...instantiated %s instance with batchSize '%s'", self.__class__.__name__, batchSize )
+
+
+  #################
+  #  INSERT MANY  #
+  #################
+  # verify and insert the given documents.
+  # return a map of the number of accepted and rejected documents.
+  def insertMany( self, docs ) :
+
+    stats = { "accepted" : 0, "rejected" : 0 }
+
+    for batch in self.batches( docs ) :
+
+      accepted = []
+      for doc, verdict in zip( batch, self.ontods.verifyBatch( batch, self.ignoreList ) ) :
+        if verdict :
+          accepted.append( doc )
+        else :
+          self.reject( doc, self.ontods.verifyWithExplanation( doc, self.ignoreList ), stats )
+
+      if accepted :
+        failed = self.writeInserts( accepted )
+        for doc, error in failed :
+          self.reject( doc, error, stats )
+        stats[ "accepted" ] += len( accepted ) - len( failed )
+
+    return stats
+
+
+  ################
+  #  INSERT ONE  #
+  ################
+  # verify and insert a single document.
+  # return True if the document was written.
+  def insertOne( self, doc ) :
+    return self.insertMany( [ doc ] )[ "accepted" ] == 1
+
+
+  #################
+  #  UPDATE MANY  #
+  #################
+  # verify and apply the given ( key, patch ) pairs, where patch maps
+  # keys to their new values in the document stored under key.
+  # updates to missing documents are rejected. several patches to one
+  # key are verified in turn, each against the document the earlier
+  # accepted ones leave behind.
+  # return a map of the number of accepted and rejected updates.
+  def updateMany( self, updates ) :
+
+    stats = { "accepted" : 0, "rejected" : 0 }
+
+    for batch in self.batches( updates ) :
+
+      existingDocs = self.fetch( [ key for key, patch in batch ] )
+
+      accepted = []
+      for key, patch in batch :
+
+        if not key in existingDocs :
+          self.reject( ( key, patch ), "no document stored under key '" + str( key ) + "'", stats )
+          continue
+
+        existingDoc = existingDocs[ key ]
+
+        updatedDoc = dict( existingDoc )
+        updatedDoc.update( patch )
+
+        # later patches to the same key in this batch are checked against this one
+        if self.ontods.verifyUpdate( existingDoc, patch, self.ignoreList ) :
+          accepted.append( ( key, patch ) )
+          existingDocs[ key ] = updatedDoc
+        else :
+          self.reject( ( key, patch ), self.ontods.verifyWithExplanation( updatedDoc, self.ignoreList ), stats )
+
+      if accepted :
+        failed = self.writeUpdates( accepted )
+        for update, error in failed :
+          self.reject( update, error, stats )
+        stats[ "accepted" ] += len( accepted ) - len( failed )
+
+    return stats
+
+
+  #############
+  #  BATCHES  #
+  #############
+  # split the given stream into lists of at most batchSize items.
+  def batches( self, items ) :
+
+    batch = []
+
+    for item in items :
+      batch.append( item )
+      if len( batch ) >= self.batchSize :
+        yield batch
+        batch = []
+
+    if batch :
+      yield batch
+
+
+  ############
+  #  REJECT  #
+  ############
+  def reject( self, item, reason, stats ) :
+
+    logging.debug( "  REJECT : rejected '%s' : %s", item, reason )
+
+    stats[ "rejected" ] += 1
+    self.onReject( item, reason )
+
+
+  #################
+  #  KEEP REJECT  #
+  #################
+  def keepReject( self, item, reason ) :
+    self.rejects.append( ( item, reason ) )
+
+
+  ###########
+  #  FETCH  #
+  ###########
+  # return a map of the given keys to the documents stored under them,
+  # leaving out missing keys.
+  def fetch( self, keys ) :
+    raise NotImplementedError( self.__class__.__name__ + " does not implement fetch" )
+
+
+  ###################
+  #  WRITE INSERTS  #
+  ###################
+  # insert the given verified documents.
+  # return the list of ( document, error ) pairs the database refused.
+  def writeInserts( self, docs ) :
+    raise NotImplementedError( self.__class__.__name__ + " does not implement writeInserts" )
+
+
+  ###################
+  #  WRITE UPDATES  #
+  ###################
+  # apply the given verified ( key, patch ) pairs.
+  # return the list of ( ( key, patch ), error ) pairs the database refused.
+  def writeUpdates( self, updates ) :
+    raise NotImplementedError( self.__class__.__name__ + " does not implement writeUpdates" )
+
+
+#########
+#  EOF  #
+#########
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+
+##########################################################################
+# LRUCache usage notes:
+#
+# 1. Maps hashable keys to values, holding at most maxEntries entries.
+# 2. Evicts a least recently used entry when a put overflows the cache,
+#    approximating LRU order with the second chance (clock) algorithm.
+# 3. Counts hits, misses, and evictions for tuning the cache size.
+# 4. Safe to share across threads. gets never take the lock : a hit
+#    only flags its entry as used, so readers do not contend. the hit
+#    and miss counters may undercount under concurrent gets.
+#
+##########################################################################
+
+# -------------------------------------- #
+import collections, logging, threading
+
+# -------------------------------------- #
+
+
+class LRUCache( object ) :
+
+
+  ################
+  #  ATTRIBUTES  #
+  ################
+  maxEntries = None   # the maximum number of entries held at once
+  entries    = None   # map of keys to [ value, used ] entries, used flagging a hit since the clock hand last passed
+  clock      = None   # a deque of the cached keys, in the order the clock hand visits them
+  hits       = 0      # the number of lookups answered from the cache
+  misses     = 0      # the number of lookups not answered from the cache
+  evictions  = 0      # the number of entries dropped to make room
+  lock       = None   # serializes puts and clears across threads
+
+
+  ##########
+  #  INIT  #
+  ##########
+  def __init__( self, maxEntries ) :
+
+    self.maxEntries = maxEntries
+    self.entries    = {}
+    self.clock      = collections.deque()
+    self.hits       = 0
+    self.misses     = 0
+    self.evictions  = 0
+    self.lock       = threading.Lock()
+
+    logging.debug( "  ...instantiated LRUCache instance with maxEntries '%s'", maxEntries )
+
+
+  #########
+  #  GET  #
+  #########
+  # return the value cached for the given key, or default on a miss.
+  # a hit flags the entry as used, sparing it from the next eviction.
+  # a single dict lookup is atomic, so no lock is taken.
+  def get( self, key, default=None ) :
+
+    entry = self.entries.get( key )
+
+    if entry is None :
+      self.misses += 1
+      return default
+
+    self.hits += 1
+    entry[1]   = True
+    return entry[0]
+
+
+  #########
+  #  PUT  #
+  #########
+  # cache the given value under the given key, evicting the
+  # least recently used entry if the cache is full.
+  def put( self, key, val ) :
+
+    with self.lock :
+
+      entry = self.entries.get( key )
+
+      if entry is not None :
+        entry[0] = val
+        entry[1] = True
+        return
+
+      if len( self.entries ) >= self.maxEntries :
+        self.evict()
+
+      self.entries[ key ] = [ val, False ]
+      self.clock.append( key )
+
+
+  ###########
+  #  EVICT  #
+  ###########
+  # advance the clock hand past the used entries, clearing their flags,
+  # and drop the first entry unused since the hand last passed it.
+  # the caller holds the lock.
+  def evict( self ) :
+
+    while self.clock :
+
+      key   = self.clock.popleft()
+      entry = self.entries[ key ]
+
+      if entry[1] :
+        entry[1] = False
+        self.clock.append( key )
+
+      else :
+        del self.entries[ key ]
+        self.evictions += 1
+        return
+
+
+  ###########
+  #  CLEAR  #
+  ###########
+  # drop every entry, keeping the counters.
+  # concurrent gets see either the old or the new entries.
+  def clear( self ) :
+    with self.lock :
+      self.entries = {}
+      self.clock   = collections.deque()
+
+
+  ###############
+  #  GET STATS  #
+  ###############
+  def getStats( self ) :
+    return { "entries"    : len( self.entries ),
+             "maxEntries" : self.maxEntries,
+             "hits"       : self.hits,
+             "misses"     : self.misses,
+             "evictions"  : self.evictions }
+
+
+#########
+#  EOF  #
+#########
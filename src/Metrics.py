@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+
+##########################################################################
+# Metrics usage notes:
+#
+# 1. Collects the per stage counters of an instrumented OntoDS instance :
+#    call counts, cumulative and histogram latencies, overall and per key
+#    name, check result cache hits and misses per check, and graph scans.
+# 2. Export with asDict, or with toPrometheus for the Prometheus text
+#    exposition format.
+# 3. Safe to share across threads.
+#
+##########################################################################
+
+# -------------------------------------- #
+import logging, threading, timeit
+
+# -------------------------------------- #
+
+
+# upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = ( 0.00001, 0.0001, 0.001, 0.01, 0.1, 1.0, float( "inf" ) )
+
+
+class Metrics( object ) :
+
+
+  ################
+  #  ATTRIBUTES  #
+  ################
+  stages     = None   # map of ( stage, key name or None ) to [ calls, seconds, bucket counts ]
+  cacheStats = None   # map of cache tags to [ hits, misses ]
+  graphScans = 0      # the number of full passes over the ontology triples
+  lock       = None   # serializes updates across threads
+
+
+  ##########
+  #  INIT  #
+  ##########
+  def __init__( self ) :
+
+    self.stages     = {}
+    self.cacheStats = {}
+    self.graphScans = 0
+    self.lock       = threading.Lock()
+
+    logging.debug( "  ...instantiated Metrics instance" )
+
+
+  ###########
+  #  TIMED  #
+  ###########
+  # wrap the given function so every call is recorded under the given stage.
+  # if keyArg is not None, calls are also recorded under the key name
+  # passed as positional argument keyArg. only pass keyArg for arguments
+  # that are always key names, as every distinct value gets its own counters.
+  def timed( self, stage, keyArg, func ) :
+
+    timer = timeit.default_timer
+
+    def timedCall( *args, **kwargs ) :
+      start = timer()
+      try :
+        return func( *args, **kwargs )
+      finally :
+        key = args[ keyArg ] if keyArg is not None and len( args ) > keyArg else None
+        self.observe( stage, key, timer() - start )
+
+    return timedCall
+
+
+  #############
+  #  SCANNED  #
+  #############
+  # wrap the given function so every call is counted as a graph scan.
+  def scanned( self, func ) :
+
+    def scannedCall( *args, **kwargs ) :
+      with self.lock :
+        self.graphScans += 1
+      return func( *args, **kwargs )
+
+    return scannedCall
+
+
+  #############
+  #  OBSERVE  #
+  #############
+  # record one call of the given stage, for the given key name if not None,
+  # taking the given number of seconds.
+  def observe( self, stage, key, seconds ) :
+
+    with self.lock :
+      self.record( ( stage, None ), seconds )
+      if key is not None :
+        self.record( ( stage, key ), seconds )
+
+
+  ############
+  #  RECORD  #
+  ############
+  def record( self, statKey, seconds ) :
+
+    stat = self.stages.get( statKey )
+    if stat is None :
+      stat = [ 0, 0.0, [ 0 ] * len( LATENCY_BUCKETS ) ]
+      self.stages[ statKey ] = stat
+
+    stat[0] += 1
+    stat[1] += seconds
+
+    for i, bound in enumerate( LATENCY_BUCKETS ) :
+      if seconds <= bound :
+        stat[2][ i ] += 1
+        break
+
+
+  #################
+  #  COUNT CACHE  #
+  #################
+  # record a check result cache hit or miss for the given cache tag.
+  def countCache( self, tag, hit ) :
+
+    with self.lock :
+      stat = self.cacheStats.setdefault( tag, [ 0, 0 ] )
+      stat[ 0 if hit else 1 ] += 1
+
+
+  #############
+  #  AS DICT  #
+  #############
+  # return every counter as a map :
+  #   stages     : stage -> { calls, seconds, buckets, keys : key name -> { calls, seconds, buckets } }
+  #   cache      : cache tag -> { hits, misses, hitRate }
+  #   graphScans : the number of graph scans
+  # buckets are cumulative ( upper bound, calls ) pairs.
+  def asDict( self ) :
+
+    with self.lock :
+
+      stages = {}
+      for ( stage, key ) in sorted( self.stages, key=lambda statKey : ( statKey[0], statKey[1] is not None, statKey[1] ) ) :
+        calls, seconds, counts = self.stages[ ( stage, key ) ]
+        stat = { "calls" : calls, "seconds" : seconds, "buckets" : self.cumulative( counts ) }
+        if key is None :
+          stat[ "keys" ] = {}
+          stages[ stage ] = stat
+        else :
+          stages[ stage ][ "keys" ][ key ] = stat
+
+      cache = {}
+      for tag in self.cacheStats :
+        hits, misses = self.cacheStats[ tag ]
+        cache[ tag ] = { "hits" : hits, "misses" : misses, "hitRate" : float( hits ) / ( hits + misses ) if hits + misses else 0.0 }
+
+      return { "stages" : stages, "cache" : cache, "graphScans" : self.graphScans }
+
+
+  ################
+  #  CUMULATIVE  #
+  ################
+  def cumulative( self, counts ) :
+
+    buckets = []
+    total   = 0
+
+    for bound, count in zip( LATENCY_BUCKETS, counts ) :
+      total += count
+      buckets.append( ( bound, total ) )
+
+    return buckets
+
+
+  ###################
+  #  TO PROMETHEUS  #
+  ###################
+  # return every counter in the Prometheus text exposition format.
+  def toPrometheus( self ) :
+
+    stats = self.asDict()
+    lines = []
+
+    lines.append( "# HELP ontods_stage_seconds Latency of OntoDS stages." )
+    lines.append( "# TYPE ontods_stage_seconds histogram" )
+    for stage in sorted( stats[ "stages" ] ) :
+      stat = stats[ "stages" ][ stage ]
+      self.histogramLines( lines, { "stage" : stage }, stat )
+      for key in sorted( stat[ "keys" ] ) :
+        self.histogramLines( lines, { "stage" : stage, "key" : key }, stat[ "keys" ][ key ] )
+
+    lines.append( "# HELP ontods_cache_hits_total Check result cache hits." )
+    lines.append( "# TYPE ontods_cache_hits_total counter" )
+    for tag in sorted( stats[ "cache" ] ) :
+      lines.append( "ontods_cache_hits_total" + self.labels( { "check" : tag } ) + " " + str( stats[ "cache" ][ tag ][ "hits" ] ) )
+
+    lines.append( "# HELP ontods_cache_misses_total Check result cache misses." )
+    lines.append( "# TYPE ontods_cache_misses_total counter" )
+    for tag in sorted( stats[ "cache" ] ) :
+      lines.append( "ontods_cache_misses_total" + self.labels( { "check" : tag } ) + " " + str( stats[ "cache" ][ tag ][ "misses" ] ) )
+
+    lines.append( "# HELP ontods_graph_scans_total Full passes over the ontology triples." )
+    lines.append( "# TYPE ontods_graph_scans_total counter" )
+    lines.append( "ontods_graph_scans_total " + str( stats[ "graphScans" ] ) )
+
+    return "\n".join( lines ) + "\n"
+
+
+  #####################
+  #  HISTOGRAM LINES  #
+  #####################
+  def histogramLines( self, lines, labels, stat ) :
+
+    for bound, calls in stat[ "buckets" ] :
+      bucketLabels = dict( labels )
+      bucketLabels[ "le" ] = "+Inf" if bound == float( "inf" ) else repr( bound )
+      lines.append( "ontods_stage_seconds_bucket" + self.labels( bucketLabels ) + " " + str( calls ) )
+
+    lines.append( "ontods_stage_seconds_sum" + self.labels( labels ) + " " + repr( stat[ "seconds" ] ) )
+    lines.append( "ontods_stage_seconds_count" + self.labels( labels ) + " " + str( stat[ "calls" ] ) )
+
+
+  ############
+  #  LABELS  #
+  ############
+  # render the given label map, escaping values as Prometheus requires.
+  def labels( self, labels ) :
+
+    pairs = []
+    for name in sorted( labels ) :
+      val = labels[ name ]
+      if isinstance( val, unicode ) :
+        val = val.encode( "utf-8" )
+      val = str( val ).replace( "\\", "\\\\" ).replace( '"', '\\"' ).replace( "\n", "\\n" )
+      pairs.append( name + '="' + val + '"' )
+
+    return "{" + ",".join( pairs ) + "}"
+
+
+#########
+#  EOF  #
+#########
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+
+##########################################################################
+# MongoDBAdapter usage notes:
+#
+# 1. Guarded writes into a MongoDB collection.
+# 2. Each batch is written with one unordered insert_many or bulk_write,
+#    so one refused document does not hold back the rest of its batch.
+# 3. Updates address documents by _id and are applied with $set.
+#
+##########################################################################
+
+# -------------------------------------- #
+import logging
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+# import sibling packages HERE!!!
+import GuardedAdapter
+
+# -------------------------------------- #
+
+
+class MongoDBAdapter( GuardedAdapter.GuardedAdapter ) :
+
+
+  ################
+  #  ATTRIBUTES  #
+  ################
+  collection = None   # the pymongo collection written to
+
+
+  ##########
+  #  INIT  #
+  ##########
+  def __init__( self, ontods, ignoreList, collection, batchSize=1000, onReject=None ) :
+
+    GuardedAdapter.GuardedAdapter.__init__( self, ontods, ignoreList, batchSize, onReject )
+
+    self.collection = collection
+
+
+  ###########
+  #  FETCH  #
+  ###########
+  def fetch( self, keys ) :
+    return dict( ( doc[ "_id" ], doc ) for doc in self.collection.find( { "_id" : { "$in" : keys } } ) )
+
+
+  ###################
+  #  WRITE INSERTS  #
+  ###################
+  def writeInserts( self, docs ) :
+
+    try :
+      self.collection.insert_many( docs, ordered=False )
+      return []
+
+    except BulkWriteError as e :
+      return self.refused( docs, e )
+
+
+  ###################
+  #  WRITE UPDATES  #
+  ###################
+  def writeUpdates( self, updates ) :
+
+    requests = [ UpdateOne( { "_id" : key }, { "$set" : patch } ) for key, patch in updates ]
+
+    try :
+      self.collection.bulk_write( requests, ordered=False )
+      return []
+
+    except BulkWriteError as e :
+      return self.refused( updates, e )
+
+
+  #############
+  #  REFUSED  #
+  #############
+  # pair the items of a bulk write with the write errors the server reported for them.
+  def refused( self, items, bulkWriteError ) :
+
+    writeErrors = bulkWriteError.details.get( "writeErrors", [] )
+
+    logging.debug( "  REFUSED : %s of %s writes refused", len( writeErrors ), len( items ) )
+
+    return [ ( items[ error[ "index" ] ], error ) for error in writeErrors ]
+
+
+#########
+#  EOF  #
+#########
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+
+##########################################################################
+# Normalizer usage notes:
+#
+# 1. Maps ontology terms to the data strings OntoDS matches query keys
+#    and values against.
+# 2. URIs are mapped by the rule of the longest namespace prefix they
+#    start with. URIs in no configured namespace map to their local name,
+#    the part after the last '/' or '#'.
+# 3. Literals map to their lexical form, without quotes, language tags,
+#    or datatypes.
+# 4. Configured once, then shared freely. Normalizers hold no per term
+#    state, OntoDS stores the data string of every term it indexes.
+# 5. fingerprint identifies the configuration, so data strings computed
+#    under one configuration are never reused under another. Rules are
+#    identified by their code, defaults, and closure, or by their repr
+#    if they are not plain functions.
+#
+##########################################################################
+
+# -------------------------------------- #
+import hashlib, logging, marshal, rdflib
+
+# -------------------------------------- #
+
+
+# namespaces whose uris map to their local name by default
+DEFAULT_NAMESPACES = [ "http://xmlns.com/foaf/0.1/",
+                       "http://schema.org/",
+                       "https://schema.org/",
+                       "http://www.schema.org/",
+                       "http://example.org/" ]
+
+# predicates whose literal objects name the subject
+LABEL_PREDICATES = [ rdflib.URIRef( "http://xmlns.com/foaf/0.1/name" ),
+                     rdflib.RDFS.label ]
+
+
+class Normalizer( object ) :
+
+
+  ################
+  #  ATTRIBUTES  #
+  ################
+  namespaces      = None   # list of ( prefix, rule ) pairs, longest prefix first
+  labelPredicates = None   # list of predicates whose literal objects name the subject
+
+
+  ##########
+  #  INIT  #
+  ##########
+  # namespaces maps namespace prefixes to their rules, see addNamespace.
+  # it defaults to the local name rule for every DEFAULT_NAMESPACES prefix.
+  # labelPredicates defaults to LABEL_PREDICATES.
+  def __init__( self, namespaces=None, labelPredicates=None ) :
+
+    self.namespaces = []
+
+    if namespaces is None :
+      namespaces = dict( ( prefix, None ) for prefix in DEFAULT_NAMESPACES )
+
+    for prefix in namespaces :
+      self.addNamespace( prefix, namespaces[ prefix ] )
+
+    if labelPredicates is None :
+      labelPredicates = LABEL_PREDICATES
+    self.labelPredicates = [ rdflib.URIRef( p ) for p in labelPredicates ]
+
+    logging.debug( "  ...instantiated Normalizer instance with %s namespaces", len( self.namespaces ) )
+
+
+  ###################
+  #  ADD NAMESPACE  #
+  ###################
+  # map the uris starting with the given prefix by the given rule.
+  # a rule is None, for the local name, or a function from the
+  # rest of the uri after the prefix to the data string.
+  def addNamespace( self, prefix, rule=None ) :
+
+    self.namespaces = [ ( p, r ) for ( p, r ) in self.namespaces if p != prefix ]
+    self.namespaces.append( ( unicode( prefix ), rule ) )
+    self.namespaces.sort( key=lambda pair : -len( pair[0] ) )
+
+
+  ###############
+  #  NORMALIZE  #
+  ###############
+  # return the data string of the given term as a utf-8 encoded str.
+  def normalize( self, term ) :
+
+    if isinstance( term, rdflib.Literal ) or isinstance( term, rdflib.BNode ) :
+      data = unicode( term )
+
+    else :
+      data = self.normalizeURI( unicode( term ) )
+
+    if isinstance( data, unicode ) :
+      data = data.encode( "utf-8" )
+
+    return data
+
+
+  ###################
+  #  NORMALIZE URI  #
+  ###################
+  def normalizeURI( self, uri ) :
+
+    for ( prefix, rule ) in self.namespaces :
+      if uri.startswith( prefix ) :
+        if rule is None :
+          return self.localName( uri )
+        return rule( uri[ len( prefix ): ] )
+
+    return self.localName( uri )
+
+
+  #################
+  #  FINGERPRINT  #
+  #################
+  # return the sha1 hex digest of the namespaces, their rules, and the label predicates.
+  def fingerprint( self ) :
+
+    sha1 = hashlib.sha1()
+
+    for ( prefix, rule ) in self.namespaces :
+      sha1.update( prefix.encode( "utf-8" ) + "\0" + self.describeRule( rule ) + "\0" )
+
+    sha1.update( repr( sorted( self.labelPredicates ) ) )
+
+    return sha1.hexdigest()
+
+
+  ###################
+  #  DESCRIBE RULE  #
+  ###################
+  # return a string identifying the given namespace rule, the same in
+  # every process for the same function.
+  def describeRule( self, rule ) :
+
+    if rule is None :
+      return "localName"
+
+    code = getattr( rule, "func_code", None )
+
+    # callables other than plain functions fall back to their repr
+    if code is None :
+      return "repr:" + repr( rule )
+
+    closure = [ cell.cell_contents for cell in rule.func_closure or () ]
+
+    return "func:" + hashlib.sha1( marshal.dumps( code ) + repr( rule.func_defaults ) + repr( closure ) ).hexdigest()
+
+
+  ################
+  #  LOCAL NAME  #
+  ################
+  # return the part of the given uri after its last '/' or '#'.
+  def localName( self, uri ) :
+
+    stripped = uri.rstrip( "/#" )
+    cut      = max( stripped.rfind( "/" ), stripped.rfind( "#" ) )
+
+    return stripped[ cut + 1: ]
+
+
+#########
+#  EOF  #
+#########
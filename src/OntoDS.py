@@ -3,92 +3,1444 @@
 ##########################################################################
 # OntoDS usage notes:
 #
-# 1. Currently limited to insertions.
-# 2. Only supports subsumption verification on maps of strings to strings.
+# 1. Verifies insertions, and updates given as a patch to an existing
+#    document with verifyUpdate.
+# 2. Supports subsumption verification on maps of strings to strings,
+#    including nested maps and lists of strings or maps. Nested fields
+#    are named by dotted paths, e.g. address.city, and the ignore list
+#    may hold path patterns, e.g. meta.* or *.id.
 # 3. Only supports subsumption verification using RDF ontologies.
+# 4. Compiled ontologies are a header followed by a pickled snapshot,
+#    not memory mapped arrays : the indexes are dicts of rdflib terms,
+#    so the cold start cost is one unpickle, seconds rather than
+#    milliseconds for ontologies of a few hundred thousand triples.
+#    The header's payload sha1 is checked before unpickling, which
+#    catches corrupt and truncated files but not forged ones, so only
+#    load compiled ontologies from paths as trusted as the code itself.
 #
 ##########################################################################
 
 # -------------------------------------- #
-import logging, os, pprint, pydot, rdflib, string, sys, time
+import contextlib, cStringIO, fnmatch, gc, hashlib, logging, os, pprint, pydot, rdflib, re, string, struct, sys, time
+
+try :
+  import cPickle as pickle
+except ImportError :
+  import pickle
+
+# numpy is only needed for columnar verification
+try :
+  import numpy
+except ImportError :
+  numpy = None
 
 # import sibling packages HERE!!!
+import ArrayStore, BloomFilter, DictStore, LRUCache, Metrics, Normalizer, Verdict, VerdictStore
+
+# adapters path
+adaptersPath  = os.path.abspath( __file__ + "/../../../../adapters" )
+if not adaptersPath in sys.path :
+  sys.path.append( adaptersPath )
+import Adapter
+
+# settings dir
+settingsPath  = os.path.abspath( __file__ + "/../../core" )
+if not settingsPath in sys.path :
+  sys.path.append( settingsPath )
+import settings
+
+# -------------------------------------- #
+
+
+# tracing on the verification hot path is skipped entirely unless
+# settings.DEBUG is set, whatever the logging level.
+DEBUG = settings.DEBUG
+
+# predicates whose edges make up the subsumption hierarchy, unless configured otherwise
+SUBSUMPTION_PREDICATES = [ rdflib.URIRef( "http://schema.org/containedInPlace" ),
+                           rdflib.URIRef( "http://www.schema.org/containedInPlace" ),
+                           rdflib.RDF.type ]
+
+# predicates whose literal objects name the subject, unless the normalizer says otherwise
+LABEL_PREDICATES = Normalizer.LABEL_PREDICATES
+
+# a single N-Triples statement, capturing the subject, predicate, and object terms
+NT_TERM = r'(<[^>]*>|_:[^\s]+|"(?:[^"\\]|\\.)*"(?:@[a-zA-Z0-9-]+|\^\^<[^>]*>)?)'
+NT_LINE = re.compile( r'^\s*' + NT_TERM + r'\s+' + NT_TERM + r'\s+' + NT_TERM + r'\s*\.\s*$' )
+
+# escape sequences allowed in N-Triples strings
+NT_ESCAPE  = re.compile( r'\\(u[0-9a-fA-F]{4}|U[0-9a-fA-F]{8}|.)' )
+NT_ESCAPES = { "t" : u"\t", "b" : u"\b", "n" : u"\n", "r" : u"\r", "f" : u"\f", '"' : u'"', "'" : u"'", "\\" : u"\\" }
+
+# marks a cache lookup that found no entry
+CACHE_MISS = object()
+
+# failure reasons reported by OntoDS.verifyColumns and OntoDS.verifyWithExplanation
+REASON_OK        = Verdict.REASON_OK
+REASON_KV        = Verdict.REASON_KV
+REASON_MULTI_KEY = Verdict.REASON_MULTI_KEY
+
+# checks whose results are kept in the verdict store
+PERSISTED_CHECKS = ( "kv", "contain" )
+
+# tags of the data string items held by the membership prefilter
+PREFILTER_SUBJECT = "s"
+PREFILTER_OBJECT  = "o"
+
+# values verified as nested documents rather than as data strings
+NESTED_TYPES = ( dict, list, tuple )
+
+# the number of key set constraint plans kept by OntoDS.getPlan
+PLAN_CACHE_SIZE = 256
+
+# stages of the verification hot path timed by OntoDS.enableMetrics, with the
+# position of the argument naming the key of each call, or None if calls are
+# not per key. only arguments that are always key names are used, so the
+# number of counters stays bounded by the number of keys in use.
+METRIC_STAGES = ( ( "verify",               None ),
+                  ( "verifyBatch",          None ),
+                  ( "compilePlan",          None ),
+                  ( "passesKVSubsumption",  0 ),
+                  ( "computeKVSubsumption", 0 ),
+                  ( "checkContainment",     None ),
+                  ( "computeContainment",   None ),
+                  ( "lookupTerms",          None ) )
+
+# layout version of the dicts returned by OntoDS.snapshot
+SNAPSHOT_VERSION = 5
+
+# the types of the terms held in snapshot term tables
+TERM_TYPES = frozenset( [ rdflib.URIRef, rdflib.BNode, rdflib.Literal ] )
+
+# the attributes frozen by OntoDS.snapshot, pickled as they are held in memory
+SNAPSHOT_STATE = ( "store", "termData", "subjectIndex", "objectIndex", "predicateIndex",
+                   "subjectUses", "objectUses", "parents", "children", "ancestors", "prefilter", "tripleSum" )
+
+# triple digests are summed modulo 2 ** 160, the size of a sha1 digest
+TRIPLE_SUM_MODULUS = 1 << 160
+
+# compiled ontology files start with a fixed size header :
+#   magic, format version, byte order, source mtime, source size, source sha1,
+#   payload size, and payload sha1.
+# the payload, the pickled snapshot, follows the header.
+COMPILED_MAGIC   = b"ONTODSC\n"
+COMPILED_VERSION = 6
+COMPILED_HEADER  = struct.Struct( "<8sIcdQ20sQ20s" )
+
+
+class OntoDS( object ) :
+
+
+  ################
+  #  ATTRIBUTES  #
+  ################
+  nosql_type            = None   # the type of nosql database under consideration
+  retainGraph           = None   # whether an rdflib Graph of the ontology is kept, see ontology
+  graph                 = None   # the rdflib Graph of the ontology, None if not retained or not built yet
+  backend               = None   # the type of triple store backing the indexes
+  store                 = None   # the triple store, mapping terms to handles
+  subjectIndex          = None   # map of data strings to the subject handles carrying them
+  objectIndex           = None   # map of data strings to the object handles carrying them
+  normalizer            = None   # the Normalizer mapping terms to data strings
+  termData              = None   # map of handles to the data strings of their terms
+  prefilter             = None   # a BloomFilter over the indexed data strings, None if disabled
+  prefilterRate         = None   # the false positive rate of the prefilter, None if disabled
+  subsumptionPredicates = None   # the set of predicates whose edges make up the subsumption hierarchy
+  predicateIndex        = None   # map of ( subject data, object data ) pairs to the subsumption predicates relating them
+  subjectUses           = None   # map of handles to the number of triples they are the subject of
+  objectUses            = None   # map of handles to the number of triples they are the object of
+  parents               = None   # map of handles to the handles directly subsuming them
+  children              = None   # map of handles to the handles they directly subsume
+  ancestors             = None   # map of handles to all handles subsuming them, None if not compiled
+  staleTerms            = None   # set of handles whose subsumption edges changed since the closure was compiled
+  version               = 0      # incremented on every change to the ontology
+  cacheSize             = None   # the maximum number of memoized check results, 0 if disabled
+  cache                 = None   # an LRUCache of check results, None if disabled
+  plans                 = None   # an LRUCache of constraint plans per key set
+  metrics               = None   # the Metrics collecting stage counters, None if disabled
+  verdictStore          = None   # a VerdictStore persisting check results, None if disabled
+  tripleSum             = 0      # the sum of the sha1 digests of every indexed triple, modulo TRIPLE_SUM_MODULUS
+  contentHash           = None   # the ( version, sha1 ) of the ontology content, None if not computed yet
+  MONGOSAVEPATH         = None
+
+
+  ##########
+  #  INIT  #
+  ##########
+  # cacheSize bounds the number of memoized check results. 0 disables the cache.
+  # if retainGraph is False, no rdflib Graph is kept and ontologies are streamed
+  # into the indexes, keeping only the triples verification needs.
+  # backend picks the triple store, "dict" or the more compact "array".
+  # normalizer maps terms to data strings, defaulting to a Normalizer
+  # for the foaf, schema.org, and example.org namespaces.
+  # prefilterRate enables a membership prefilter with the given false
+  # positive rate, answering checks on unknown data strings without
+  # touching the indexes. None disables it.
+  # verdictStore persists check results across processes, see VerdictStore.
+  # subsumptionPredicates lists the predicates whose edges make up the
+  # subsumption hierarchy, e.g. rdflib.RDFS.subClassOf or skos:broader,
+  # defaulting to SUBSUMPTION_PREDICATES. only their edges are indexed
+  # for getPredicates and checkContainment.
+  def __init__( self, nosql_type, cacheSize=10000, retainGraph=True, backend="dict", normalizer=None, prefilterRate=None, verdictStore=None, subsumptionPredicates=None ) :
+
+    # save nosql db type
+    self.nosql_type = nosql_type
+
+    # instantiate the ontology graph
+    self.retainGraph = retainGraph
+    if retainGraph :
+      self.graph = rdflib.Graph()
+
+    # instantiate the triple store and data string indexes
+    self.backend      = backend
+    self.store        = self.newStore()
+    self.subjectIndex = {}
+    self.objectIndex  = {}
+    self.termData     = {}
+
+    # instantiate the term normalizer
+    if normalizer is None :
+      normalizer = Normalizer.Normalizer()
+    self.normalizer = normalizer
+
+    # the membership prefilter is built once the ontology is loaded
+    self.prefilterRate = prefilterRate
+
+    # instantiate the subsumption hierarchy
+    if subsumptionPredicates is None :
+      subsumptionPredicates = SUBSUMPTION_PREDICATES
+    self.subsumptionPredicates = set( rdflib.URIRef( p ) for p in subsumptionPredicates )
+    self.predicateIndex        = {}
+    self.subjectUses           = {}
+    self.objectUses            = {}
+    self.parents               = {}
+    self.children              = {}
+    self.ancestors             = None
+    self.staleTerms            = set()
+
+    # instantiate the check result cache
+    self.version   = 0
+    self.cacheSize = cacheSize
+    if cacheSize > 0 :
+      self.cache = LRUCache.LRUCache( cacheSize )
+    self.plans = LRUCache.LRUCache( PLAN_CACHE_SIZE )
+    self.verdictStore = verdictStore
+
+    logging.debug( "  ...instantiated OntoDS instance with ontology object '%s'", self.graph )
+
+
+  ################
+  #  GET CONFIG  #
+  ################
+  # return the keyword arguments configuring this instance, so instances
+  # built elsewhere, e.g. in worker processes, are configured alike.
+  def getConfig( self ) :
+    return { "cacheSize"             : self.cacheSize,
+             "retainGraph"           : self.retainGraph,
+             "backend"               : self.backend,
+             "normalizer"            : self.normalizer,
+             "prefilterRate"         : self.prefilterRate,
+             "verdictStore"          : self.verdictStore,
+             "subsumptionPredicates" : sorted( self.subsumptionPredicates ) }
+
+
+  ##############
+  #  ONTOLOGY  #
+  ##############
+  # the rdflib Graph of the ontology, or None if no graph is retained.
+  # restored snapshots and compiled ontologies keep every triple in the
+  # triple store, so their graph is only built from it on first use.
+  @property
+  def ontology( self ) :
+
+    if self.graph is None and self.retainGraph :
+      graph = rdflib.Graph()
+      for triple in self.iterTriples() :
+        graph.add( triple )
+      self.graph = graph
+
+    return self.graph
+
+
+  ###################
+  #  LOAD ONTOLOGY  #
+  ###################
+  # load the ontology at the given file path.
+  # if a compiledPath is given, load the compiled ontology at that path instead
+  # when it is up to date with the ontology file, and (re)write it otherwise.
+  # compiled ontologies only ever hold a single ontology file, so they are
+  # neither read nor written when loading into a non empty ontology.
+  def loadOntology( self, ontoPath, compiledPath=None ) :
+
+    if os.path.isfile( ontoPath ) :
+
+      # compiled ontologies replace the contents of the ontology,
+      # so only use them to populate an empty one
+      if len( self.store ) > 0 :
+        compiledPath = None
+
+      if compiledPath :
+        if self.loadCompiledOntology( compiledPath, ontoPath ) :
+          return
+
+      logging.debug( "  LOAD ONTOLOGY : loading ontology from '%s'", ontoPath )
+
+      if not self.retainGraph :
+        self.streamOntology( ontoPath )
+        self.buildPrefilter()
+
+      else :
+        self.ontology.parse( ontoPath, format="nt" )
+        logging.debug( "  LOAD ONTOLOGY : ontology now holds %s triples", len( self.ontology ) )
+        self.buildIndexes()
+
+      self.store.compact()
+      self.bumpVersion()
+
+      if compiledPath :
+        self.saveCompiledOntology( compiledPath, ontoPath )
+
+    else :
+      sys.exit( "  LOAD ONTOLOGY : file not found '" + ontoPath + "'" )
+
+
+  #####################
+  #  STREAM ONTOLOGY  #
+  #####################
+  # read the N-Triples file at the given path line by line, indexing only
+  # the subsumption, type, and label triples verification relies on.
+  # all other triples are dropped without building their terms.
+  def streamOntology( self, ontoPath ) :
+
+    logging.debug( "  STREAM ONTOLOGY : streaming ontology from '%s'", ontoPath )
+
+    numKept = 0
+
+    for ( subj, pred, obj ) in self.iterNTriples( ontoPath, self.retainedPredicates() ) :
+      self.indexTriple( subj, pred, obj )
+      numKept += 1
+
+    logging.debug( "  STREAM ONTOLOGY : kept %s triples from '%s'", numKept, ontoPath )
+
+
+  #########################
+  #  RETAINED PREDICATES  #
+  #########################
+  # return the set of N-Triples strings of the predicates
+  # whose triples are kept when streaming an ontology.
+  def retainedPredicates( self ) :
+    return set( t.n3() for t in list( self.subsumptionPredicates ) + self.normalizer.labelPredicates )
+
+
+  ####################
+  #  ITER N TRIPLES  #
+  ####################
+  # yield the triples of the N-Triples file at the given path, line by line.
+  # if retained is not None, only yield the triples whose predicate N-Triples
+  # string is in retained, dropping all others without building their terms.
+  # raise ValueError on the first malformed line.
+  def iterNTriples( self, ntPath, retained=None ) :
+
+    terms = {}   # map of raw term strings to terms, so each distinct term is built once
+
+    fo = open( ntPath, "rb" )
+
+    try :
+
+      for lineNum, line in enumerate( fo, 1 ) :
+
+        line = line.decode( "utf-8" ).strip()
+
+        if not line or line.startswith( "#" ) :
+          continue
+
+        m = NT_LINE.match( line )
+        if not m :
+          raise ValueError( "malformed triple on line " + str( lineNum ) + " of '" + ntPath + "'" )
+
+        if retained is not None and not m.group( 2 ) in retained :
+          continue
+
+        triple = []
+        for rawTerm in m.groups() :
+          if not rawTerm in terms :
+            terms[ rawTerm ] = self.parseNTerm( rawTerm )
+          triple.append( terms[ rawTerm ] )
+
+        yield tuple( triple )
+
+    finally :
+      fo.close()
+
+
+  ##################
+  #  PARSE N TERM  #
+  ##################
+  # build the rdflib term for the given N-Triples term string.
+  def parseNTerm( self, rawTerm ) :
+
+    if rawTerm.startswith( "<" ) :
+      return rdflib.URIRef( self.unescapeNT( rawTerm[ 1:-1 ] ) )
+
+    elif rawTerm.startswith( "_:" ) :
+      return rdflib.BNode( rawTerm[ 2: ] )
+
+    # literals, with an optional language tag or datatype
+    end   = rawTerm.rindex( '"' )
+    value = self.unescapeNT( rawTerm[ 1:end ] )
+    rest  = rawTerm[ end + 1: ]
+
+    if rest.startswith( "@" ) :
+      return rdflib.Literal( value, lang=rest[ 1: ] )
+
+    elif rest.startswith( "^^" ) :
+      return rdflib.Literal( value, datatype=rdflib.URIRef( rest[ 3:-1 ] ) )
+
+    return rdflib.Literal( value )
+
+
+  #################
+  #  UNESCAPE NT  #
+  #################
+  # replace the escape sequences in the given N-Triples string.
+  def unescapeNT( self, val ) :
+
+    if not "\\" in val :
+      return val
+
+    return NT_ESCAPE.sub( self.unescapeMatch, val )
+
+
+  ####################
+  #  UNESCAPE MATCH  #
+  ####################
+  def unescapeMatch( self, m ) :
+
+    code = m.group( 1 )
+
+    if len( code ) > 1 :
+      codepoint = int( code[ 1: ], 16 )
+      try :
+        return unichr( codepoint )
+      except NameError :
+        return chr( codepoint )
+      except ValueError :
+        return ( b"\\U%08x" % codepoint ).decode( "unicode_escape" )
+
+    return NT_ESCAPES.get( code, code )
+
+
+  ######################
+  #  COMPILE ONTOLOGY  #
+  ######################
+  # load the ontology at ontoPath and write it to outPath in the
+  # compiled format read by loadCompiledOntology.
+  def compileOntology( self, ontoPath, outPath ) :
+    self.loadOntology( ontoPath )
+    self.saveCompiledOntology( outPath, ontoPath )
+
+
+  ############################
+  #  SAVE COMPILED ONTOLOGY  #
+  ############################
+  # write a snapshot of the ontology to outPath in the compiled format,
+  # stamped with the size, mtime, and sha1 of the source ontology file,
+  # and the size and sha1 of the pickled snapshot.
+  def saveCompiledOntology( self, outPath, ontoPath ) :
+
+    logging.debug( "  SAVE COMPILED ONTOLOGY : compiling '%s' to '%s'", ontoPath, outPath )
+
+    stat    = os.stat( ontoPath )
+    payload = pickle.dumps( self.snapshot(), pickle.HIGHEST_PROTOCOL )
+
+    header = COMPILED_HEADER.pack( COMPILED_MAGIC,
+                                   COMPILED_VERSION,
+                                   sys.byteorder[0].encode( "ascii" ),
+                                   stat.st_mtime,
+                                   stat.st_size,
+                                   self.hashFile( ontoPath ),
+                                   len( payload ),
+                                   hashlib.sha1( payload ).digest() )
+
+    # write to a temporary file and rename, so concurrent
+    # readers never see a partially written file.
+    tmpPath = outPath + ".tmp" + str( os.getpid() )
+    fo = open( tmpPath, "wb" )
+    fo.write( header )
+    fo.write( payload )
+    fo.close()
+    os.rename( tmpPath, outPath )
+
+
+  ############################
+  #  LOAD COMPILED ONTOLOGY  #
+  ############################
+  # replace the ontology with the compiled ontology at compiledPath.
+  # if ontoPath is given, only load the compiled ontology if it was
+  # compiled from the current contents of the file at ontoPath, by an
+  # instance with the same normalizer, subsumption predicates, and backend.
+  # the payload is only unpickled if it matches the sha1 in the header.
+  # return True if the compiled ontology was loaded, False otherwise.
+  def loadCompiledOntology( self, compiledPath, ontoPath=None ) :
+
+    if not os.path.isfile( compiledPath ) :
+      logging.debug( "  LOAD COMPILED ONTOLOGY : no compiled ontology at '%s'", compiledPath )
+      return False
+
+    fo = open( compiledPath, "rb" )
+
+    try :
+
+      header = fo.read( COMPILED_HEADER.size )
+
+      if len( header ) < COMPILED_HEADER.size :
+        logging.debug( "  LOAD COMPILED ONTOLOGY : truncated file '%s'", compiledPath )
+        return False
+
+      magic, version, byteorder, mtime, size, sha1, payloadSize, payloadSha1 = COMPILED_HEADER.unpack( header )
+
+      if magic != COMPILED_MAGIC or version != COMPILED_VERSION :
+        logging.debug( "  LOAD COMPILED ONTOLOGY : unsupported format in '%s'", compiledPath )
+        return False
+
+      # the triple store arrays are pickled in native byte order
+      if byteorder != sys.byteorder[0].encode( "ascii" ) :
+        logging.debug( "  LOAD COMPILED ONTOLOGY : '%s' was compiled on a machine of other byte order", compiledPath )
+        return False
+
+      if ontoPath and not self.isCompiledFresh( ontoPath, mtime, size, sha1 ) :
+        logging.debug( "  LOAD COMPILED ONTOLOGY : '%s' is stale for '%s'", compiledPath, ontoPath )
+        return False
+
+      payload = fo.read()
+
+    finally :
+      fo.close()
+
+    if len( payload ) != payloadSize or hashlib.sha1( payload ).digest() != payloadSha1 :
+      logging.debug( "  LOAD COMPILED ONTOLOGY : corrupt payload in '%s'", compiledPath )
+      return False
+
+    snapshot = pickle.loads( payload )
+
+    if ontoPath :
+
+      # the data strings were computed by the normalizer of the compiling instance
+      if snapshot[ "normalizer" ] != self.normalizer.fingerprint() :
+        logging.debug( "  LOAD COMPILED ONTOLOGY : '%s' was compiled with another normalizer", compiledPath )
+        return False
+
+      # the closure was compiled over the subsumption predicates of the compiling instance
+      if set( snapshot[ "subsumptionPredicates" ] ) != self.subsumptionPredicates :
+        logging.debug( "  LOAD COMPILED ONTOLOGY : '%s' was compiled with other subsumption predicates", compiledPath )
+        return False
+
+      # other backends would have to index every triple afresh
+      if snapshot[ "backend" ] != self.backend :
+        logging.debug( "  LOAD COMPILED ONTOLOGY : '%s' was compiled for the '%s' backend", compiledPath, snapshot[ "backend" ] )
+        return False
+
+    self.restoreSnapshot( snapshot )
+    return True
+
+
+  #######################
+  #  IS COMPILED FRESH  #
+  #######################
+  # check whether the file at ontoPath still matches the size, mtime, and sha1
+  # recorded at compile time. the file is only hashed if its mtime changed.
+  def isCompiledFresh( self, ontoPath, mtime, size, sha1 ) :
+
+    stat = os.stat( ontoPath )
+
+    if stat.st_size != size :
+      return False
+
+    if stat.st_mtime == mtime :
+      return True
+
+    return self.hashFile( ontoPath ) == sha1
+
+
+  ###############
+  #  HASH FILE  #
+  ###############
+  # return the sha1 digest of the file at the given path.
+  def hashFile( self, path ) :
+
+    sha1 = hashlib.sha1()
+
+    fo = open( path, "rb" )
+    for chunk in iter( lambda : fo.read( 1 << 20 ), b"" ) :
+      sha1.update( chunk )
+    fo.close()
+
+    return sha1.digest()
+
+
+  ################
+  #  ADD TRIPLE  #
+  ################
+  # input the subject, predicate, and object of a new 
+  # triple to add to the ontology.
+  def addTriple( self, subj, pred, obj ) :
+    self.addTriples( [ ( subj, pred, obj ) ] )
+
+
+  #################
+  #  ADD TRIPLES  #
+  #################
+  # add a batch of triples to the ontology, given as an iterable of
+  # ( subject, predicate, object ) triples or the path of an N-Triples
+  # delta file. when no rdflib Graph is retained, delta files are
+  # filtered like streamed ontologies.
+  # every index is updated in place, and only the closure of the terms
+  # below the changed subsumption edges is recompiled.
+  # delta files are parsed whole before any index changes, so a
+  # malformed one raises ValueError and leaves the ontology unchanged.
+  # return the number of triples that were new to the ontology.
+  def addTriples( self, triples ) :
+
+    if isinstance( triples, basestring ) :
+      triples = list( self.iterNTriples( triples, None if self.retainGraph else self.retainedPredicates() ) )
+
+    numAdded = 0
+
+    for ( subj, pred, obj ) in triples :
+      if self.graph is not None :
+        self.graph.add( ( subj, pred, obj ) )
+      if self.indexTriple( subj, pred, obj ) :
+        numAdded += 1
+
+    if numAdded :
+      self.bumpVersion()
+
+    logging.debug( "  ADD TRIPLES : added %s triples", numAdded )
+
+    return numAdded
+
+
+  ####################
+  #  REMOVE TRIPLES  #
+  ####################
+  # remove a batch of triples from the ontology, given like the
+  # triples of addTriples, updating every index in place.
+  # delta files are parsed whole first, as in addTriples.
+  # the membership prefilter keeps the data strings of removed
+  # triples, which only costs it precision.
+  # return the number of triples that were in the ontology.
+  def removeTriples( self, triples ) :
+
+    if isinstance( triples, basestring ) :
+      triples = list( self.iterNTriples( triples ) )
+
+    numRemoved = 0
+
+    for ( subj, pred, obj ) in triples :
+      if self.graph is not None :
+        self.graph.remove( ( subj, pred, obj ) )
+      if self.unindexTriple( subj, pred, obj ) :
+        numRemoved += 1
+
+    if numRemoved :
+      self.bumpVersion()
+
+    logging.debug( "  REMOVE TRIPLES : removed %s triples", numRemoved )
+
+    return numRemoved
+
+
+  ##################
+  #  BUMP VERSION  #
+  ##################
+  # record a change to the ontology. cached check results
+  # and plans describe the old ontology, so drop them.
+  def bumpVersion( self ) :
+
+    self.version += 1
+
+    if self.cache :
+      self.cache.clear()
+    self.plans.clear()
+
+
+  ############
+  #  CACHED  #
+  ############
+  # return the result of compute on the given args, answering from
+  # the check result cache when possible.
+  def cached( self, tag, compute, *args ) :
+
+    if self.cache is None :
+      return self.stored( tag, compute, *args )
+
+    cacheKey = ( tag, ) + args
+
+    try :
+      result = self.cache.get( cacheKey, CACHE_MISS )
+
+    # unhashable args cannot be cached
+    except TypeError :
+      return compute( *args )
+
+    hit = result is not CACHE_MISS
+
+    if not hit :
+      result = self.stored( tag, compute, *args )
+      self.cache.put( cacheKey, result )
+
+    if self.metrics is not None :
+      self.metrics.countCache( tag, hit )
+
+    return result
+
+
+  ############
+  #  STORED  #
+  ############
+  # return the result of compute on the given args, answering from
+  # the verdict store when possible.
+  def stored( self, tag, compute, *args ) :
+
+    if self.verdictStore is None or not tag in PERSISTED_CHECKS :
+      return compute( *args )
+
+    storeKey = self.verdictStore.makeKey( self.getContentHash(), tag, args )
+    if storeKey is None :
+      return compute( *args )
+
+    result = self.verdictStore.get( storeKey )
+
+    if result is None :
+      result = compute( *args )
+      self.verdictStore.put( storeKey, result )
+
+    return result
+
+
+  ######################
+  #  GET CONTENT HASH  #
+  ######################
+  # return the sha1 digest of the ontology content, the normalizer
+  # configuration, and the subsumption predicates, recomputing it once per version of the ontology.
+  # the ontology content is summed up by tripleSum, kept up to date as
+  # triples are (un)indexed, so the digest does not depend on the order
+  # the triples were loaded in and no triple is rehashed here.
+  def getContentHash( self ) :
+
+    contentHash = self.contentHash
+    if contentHash is not None and contentHash[0] == self.version :
+      return contentHash[1]
+
+    sha1 = hashlib.sha1( str( self.tripleSum ) )
+    sha1.update( self.normalizer.fingerprint() )
+    sha1.update( repr( sorted( self.subsumptionPredicates ) ) )
+
+    self.contentHash = ( self.version, sha1.digest() )
+    return self.contentHash[1]
+
+
+  #####################
+  #  GET CACHE STATS  #
+  #####################
+  # return the check result cache counters, or None if caching is disabled.
+  def getCacheStats( self ) :
+
+    if self.cache is None :
+      return None
+
+    stats = self.cache.getStats()
+    stats[ "version" ] = self.version
+    return stats
+
+
+  ####################
+  #  ENABLE METRICS  #
+  ####################
+  # start recording per stage counters into the given Metrics, or into a
+  # new one if None. the stage methods are only wrapped while metrics are
+  # enabled, so a disabled instance pays nothing for them.
+  # return the Metrics in use.
+  def enableMetrics( self, metrics=None ) :
+
+    if self.metrics is not None :
+      self.disableMetrics()
+
+    if metrics is None :
+      metrics = Metrics.Metrics()
+
+    for ( stage, keyArg ) in METRIC_STAGES :
+      setattr( self, stage, metrics.timed( stage, keyArg, getattr( self, stage ) ) )
+    self.iterTriples = metrics.scanned( self.iterTriples )
+
+    self.metrics = metrics
+    return metrics
+
+
+  #####################
+  #  DISABLE METRICS  #
+  #####################
+  # stop recording stage counters, restoring the unwrapped stage methods.
+  def disableMetrics( self ) :
+
+    if self.metrics is None :
+      return
+
+    for ( stage, keyArg ) in METRIC_STAGES :
+      del self.__dict__[ stage ]
+    del self.__dict__[ "iterTriples" ]
+
+    self.metrics = None
+
+
+  #################
+  #  GET METRICS  #
+  #################
+  # return the Metrics in use, or None if metrics are disabled.
+  def getMetrics( self ) :
+    return self.metrics
+
+
+  #############
+  #  PROFILE  #
+  #############
+  # context manager recording the stage counters of the calls made inside
+  # the with block into a fresh Metrics, e.g.
+  #   with ontods.profile() as metrics :
+  #     ontods.verifyBatch( batch, ignoreList )
+  #   print metrics.toPrometheus()
+  # any Metrics enabled before the block is restored afterwards, and does
+  # not see the calls made inside it.
+  @contextlib.contextmanager
+  def profile( self ) :
+
+    previous = self.metrics
+    metrics  = self.enableMetrics()
+
+    try :
+      yield metrics
+
+    finally :
+      self.disableMetrics()
+      if previous is not None :
+        self.enableMetrics( previous )
+
+
+  ###################
+  #  BUILD INDEXES  #
+  ###################
+  # rebuild the indexes from scratch over every triple currently in the ontology.
+  def buildIndexes( self ) :
+
+    if self.graph is None :
+      triples = list( self.iterTriples() )
+    else :
+      triples = self.graph
+
+    logging.debug( "  BUILD INDEXES : indexing %s triples", len( triples ) )
+
+    self.store          = self.newStore()
+    self.subjectIndex   = {}
+    self.objectIndex    = {}
+    self.termData       = {}
+    self.predicateIndex = {}
+    self.subjectUses    = {}
+    self.objectUses     = {}
+    self.parents        = {}
+    self.children       = {}
+    self.ancestors      = None
+    self.tripleSum      = 0
+
+    for ( s, p, o ) in triples :
+      self.indexTriple( s, p, o )
+
+    self.store.compact()
+    self.buildClosure()
+    self.buildPrefilter()
+
+
+  ###############
+  #  NEW STORE  #
+  ###############
+  # return an empty triple store of the configured backend type.
+  # raise ValueError for unrecognized backends.
+  def newStore( self ) :
+
+    if self.backend == "dict" :
+      return DictStore.DictStore()
+
+    elif self.backend == "array" :
+      return ArrayStore.ArrayStore()
+
+    else :
+      raise ValueError( "unrecognized backend '" + str( self.backend ) + "'" )
+
+
+  ##################
+  #  INDEX TRIPLE  #
+  ##################
+  # add the given triple to the triple store and data string indexes.
+  # return True if the triple is new, False otherwise.
+  def indexTriple( self, subj, pred, obj ) :
+
+    s = self.store.intern( subj )
+    p = self.store.intern( pred )
+    o = self.store.intern( obj )
+
+    # known triples are already indexed
+    if not self.store.add( s, p, o ) :
+      return False
+
+    self.indexTerm( self.subjectIndex, self.subjectUses, subj, s )
+    self.indexTerm( self.objectIndex, self.objectUses, obj, o )
+
+    self.tripleSum = ( self.tripleSum + self.tripleDigest( subj, pred, obj ) ) % TRIPLE_SUM_MODULUS
+
+    if self.prefilter is not None :
+      if self.prefilter.isFull() :
+        self.buildPrefilter()
+      else :
+        subjData = self.dataString( subj, s )
+        objData  = self.dataString( obj, o )
+        self.prefilterTriple( self.prefilter, [ subjData, subjData.lower() ], [ objData, objData.lower() ] )
+
+    # subsumption edges make the closure below them stale
+    if pred in self.subsumptionPredicates :
+      self.parents.setdefault( s, set() ).add( o )
+      self.children.setdefault( o, set() ).add( s )
+      if self.ancestors is not None :
+        self.staleTerms.add( s )
+      self.indexPredicate( s, p, o )
+
+    return True
+
+
+  ####################
+  #  UNINDEX TRIPLE  #
+  ####################
+  # remove the given triple from the triple store and data string indexes.
+  # return True if the triple was in the store, False otherwise.
+  def unindexTriple( self, subj, pred, obj ) :
+
+    s = self.store.handle( subj )
+    p = self.store.handle( pred )
+    o = self.store.handle( obj )
+
+    if s is None or p is None or o is None or not self.store.remove( s, p, o ) :
+      return False
+
+    self.releaseTerm( self.subjectIndex, self.subjectUses, subj, s )
+    self.releaseTerm( self.objectIndex, self.objectUses, obj, o )
+
+    self.tripleSum = ( self.tripleSum - self.tripleDigest( subj, pred, obj ) ) % TRIPLE_SUM_MODULUS
+
+    if pred in self.subsumptionPredicates :
+
+      self.unindexPredicate( s, p, o )
+
+      # other subsumption predicates may still relate the pair
+      if not any( self.store.term( q ) in self.subsumptionPredicates for q in self.store.predicates( s, o ) ) :
+        self.discardEdge( self.parents, s, o )
+        self.discardEdge( self.children, o, s )
+        if self.ancestors is not None :
+          self.staleTerms.add( s )
+
+    return True
+
+
+  ###################
+  #  TRIPLE DIGEST  #
+  ###################
+  # return the sha1 digest of the given triple, as an int.
+  # terms are written out by hand rather than with n3(), which is ten
+  # times slower and runs on every indexed triple.
+  def tripleDigest( self, subj, pred, obj ) :
+
+    text = u" ".join( [ self.termText( subj ), self.termText( pred ), self.termText( obj ) ] )
+
+    return int( hashlib.sha1( text.encode( "utf-8" ) ).hexdigest(), 16 )
+
+
+  ###############
+  #  TERM TEXT  #
+  ###############
+  # return the text of the given term hashed by tripleDigest.
+  def termText( self, term ) :
+
+    kind = type( term )
+
+    if kind is rdflib.URIRef :
+      return u"<%s>" % term
+
+    elif kind is rdflib.Literal :
+      return u'"%s"@%s^^%s' % ( term, term.language or u"", term.datatype or u"" )
+
+    return u"_:%s" % term
+
+
+  ##################
+  #  DISCARD EDGE  #
+  ##################
+  # drop the given target from the edge set of the given source in the given
+  # edge map, dropping the source once it has no edges left.
+  def discardEdge( self, edges, source, target ) :
+
+    targets = edges.get( source )
+
+    if targets is not None :
+      targets.discard( target )
+      if not targets :
+        del edges[ source ]
+
+
+  #####################
+  #  INDEX PREDICATE  #
+  #####################
+  # file the predicate of the given subsumption edge under every pair
+  # of the exact and lowercase data strings of its subject and object.
+  def indexPredicate( self, s, p, o ) :
+
+    subjData = self.dataString( self.store.term( s ), s )
+    objData  = self.dataString( self.store.term( o ), o )
+
+    for subjLabel in set( [ subjData, subjData.lower() ] ) :
+      for objLabel in set( [ objData, objData.lower() ] ) :
+        preds = self.predicateIndex.setdefault( ( subjLabel, objLabel ), [] )
+        if not p in preds :
+          preds.append( p )
+
+
+  #######################
+  #  UNINDEX PREDICATE  #
+  #######################
+  # unfile the predicate of a removed subsumption edge from every data string
+  # pair no other edge with that predicate still connects.
+  def unindexPredicate( self, s, p, o ) :
+
+    subjData = self.dataString( self.store.term( s ), s )
+    objData  = self.dataString( self.store.term( o ), o )
+
+    for subjLabel in set( [ subjData, subjData.lower() ] ) :
+      for objLabel in set( [ objData, objData.lower() ] ) :
+
+        preds = self.predicateIndex.get( ( subjLabel, objLabel ) )
+        if not preds or not p in preds :
+          continue
+
+        if any( p in self.store.predicates( s2, o2 ) for s2 in self.subjectIndex.get( subjLabel, () ) for o2 in self.objectIndex.get( objLabel, () ) ) :
+          continue
+
+        preds.remove( p )
+        if not preds :
+          del self.predicateIndex[ ( subjLabel, objLabel ) ]
+
+
+  #####################
+  #  BUILD PREFILTER  #
+  #####################
+  # build the membership prefilter over every indexed subject and object
+  # data string and every ( subject data, object data ) pair of a triple.
+  def buildPrefilter( self ) :
+
+    if self.prefilterRate is None :
+      return
+
+    subjLabels = self.invertIndex( self.subjectIndex )
+    objLabels  = self.invertIndex( self.objectIndex )
+
+    labelPairs = set()
+    for ( s, p, o ) in self.store.triples() :
+      for subjLabel in subjLabels.get( s, () ) :
+        for objLabel in objLabels.get( o, () ) :
+          labelPairs.add( ( subjLabel, objLabel ) )
+
+    prefilter = BloomFilter.BloomFilter( len( self.subjectIndex ) + len( self.objectIndex ) + len( labelPairs ), self.prefilterRate )
+
+    for label in self.subjectIndex :
+      prefilter.add( ( PREFILTER_SUBJECT, label ) )
+    for label in self.objectIndex :
+      prefilter.add( ( PREFILTER_OBJECT, label ) )
+    for labelPair in labelPairs :
+      prefilter.add( labelPair )
+
+    logging.debug( "  BUILD PREFILTER : filtering %s items in %s bytes", prefilter.count, len( prefilter.bits ) )
+
+    self.prefilter = prefilter
+
+
+  #######################
+  #  REFRESH PREFILTER  #
+  #######################
+  # keep a restored prefilter only if it was built at the configured false
+  # positive rate by a process hashing items alike, and rebuild it otherwise.
+  def refreshPrefilter( self ) :
+
+    prefilter = self.prefilter
+
+    if prefilter is not None and ( prefilter.errorRate != self.prefilterRate or not prefilter.isCurrent() ) :
+      self.prefilter = None
+
+    if self.prefilter is None :
+      self.buildPrefilter()
+
+
+  ######################
+  #  PREFILTER TRIPLE  #
+  ######################
+  # add the data strings of a new triple, given as lists of
+  # subject and object data strings, to the given prefilter.
+  def prefilterTriple( self, prefilter, subjLabels, objLabels ) :
+
+    for subjLabel in subjLabels :
+      prefilter.add( ( PREFILTER_SUBJECT, subjLabel ) )
+      for objLabel in objLabels :
+        prefilter.add( ( subjLabel, objLabel ) )
+
+    for objLabel in objLabels :
+      prefilter.add( ( PREFILTER_OBJECT, objLabel ) )
+
+
+  ##################
+  #  INVERT INDEX  #
+  ##################
+  # map the handles in the given data string index to their data strings.
+  def invertIndex( self, index ) :
+
+    labels = {}
+
+    for label in index :
+      for handle in index[ label ] :
+        labels.setdefault( handle, [] ).append( label )
+
+    return labels
+
+
+  #########################
+  #  GET PREFILTER STATS  #
+  #########################
+  # return the sizing and memory use of the prefilter, or None if it is disabled.
+  def getPrefilterStats( self ) :
+
+    if self.prefilter is None :
+      return None
+
+    return self.prefilter.getStats()
+
+
+  ###################
+  #  BUILD CLOSURE  #
+  ###################
+  # compile the transitive closure of the subsumption hierarchy,
+  # mapping every handle to the set of all handles subsuming it.
+  # e.g. if city < state and state < country, then city maps to { state, country }.
+  def buildClosure( self ) :
+
+    logging.debug( "  BUILD CLOSURE : compiling closure over %s subsumed uris", len( self.parents ) )
+
+    self.ancestors  = self.closeOver( self.parents, {} )
+    self.staleTerms = set()
+
+
+  #####################
+  #  REFRESH CLOSURE  #
+  #####################
+  # bring the closure up to date, compiling it if there is none yet.
+  # otherwise only the stale terms and every term below them are
+  # recompiled, reusing the closure of every other term.
+  def refreshClosure( self ) :
+
+    if self.ancestors is None :
+      self.buildClosure()
+      return
+
+    if not self.staleTerms :
+      return
+
+    affected = set()
+    frontier = list( self.staleTerms )
+    while frontier :
+      curr = frontier.pop()
+      if curr in affected :
+        continue
+      affected.add( curr )
+      frontier.extend( self.children.get( curr, [] ) )
+
+    logging.debug( "  REFRESH CLOSURE : recompiling closure over %s subsumed uris", len( affected ) )
+
+    for term in affected :
+      self.ancestors.pop( term, None )
+
+    self.closeOver( affected, self.ancestors )
+    self.staleTerms = set()
+
+
+  ################
+  #  CLOSE OVER  #
+  ################
+  # compile the closure of every given term with a direct subsumer into the
+  # given ancestors map, reusing the closure of any uri already in it.
+  # return the ancestors map.
+  def closeOver( self, terms, ancestors ) :
+
+    for term in terms :
+
+      if term in ancestors or not term in self.parents :
+        continue
+
+      # walk up the hierarchy, reusing the closure of any uri already compiled.
+      # the visited set keeps cycles in the ontology from looping forever.
+      reached  = set()
+      frontier = list( self.parents[ term ] )
+      while frontier :
+        curr = frontier.pop()
+        if curr in reached :
+          continue
+        reached.add( curr )
+        if curr in ancestors :
+          reached.update( ancestors[ curr ] )
+        else :
+          frontier.extend( self.parents.get( curr, [] ) )
+
+      ancestors[ term ] = frozenset( reached )
+
+    return ancestors
+
+
+  ##################
+  #  ITER TRIPLES  #
+  ##################
+  # yield every triple held in the triple store.
+  def iterTriples( self ) :
+
+    term = self.store.term
+
+    for ( s, p, o ) in self.store.triples() :
+      yield ( term( s ), term( p ), term( o ) )
+
+
+  ################
+  #  INDEX TERM  #
+  ################
+  # count a new use of the given handle in the given uses map, filing it
+  # on first use under both its exact and lowercase data strings,
+  # mirroring the matching rules of the lookups.
+  def indexTerm( self, index, uses, term, handle ) :
+
+    count          = uses.get( handle, 0 )
+    uses[ handle ] = count + 1
+
+    if count :
+      return
+
+    data = self.dataString( term, handle )
+
+    for label in [ data, data.lower() ] :
+      handles = index.setdefault( label, [] )
+      if not handle in handles :
+        handles.append( handle )
+
+
+  ##################
+  #  RELEASE TERM  #
+  ##################
+  # count a dropped use of the given handle in the given uses map,
+  # unfiling it from the given index once it has no uses left.
+  def releaseTerm( self, index, uses, term, handle ) :
+
+    uses[ handle ] -= 1
+
+    if uses[ handle ] :
+      return
+
+    del uses[ handle ]
+
+    data = self.dataString( term, handle )
+
+    for label in set( [ data, data.lower() ] ) :
+      handles = index.get( label )
+      if handles and handle in handles :
+        handles.remove( handle )
+        if not handles :
+          del index[ label ]
 
-# adapters path
-adaptersPath  = os.path.abspath( __file__ + "/../../../../adapters" )
-if not adaptersPath in sys.path :
-  sys.path.append( adaptersPath )
-import Adapter
 
-# settings dir
-settingsPath  = os.path.abspath( __file__ + "/../../core" )
-if not settingsPath in sys.path :
-  sys.path.append( settingsPath )
-import settings
+  #################
+  #  DATA STRING  #
+  #################
+  # return the data string of the given term, parsing it only once per handle.
+  def dataString( self, term, handle ) :
 
-# -------------------------------------- #
+    data = self.termData.get( handle )
 
+    if data is None :
+      data = self.parseData( term )
+      self.termData[ handle ] = data
 
-DEBUG = settings.DEBUG
+    return data
 
 
-class OntoDS( object ) :
+  ##################
+  #  LOOKUP TERMS  #
+  ##################
+  # grab the handles filed under the given data string in the given index.
+  def lookupTerms( self, index, val ) :
+
+    try :
+      return list( index.get( val, [] ) )
+
+    # unhashable values never match a data string
+    except TypeError :
+      return []
+
+
+  ##############
+  #  SNAPSHOT  #
+  ##############
+  # freeze the ontology and its compiled indexes into a compact, picklable dict.
+  # the triple store and indexes are pickled as they are held in memory, so
+  # restoring them is a single unpickle rather than a replay of every triple.
+  # terms are pickled by their position in a separate term table, which
+  # decodes much faster than pickled rdflib terms.
+  def snapshot( self ) :
+
+    self.refreshClosure()
+
+    termIds = {}   # map of terms to term table positions
+    terms   = []
+
+    # called on every object pickled, so keep it cheap
+    def termId( obj ) :
+      if not type( obj ) in TERM_TYPES :
+        return None
+      pos = termIds.get( obj )
+      if pos is None :
+        pos = termIds[ obj ] = len( terms )
+        terms.append( obj )
+      return pos
+
+    buf     = cStringIO.StringIO()
+    pickler = pickle.Pickler( buf, pickle.HIGHEST_PROTOCOL )
+    pickler.persistent_id = termId
+    pickler.fast          = 1
+
+    with self.pausedGC() :
+      pickler.dump( dict( ( name, getattr( self, name ) ) for name in SNAPSHOT_STATE ) )
+
+    return { "snapshotVersion"       : SNAPSHOT_VERSION,
+             "nosql_type"            : self.nosql_type,
+             "version"               : self.version,
+             "backend"               : self.backend,
+             "normalizer"            : self.normalizer.fingerprint(),
+             "subsumptionPredicates" : sorted( self.subsumptionPredicates ),
+             "terms"                 : self.encodeTerms( terms ),
+             "state"                 : buf.getvalue() }
 
 
-  ################
-  #  ATTRIBUTES  #
-  ################
-  nosql_type    = None   # the type of nosql database under consideration
-  ontology      = None   # an rdflib Graph object instance
-  MONGOSAVEPATH = None
+  ##################
+  #  ENCODE TERMS  #
+  ##################
+  # encode the given term table as the list of the lexical values of its
+  # terms, and the list of ( position, kind, language, datatype ) of every
+  # term in it that is not a uri.
+  def encodeTerms( self, terms ) :
 
+    values = [ unicode( term ) for term in terms ]
+    others = []
 
-  ##########
-  #  INIT  #
-  ##########
-  def __init__( self, nosql_type ) :
+    for i, term in enumerate( terms ) :
+      if isinstance( term, rdflib.BNode ) :
+        others.append( ( i, "b", None, None ) )
+      elif isinstance( term, rdflib.Literal ) :
+        others.append( ( i, "l", term.language, term.datatype ) )
 
-    # save nosql db type
-    self.nosql_type = nosql_type
+    return values, others
 
-    # instantiate the ontology graph
-    self.ontology  = rdflib.Graph()
 
-    logging.debug( "  ...instantiated OntoDS instance with ontology object '" + str( self.ontology ) + "'" )
+  ##################
+  #  DECODE TERMS  #
+  ##################
+  # rebuild the term table encoded by encodeTerms.
+  def decodeTerms( self, encoded ) :
 
+    values, others = encoded
 
-  ###################
-  #  LOAD ONTOLOGY  #
-  ###################
-  # load the ontology at the given file path
-  def loadOntology( self, ontoPath ) :
+    # the uris were valid when encoded, so skip the validation in URIRef.__new__
+    newText = unicode.__new__
+    uriRef  = rdflib.URIRef
+    terms   = [ newText( uriRef, value ) for value in values ]
 
-    if os.path.isfile( ontoPath ) :
+    for ( i, kind, language, datatype ) in others :
+      if kind == "b" :
+        terms[ i ] = rdflib.BNode( values[ i ] )
+      else :
+        terms[ i ] = rdflib.Literal( values[ i ], lang=language, datatype=datatype )
+
+    return terms
+
+
+  ###############
+  #  PAUSED GC  #
+  ###############
+  # context manager pausing the cyclic garbage collector, which otherwise
+  # runs over and over while millions of index objects are (un)pickled.
+  @contextlib.contextmanager
+  def pausedGC( self ) :
+
+    enabled = gc.isenabled()
+    gc.disable()
+
+    try :
+      yield
+
+    finally :
+      if enabled :
+        gc.enable()
 
-      logging.debug( "  LOAD ONTOLOGY : loading ontology from '" + ontoPath + "'" )
 
-      self.ontology.parse( ontoPath, format="nt" )
-      for stmt in self.ontology :
-        pprint.pprint(stmt)
+  ######################
+  #  RESTORE SNAPSHOT  #
+  ######################
+  # replace the ontology and its indexes with the contents of the given snapshot,
+  # adopting the subsumption predicates the snapshot was built with.
+  # snapshots of another backend, or taken under another normalizer,
+  # have their triples indexed afresh.
+  # raise ValueError for snapshots of another layout version.
+  def restoreSnapshot( self, snapshot ) :
 
+    if snapshot.get( "snapshotVersion" ) != SNAPSHOT_VERSION :
+      raise ValueError( "unsupported snapshot version '" + str( snapshot.get( "snapshotVersion" ) ) + "'" )
+
+    unpickler = pickle.Unpickler( cStringIO.StringIO( snapshot[ "state" ] ) )
+    unpickler.persistent_load = self.decodeTerms( snapshot[ "terms" ] ).__getitem__
+
+    with self.pausedGC() :
+      state = unpickler.load()
+
+    self.subsumptionPredicates = set( snapshot[ "subsumptionPredicates" ] )
+    self.graph                 = None
+    self.staleTerms            = set()
+
+    if snapshot[ "backend" ] == self.backend and snapshot[ "normalizer" ] == self.normalizer.fingerprint() :
+      for name in SNAPSHOT_STATE :
+        setattr( self, name, state[ name ] )
+      self.refreshPrefilter()
+
+    # handles differ across backends, and data strings across normalizers
     else :
-      sys.exit( "  LOAD ONTOLOGY : file not found '" + ontoPath + "'" )
+      self.store     = state[ "store" ]
+      self.prefilter = None
+      self.buildIndexes()
 
+    self.bumpVersion()
 
-  ################
-  #  ADD TRIPLE  #
-  ################
-  # input the subject, predicate, and object of a new 
-  # triple to add to the ontology.
-  def addTriple( self, subj, pred, obj ) :
-    self.ontology.add( ( subj, pred, obj) )
+    logging.debug( "  RESTORE SNAPSHOT : restored %s triples", len( self.store ) )
 
 
   ####################
   #  PRINT ONTOLOGY  #
   ####################
   def printOntology( self ) :
-    for stmt in self.ontology :
+    for stmt in self.iterTriples() :
       pprint.pprint(stmt)
 
 
@@ -100,66 +1452,576 @@ class OntoDS( object ) :
   # assume insert styled in key-value format.
   # return true on satisfaction
   # return false on dissatisfaction
-  # also input a list of keys to ignore.
+  # also input a list of keys, or path patterns, to ignore.
   def verify( self, queryMap, ignoreList ) :
 
-    # get all data in query st keys are subjects in the ontology
-    for k in queryMap :
+    if self.isNested( queryMap ) :
+      return self.verifyNested( queryMap, ignoreList )
 
-      if not k in ignoreList :
+    checked, pairs = self.getPlan( queryMap, ignoreList )
 
-        v = queryMap[ k ]
+    # make sure KV pairs obey ontology subsumption rules
+    for k in checked :
+      v = queryMap[ k ]
+      if not self.passesKVSubsumption( k, v ) :
+        logging.debug( "  VERIFY : query fails on KV subsumption for key '%s' and val '%s'", k, v )
+        return False
+
+    # make sure values across related keys obey ontology subsumption rules
+    for ( k1, k2 ) in pairs :
+      if not self.checkContainment( queryMap[ k1 ], queryMap[ k2 ] ) :
+        logging.debug( "  VERIFY : query fails on Multi Key subsumption for keys '%s' and '%s'", k1, k2 )
+        return False
+
+    return True
+
+
+  ###################
+  #  VERIFY NESTED  #
+  ###################
+  # verify an insert/update query holding nested maps and lists.
+  def verifyNested( self, queryMap, ignoreList ) :
+    return self.checkNested( queryMap, ignoreList ) is None
+
+
+  ##################
+  #  CHECK NESTED  #
+  ##################
+  # check an insert/update query holding nested maps and lists.
+  # every map in the query is checked like a flat query over its data
+  # string fields : each field's key must subsume its data, and the data
+  # of fields related by their keys must be related the same way.
+  # a list field holds several data strings for its key. every one must
+  # pass kv subsumption, and every one must be subsumed by some data
+  # string of each field subsuming its key.
+  # maps inside lists are checked on their own, under the path of the list.
+  # ignored paths skip the kv and multi key checks of a field, and
+  # every check inside an ignored map or list.
+  # return None on satisfaction, and a Verdict naming the failing
+  # dotted paths otherwise.
+  def checkNested( self, queryMap, ignoreList ) :
+
+    for fields in self.nestedFields( queryMap, ignoreList ) :
+
+      for ( k1, path1, vals1, ignored ) in fields :
+
+        if ignored :
+          continue
+
+        # make sure KV pairs obey ontology subsumption rules
+        for v1 in vals1 :
+          if not self.passesKVSubsumption( k1, v1 ) :
+            logging.debug( "  CHECK NESTED : query fails on KV subsumption for path '%s' and val '%s'", path1, v1 )
+            return self.kvFailure( k1, v1, path1 )
+
+        # make sure values across related keys obey ontology subsumption rules
+        for ( k2, path2, vals2, ignored2 ) in fields :
+          if self.checkContainment( k1, k2 ) :
+            for v1 in vals1 :
+              if not any( self.checkContainment( v1, v2 ) for v2 in vals2 ) :
+                logging.debug( "  CHECK NESTED : query fails on Multi Key subsumption for paths '%s' and '%s'", path1, path2 )
+                return Verdict.Verdict( REASON_MULTI_KEY, path1, v1, path2, vals2[0] if len( vals2 ) == 1 else list( vals2 ),
+                                        subjects = self.getSubjects( v1 ),
+                                        objects  = [ o for v2 in vals2 for o in self.getObjects( v2 ) ] )
+
+    return None
+
+
+  ###################
+  #  NESTED FIELDS  #
+  ###################
+  # walk the maps of an insert/update query holding nested maps and lists,
+  # yielding for each map the list of ( key, path, data strings, ignored )
+  # of its data fields, as checked by checkNested. maps inside ignored
+  # fields are skipped.
+  def nestedFields( self, queryMap, ignoreList ) :
+
+    nodes = [ ( None, queryMap ) ]
+
+    while nodes :
+
+      prefix, node = nodes.pop()
+      fields       = []   # ( key, path, data strings, ignored ) of the data fields in node
+
+      for k in node :
+
+        path    = k if prefix is None else prefix + "." + k
+        ignored = self.isIgnored( path, ignoreList )
+        v       = node[ k ]
+
+        if not isinstance( v, NESTED_TYPES ) :
+          fields.append( ( k, path, ( v, ), ignored ) )
+          continue
+
+        if ignored :
+          continue
+
+        if isinstance( v, dict ) :
+          nodes.append( ( path, v ) )
+          continue
+
+        # split lists into data strings and nested maps, flattening inner lists
+        vals  = []
+        items = list( reversed( v ) )
+        while items :
+          item = items.pop()
+          if isinstance( item, dict ) :
+            nodes.append( ( path, item ) )
+          elif isinstance( item, ( list, tuple ) ) :
+            items.extend( reversed( item ) )
+          else :
+            vals.append( item )
+
+        if vals :
+          fields.append( ( k, path, vals, False ) )
+
+      yield fields
+
+
+  ###############
+  #  IS NESTED  #
+  ###############
+  # check if the given insert/update query holds nested maps or lists.
+  def isNested( self, queryMap ) :
+
+    for v in queryMap.itervalues() :
+      if isinstance( v, NESTED_TYPES ) :
+        return True
+
+    return False
+
+
+  ################
+  #  IS IGNORED  #
+  ################
+  # check if the given key or dotted path is in the ignore list, or
+  # matches one of its path patterns.
+  def isIgnored( self, path, ignoreList ) :
+
+    if path in ignoreList :
+      return True
+
+    if not isinstance( path, basestring ) :
+      return False
+
+    for pattern in ignoreList :
+      if isinstance( pattern, basestring ) and fnmatch.fnmatchcase( path, pattern ) :
+        return True
+
+    return False
+
+
+  ##############
+  #  GET PLAN  #
+  ##############
+  # return the constraint plan for the key set of the given query,
+  # compiling it on first use.
+  # a plan only depends on the key names, so it is shared by every
+  # query with the same keys and ignore list.
+  def getPlan( self, queryMap, ignoreList ) :
+
+    planKey = ( frozenset( queryMap ), frozenset( ignoreList ) )
+
+    plan = self.plans.get( planKey )
+    if plan is None :
+      plan = self.compilePlan( queryMap, ignoreList )
+      self.plans.put( planKey, plan )
+
+    return plan
+
+
+  ##################
+  #  COMPILE PLAN  #
+  ##################
+  # work out which checks apply to queries with the keys of the given query.
+  # return the tuple of keys whose kv pairs are checked, and the tuple of
+  # related ( key1, key2 ) pairs, where key1 is subsumed by key2 and so
+  # the value of key1 must be subsumed by the value of key2.
+  def compilePlan( self, queryMap, ignoreList ) :
+
+    keys    = list( queryMap )
+    checked = tuple( k for k in keys if not self.isIgnored( k, ignoreList ) )
+    pairs   = tuple( ( k1, k2 ) for k1 in checked for k2 in keys if self.checkContainment( k1, k2 ) )
+
+    if DEBUG :
+      logging.debug( "  COMPILE PLAN : checked keys %s, related key pairs %s", checked, pairs )
+
+    return checked, pairs
+
+
+  #############################
+  #  VERIFY WITH EXPLANATION  #
+  #############################
+  # verify an insert/update query, stopping at the first failing check.
+  # return a Verdict, which is truthy on satisfaction and carries the
+  # evidence for the first failure otherwise.
+  # also input a list of keys to ignore.
+  def verifyWithExplanation( self, queryMap, ignoreList ) :
+
+    if self.isNested( queryMap ) :
+      failure = self.checkNested( queryMap, ignoreList )
+      if failure is None :
+        return Verdict.Verdict( REASON_OK )
+      return failure
+
+    checked, pairs = self.getPlan( queryMap, ignoreList )
+
+    # make sure KV pairs obey ontology subsumption rules
+    for k in checked :
+      v = queryMap[ k ]
+      if not self.passesKVSubsumption( k, v ) :
+        logging.debug( "  VERIFY WITH EXPLANATION : query fails on KV subsumption for key '%s' and val '%s'", k, v )
+        return self.kvFailure( k, v, k )
+
+    # make sure values across related keys obey ontology subsumption rules
+    for ( k1, k2 ) in pairs :
+      if not self.checkContainment( queryMap[ k1 ], queryMap[ k2 ] ) :
+        logging.debug( "  VERIFY WITH EXPLANATION : query fails on Multi Key subsumption for keys '%s' and '%s'", k1, k2 )
+        return Verdict.Verdict( REASON_MULTI_KEY, k1, queryMap[ k1 ], k2, queryMap[ k2 ],
+                                subjects = self.getSubjects( queryMap[ k1 ] ),
+                                objects  = self.getObjects( queryMap[ k2 ] ) )
+
+    return Verdict.Verdict( REASON_OK )
+
+
+  ################
+  #  KV FAILURE  #
+  ################
+  # return the Verdict for the given kv pair failing kv subsumption,
+  # naming the key by the given path.
+  def kvFailure( self, key, val, path ) :
+
+    subjs  = self.lookupTerms( self.subjectIndex, val )
+    objs   = self.lookupTerms( self.objectIndex, key )
+    failed = None
+
+    for s in subjs :
+      if not any( self.store.hasPair( s, o ) for o in objs ) :
+        failed = self.store.term( s )
+        break
+
+    return Verdict.Verdict( REASON_KV, path, val,
+                            subjects      = [ self.store.term( s ) for s in subjs ],
+                            objects       = [ self.store.term( o ) for o in objs ],
+                            failedSubject = failed )
+
+
+  #################
+  #  VERIFY MANY  #
+  #################
+  # lazily verify a stream of insert/update queries against the ontology,
+  # yielding one verdict per query in input order.
+  # queries are verified in batches of batchSize so every distinct
+  # kv pair and key/data pair in a batch is checked only once.
+  def verifyMany( self, queryMaps, ignoreList, batchSize=1000 ) :
+    return self.mapBatches( self.verifyBatch, queryMaps, ignoreList, batchSize )
+
+
+  ##################
+  #  EXPLAIN MANY  #
+  ##################
+  # lazily verify a stream of insert/update queries like verifyMany,
+  # yielding one Verdict per query in input order.
+  def explainMany( self, queryMaps, ignoreList, batchSize=1000 ) :
+    return self.mapBatches( self.explainBatch, queryMaps, ignoreList, batchSize )
+
+
+  #################
+  #  MAP BATCHES  #
+  #################
+  # split a stream of insert/update queries into batches of batchSize,
+  # yielding the results of the given batch check in input order.
+  def mapBatches( self, check, queryMaps, ignoreList, batchSize ) :
+
+    batch = []
+
+    for queryMap in queryMaps :
+
+      batch.append( queryMap )
+
+      if len( batch ) >= batchSize :
+        for verdict in check( batch, ignoreList ) :
+          yield verdict
+        batch = []
+
+    for verdict in check( batch, ignoreList ) :
+      yield verdict
+
+
+  ##################
+  #  VERIFY BATCH  #
+  ##################
+  # verify a list of insert/update queries, sharing the results of
+  # ontology checks across queries with the same data.
+  # return the list of verdicts in input order.
+  def verifyBatch( self, batch, ignoreList ) :
+
+    kvMemo      = {}  # ( key, val ) -> passes kv subsumption
+    containMemo = {}  # ( subj, obj ) -> containment holds
+
+    verdicts = []
+
+    for queryMap in batch :
+
+      if self.isNested( queryMap ) :
+        verdicts.append( self.verifyNested( queryMap, ignoreList ) )
+        continue
+
+      checked, pairs = self.getPlan( queryMap, ignoreList )
+
+      try :
+        verdict = True
 
         # make sure KV pairs obey ontology subsumption rules
+        for k in checked :
+          kv = ( k, queryMap[ k ] )
+          if not kv in kvMemo :
+            kvMemo[ kv ] = self.passesKVSubsumption( k, queryMap[ k ] )
+          if not kvMemo[ kv ] :
+            verdict = False
+            break
+
+        # make sure values across related keys obey ontology subsumption rules
+        if verdict :
+          for ( k1, k2 ) in pairs :
+            vals = ( queryMap[ k1 ], queryMap[ k2 ] )
+            if not vals in containMemo :
+              containMemo[ vals ] = self.checkContainment( vals[0], vals[1] )
+            if not containMemo[ vals ] :
+              verdict = False
+              break
+
+      # unhashable data cannot be shared across queries
+      except TypeError :
+        verdict = self.verify( queryMap, ignoreList )
+
+      verdicts.append( verdict )
+
+    return verdicts
+
+
+  ###################
+  #  EXPLAIN BATCH  #
+  ###################
+  # verify a list of insert/update queries like verifyBatch, explaining
+  # only the failures. return the list of Verdicts in input order.
+  def explainBatch( self, batch, ignoreList ) :
+
+    verdicts = []
+
+    for queryMap, verdict in zip( batch, self.verifyBatch( batch, ignoreList ) ) :
+      if verdict :
+        verdicts.append( Verdict.Verdict( REASON_OK ) )
+      else :
+        verdicts.append( self.verifyWithExplanation( queryMap, ignoreList ) )
+
+    return verdicts
+
+
+  ###################
+  #  VERIFY UPDATE  #
+  ###################
+  # given an existing document and an update patch mapping keys to their new
+  # values, determine if the updated document aligns with the semantics
+  # in the given ontology.
+  # assumes the existing document already passes, so only the kv pairs
+  # changed by the patch and the key pairs related to them are checked.
+  # also input a list of keys to ignore.
+  def verifyUpdate( self, existingDoc, patch, ignoreList ) :
+
+    updatedDoc = dict( existingDoc )
+    updatedDoc.update( patch )
+
+    # nested documents are checked whole
+    if self.isNested( updatedDoc ) :
+      return self.verifyNested( updatedDoc, ignoreList )
+
+    changed = [ k for k in patch if not k in existingDoc or existingDoc[ k ] != patch[ k ] ]
+
+    for k in changed :
+
+      v = updatedDoc[ k ]
+
+      if not self.isIgnored( k, ignoreList ) :
+
+        # make sure the changed KV pair obeys ontology subsumption rules
         if not self.passesKVSubsumption( k, v ) :
-          logging.debug( "  VERIFY : query fails on KV subsumption for key '" + str( k ) + "' and val '" + v + "'" )
+          logging.debug( "  VERIFY UPDATE : update fails on KV subsumption for key '%s'", k )
           return False
 
-        # make sure values across keys obey ontology subsumption rules
-        elif not self.passesMultiKeySubsumption( k, v, queryMap ) : 
-          logging.debug( "  VERIFY : query fails on Multi Key subsumption for key '" + str( k ) + "' and val '" + v + "'" )
+        # make sure the changed value is subsumed by the values of the keys subsuming its key
+        for k2 in updatedDoc :
+          if self.checkContainment( k, k2 ) and not self.checkContainment( v, updatedDoc[ k2 ] ) :
+            logging.debug( "  VERIFY UPDATE : update fails on Multi Key subsumption for keys '%s' and '%s'", k, k2 )
+            return False
+
+      # make sure the changed value subsumes the values of the keys its key subsumes.
+      # changed keys were already checked against every key above.
+      for k1 in updatedDoc :
+        if self.isIgnored( k1, ignoreList ) or k1 in changed :
+          continue
+        if self.checkContainment( k1, k ) and not self.checkContainment( updatedDoc[ k1 ], v ) :
+          logging.debug( "  VERIFY UPDATE : update fails on Multi Key subsumption for keys '%s' and '%s'", k1, k )
           return False
 
     return True
 
 
+  ####################
+  #  VERIFY COLUMNS  #
+  ####################
+  # verify a batch of insert/update queries given in columnar form,
+  # as a map of keys to equal length sequences of values.
+  # each column is factorized into its distinct values, so every distinct
+  # kv pair and related data pair is checked once, and the verdicts are
+  # broadcast back over the rows.
+  # return a numpy boolean mask of passing rows and a numpy int8 array
+  # of per row REASON_* codes.
+  # raise ImportError without numpy, and ValueError if the columns
+  # differ in length.
+  def verifyColumns( self, columns, ignoreList ) :
+
+    if numpy is None :
+      raise ImportError( "numpy is required for columnar verification" )
+
+    keys    = list( columns )
+    numRows = len( columns[ keys[0] ] ) if keys else 0
+
+    uniques = {}
+    codes   = {}
+    for k in keys :
+      if len( columns[ k ] ) != numRows :
+        raise ValueError( "column '" + str( k ) + "' holds " + str( len( columns[ k ] ) ) + " rows, expected " + str( numRows ) )
+      uniques[ k ], codes[ k ] = self.factorize( columns[ k ] )
+
+    kvOk    = numpy.ones( numRows, dtype=bool )
+    multiOk = numpy.ones( numRows, dtype=bool )
+
+    for k1 in keys :
+
+      if self.isIgnored( k1, ignoreList ) :
+        continue
+
+      # make sure KV pairs obey ontology subsumption rules
+      ok    = numpy.array( [ self.passesKVSubsumption( k1, v ) for v in uniques[ k1 ] ], dtype=bool )
+      kvOk &= ok[ codes[ k1 ] ]
+
+      # make sure values across related keys obey ontology subsumption rules
+      for k2 in keys :
+
+        if not self.checkContainment( k1, k2 ) :
+          continue
+
+        width             = len( uniques[ k2 ] )
+        pairs, pairCodes  = numpy.unique( codes[ k1 ] * width + codes[ k2 ], return_inverse=True )
+        ok                = numpy.array( [ self.checkContainment( uniques[ k1 ][ c // width ], uniques[ k2 ][ c % width ] ) for c in pairs ], dtype=bool )
+        multiOk          &= ok[ pairCodes ]
+
+    reasons = numpy.full( numRows, REASON_OK, dtype=numpy.int8 )
+    reasons[ ~multiOk ] = REASON_MULTI_KEY
+    reasons[ ~kvOk ]    = REASON_KV
+
+    return kvOk & multiOk, reasons
+
+
+  ###############
+  #  FACTORIZE  #
+  ###############
+  # split the given column into the list of its distinct values, in order of
+  # first appearance, and a numpy array of each row's position in that list.
+  def factorize( self, column ) :
+
+    positions = {}
+    uniques   = []
+    codes     = numpy.empty( len( column ), dtype=numpy.int64 )
+
+    for i, val in enumerate( column ) :
+      code = positions.get( val )
+      if code is None :
+        code = len( uniques )
+        positions[ val ] = code
+        uniques.append( val )
+      codes[ i ] = code
+
+    return uniques, codes
+
+
   #############
   #  EXPLAIN  #
   #############
   # given an insert/update query, explain why the semantics
   # align with the semantics of the given ontology.
-  # also input a list of keys to ignore.
+  # also input a list of keys, or path patterns, to ignore.
   def explain( self, queryMap, ignoreList ) :
 
+    if self.isNested( queryMap ) :
+      return self.explainNested( queryMap, ignoreList )
+
     explanations = []
 
     # get all data in query st keys are subjects in the ontology
     for k in queryMap :
 
-      if not k in ignoreList :
+      if not self.isIgnored( k, ignoreList ) :
 
         v = queryMap[ k ]
 
         # make sure KV pairs obey ontology subsumption rules
         if not self.passesKVSubsumption( k, v ) :
-          logging.debug( "  EXPLAIN : fails KV Subsumption : key '" + k +  "', value '" + v + "'" )
+          logging.debug( "  EXPLAIN : fails KV Subsumption : key '%s', value '%s'", k, v )
           explanations.append( self.explainKVSubsumption( k, v ) )
 
         # make sure values across keys obey ontology subsumption rules
         elif not self.passesMultiKeySubsumption( k, v, queryMap ) :
-          logging.debug( "  EXPLAIN : fails Multi Key Subsumption : key '" + k +  "', value '" + v + "'" )
+          logging.debug( "  EXPLAIN : fails Multi Key Subsumption : key '%s', value '%s'", k, v )
           explanations.append( self.explainMultiKeySubsumption( k, v, queryMap ) )
 
     return explanations
 
 
+  ####################
+  #  EXPLAIN NESTED  #
+  ####################
+  # explain every failing data string of an insert/update query holding
+  # nested maps and lists, walking its fields like checkNested.
+  def explainNested( self, queryMap, ignoreList ) :
+
+    explanations = []
+
+    for fields in self.nestedFields( queryMap, ignoreList ) :
+
+      for ( k1, path1, vals1, ignored ) in fields :
+
+        if ignored :
+          continue
+
+        for v1 in vals1 :
+
+          # make sure KV pairs obey ontology subsumption rules
+          if not self.passesKVSubsumption( k1, v1 ) :
+            logging.debug( "  EXPLAIN NESTED : fails KV Subsumption : path '%s', value '%s'", path1, v1 )
+            explanations.append( self.explainKVSubsumption( k1, v1 ) )
+            continue
+
+          # make sure values across related keys obey ontology subsumption rules
+          for ( k2, path2, vals2, ignored2 ) in fields :
+            if self.checkContainment( k1, k2 ) and not any( self.checkContainment( v1, v2 ) for v2 in vals2 ) :
+              logging.debug( "  EXPLAIN NESTED : fails Multi Key Subsumption : paths '%s' and '%s', value '%s'", path1, path2, v1 )
+              explanations.append( "EXPLANATION : no predicates map subject '" + str( v1 ) + "' at '" + path1 +
+                                   "' to the data of '" + path2 + "' : " + str( list( vals2 ) ) )
+              break
+
+    return explanations
+
+
   ###################################
   #  EXPLAIN MULTI KEY SUBSUMPTION  #
   ###################################
   # provides explanations for both working and failing insertions/updates
   def explainMultiKeySubsumption( self, k, v, queryMap ) :
 
-    logging.debug( "  EXPLAIN MULTI KEY SUBSUMPTION : running test..." )
+    if DEBUG :
+      logging.debug( "  EXPLAIN MULTI KEY SUBSUMPTION : running test..." )
 
     # CASE : PICKLE DB
     if self.nosql_type == "pickledb" :
@@ -179,7 +2041,8 @@ class OntoDS( object ) :
   ############################################
   def explainMultiKeySubsumption_pickledb( self, key1, val1, queryMap ) :
 
-    logging.debug( "  EXPLAIN MULTI KEY SUBSUMPTION PICKLE DB : running test..." )
+    if DEBUG :
+      logging.debug( "  EXPLAIN MULTI KEY SUBSUMPTION PICKLE DB : running test..." )
 
     for key2 in queryMap :
 
@@ -188,11 +2051,7 @@ class OntoDS( object ) :
       #print "key1 = " + key1 + ", key2 = " + key2
       if self.checkContainment( key1, key2 ) :
 
-        # grab the predicates relating keys 1 and 2
-        # assume the same predicates relate the corresponding data in the ontology.
-        predList = self.getPredicates( key1, key2 )
-        #print predList 
-
+        # key 1 is subsumed by key 2, so the corresponding data must be as well.
         if not self.checkContainment( val1, val2 ) :
           return "EXPLANATION : no predicates map subject '" + str( val1 ) + "' to object '" + str( key1 ) + "'"
 
@@ -211,10 +2070,11 @@ class OntoDS( object ) :
   ############################
   def explainKVSubsumption( self, key, val ) :
 
-    logging.debug( "  EXPLAIN KV SUBSUMPTION : running test..." )
+    if DEBUG :
+      logging.debug( "  EXPLAIN KV SUBSUMPTION : running test..." )
 
-    subjs = self.getSubjects( val )
-    objs  = self.getObjects( key )
+    subjs = self.lookupTerms( self.subjectIndex, val )
+    objs  = self.lookupTerms( self.objectIndex, key )
 
     if len( subjs ) < 1 or len( objs ) < 1 :
       return "EXPLANATION : no predicates map subject '" + str( val ) + "' to object '" + str( key ) + "'"
@@ -225,8 +2085,8 @@ class OntoDS( object ) :
 
       # make sure every subject is subsumed by some valid object
       for o in objs :
-        if ( s, None, o ) in self.ontology :
-          newPreds = self.getPredicates( s, o )
+        if self.store.hasPair( s, o ) :
+          newPreds = [ self.store.term( p ) for p in self.store.predicates( s, o ) ]
           for p in newPreds :
             if not p in predList :
               predList.append( p )
@@ -245,17 +2105,40 @@ class OntoDS( object ) :
   # make sure keys subsume values according to the ontology.
   def passesKVSubsumption( self, key, val ) :
 
-    logging.debug( "  PASSES KV SUBSUMPTION : running test..." )
+    if self.prefilter is not None :
+      try :
+        # values naming no subject pass vacuously
+        if not ( PREFILTER_SUBJECT, val ) in self.prefilter :
+          return True
+        # and values naming subjects never related to the key fail.
+        # the subject test may be a false positive, so confirm it.
+        if not ( val, key ) in self.prefilter :
+          return not self.subjectIndex.get( val )
+
+      # unhashable values are left to the full check
+      except TypeError :
+        pass
+
+    return self.cached( "kv", self.computeKVSubsumption, key, val )
+
+
+  ############################
+  #  COMPUTE KV SUBSUMPTION  #
+  ############################
+  def computeKVSubsumption( self, key, val ) :
 
-    subjs = self.getSubjects( val )
-    objs  = self.getObjects( key )
+    if DEBUG :
+      logging.debug( "  PASSES KV SUBSUMPTION : running test..." )
+
+    subjs = self.lookupTerms( self.subjectIndex, val )
+    objs  = self.lookupTerms( self.objectIndex, key )
 
     for s in subjs :
       flag = False
 
       # make sure every subject is subsumed by some valid object
       for o in objs :
-        if ( s, None, o ) in self.ontology :
+        if self.store.hasPair( s, o ) :
           flag = True
 
       # return False otherwise
@@ -271,7 +2154,8 @@ class OntoDS( object ) :
   # make sure data across related keys pass subsumption rules.
   def passesMultiKeySubsumption( self, key, val, queryMap ) :
 
-    logging.debug( "  PASSES MULTI KEY SUBSUMPTION : running test..." )
+    if DEBUG :
+      logging.debug( "  PASSES MULTI KEY SUBSUMPTION : running test..." )
 
     # CASE : PICKLE DB
     if self.nosql_type == "pickledb" :
@@ -291,7 +2175,8 @@ class OntoDS( object ) :
   ###########################################
   def passesMultiKeySubsumption_pickledb( self, key1, val1, queryMap ) :
 
-    logging.debug( "  PASSES MULTI KEY SUBSUMPTION PICKLE DB : running test..." )
+    if DEBUG :
+      logging.debug( "  PASSES MULTI KEY SUBSUMPTION PICKLE DB : running test..." )
 
     for key2 in queryMap :
 
@@ -300,13 +2185,9 @@ class OntoDS( object ) :
       #print "key1 = " + key1 + ", key2 = " + key2
       if self.checkContainment( key1, key2 ) :
 
-        # grab the predicates relating keys 1 and 2
-        # assume the same predicates relate the corresponding data in the ontology.
-        predList = self.getPredicates( key1, key2 )
-        #print predList 
-
+        # key 1 is subsumed by key 2, so the corresponding data must be as well.
         if not self.checkContainment( val1, val2 ) :
-          logging.debug( "  PASSES MULTI KEY SUBSUMPTION PICKLE DB : containment failed for val1 '" + str( val1 ) + "' and val2 '" + val2 + "'" )
+          logging.debug( "  PASSES MULTI KEY SUBSUMPTION PICKLE DB : containment failed for val1 '%s' and val2 '%s'", val1, val2 )
           return False
 
     return True
@@ -322,80 +2203,64 @@ class OntoDS( object ) :
   ####################
   #  GET PREDICATES  #
   ####################
-  # grab the list of predicates in the ontology connecting 
-  # the given subject and object keys
+  # grab the list of subsumption predicates in the ontology relating
+  # the given subject and object data strings.
+  # return an empty list if no predicate relates them.
   def getPredicates( self, key_subj, key_obj ) :
 
-    logging.debug( "------------------------------------------" )
-    logging.debug( "  GET PREDICATES : running process..." )
-    logging.debug( "    key_subj = " + str( key_subj ) )
-    logging.debug( "    key_obj  = " + str( key_obj ) )
+    try :
+      preds = self.predicateIndex.get( ( key_subj, key_obj ), () )
 
-    # get all subject/object combos satisfying the subject and object keys
-    predList = []
-
-    for (s,p,o) in self.ontology :
+    # unhashable values never match a data string
+    except TypeError :
+      return []
 
-      logging.debug( "  GET PREDICATES : (s,p,o) = " + str( ( s,p,o ) ) )
-      logging.debug( "  GET PREDICATES : s = " + str( s ) )
-      logging.debug( "  GET PREDICATES : o = " + str( o ) )
-      logging.debug( "  GET PREDICATES : key_subj == s is " + str( key_subj == s ) )
-      logging.debug( "  GET PREDICATES : key_obj == o is " + str( key_obj == o ) )
-      logging.debug( "  GET PREDICATES : key_subj in s is " + str( key_subj in s ) )
-      logging.debug( "  GET PREDICATES : key_obj in o is " + str( key_obj in o ) )
+    if DEBUG :
+      logging.debug( "  GET PREDICATES : key_subj '%s' and key_obj '%s' related by %s", key_subj, key_obj, preds )
 
+    return [ self.store.term( p ) for p in preds ]
 
-      #cleanSubj = self.parseData( s )
-      #cleanObj  = self.parseData( o )
 
-      #print "Comparing key_subj = " + str( key_subj ) + " and cleanSubj = " + cleanSubj
-      #if cleanSubj.lower() == str( key_subj ) or cleanSubj == str( key_subj ) :
-      #if key_subj == s :
-      if key_subj in s :
+  #######################
+  #  CHECK CONTAINMENT  #
+  #######################
+  # checks direct and transitive subsumption rules
+  # e.g. if city < state and state < country, then will conclude city < country is true.
+  def checkContainment( self, key_subj, key_obj ) :
 
-        #print "Comparing key_obj = " + str( key_obj ) + " and cleanObj = " + cleanObj
-        #if cleanObj.lower() == str( key_obj ) or cleanObj == str( key_obj ) :
-        #if key_obj == o :
-        if key_obj in o :
-          #print " p = " + str( p )
-          logging.debug( "  GET PREDICATES : >>> adding predicate '" + str( p ) + "'" )
-          predList.append( p )
+    if self.prefilter is not None :
+      try :
+        # containment needs a subject and an object to relate
+        if not ( PREFILTER_SUBJECT, key_subj ) in self.prefilter or not ( PREFILTER_OBJECT, key_obj ) in self.prefilter :
+          return False
 
+      # unhashable values are left to the full check
+      except TypeError :
+        pass
 
-    # abort if no valid predicates in ontology
-    if len( predList ) < 1 :
-      sys.exit( "  GET PREDICATES : ERROR : no predicates relating key_subj '" + str( key_subj ) + "' and key_obj '" + str( key_obj ) + "'" )
+    return self.cached( "contain", self.computeContainment, key_subj, key_obj )
 
-    logging.debug( "  GET PREDICATES : returning predList = " + str( predList ) )
-    logging.debug( "------------------------------------------" )
-    return predList
 
+  #########################
+  #  COMPUTE CONTAINMENT  #
+  #########################
+  def computeContainment( self, key_subj, key_obj ) :
 
-  #######################
-  #  CHECK CONTAINMENT  #
-  #######################
-  # checks only direct subsumption rules
-  # e.g. if city < state and state < country, then will conclude city < country is false.
-  #      if the ontology additionally defines city < country, then will conclude true.
-  # TODO : recursion!!!
-  def checkContainment( self, key_subj, key_obj ) :
+    if DEBUG :
+      logging.debug( "  CHECK CONTAINMENT : running process..." )
+      logging.debug( "  CHECK CONTAINMENT : key_subj = %s", key_subj )
+      logging.debug( "  CHECK CONTAINMENT : key_obj  = %s", key_obj )
 
-    logging.debug( "  CHECK CONTAINMENT : running process..." )
-    logging.debug( "  CHECK CONTAINMENT : key_subj = " + str( key_subj ))
-    logging.debug( "  CHECK CONTAINMENT : key_obj  = " + str( key_obj ) )
+    self.refreshClosure()
 
-    for (s,p,o) in self.ontology :
+    objs = self.lookupTerms( self.objectIndex, key_obj )
 
-      #cleanSubj = self.parseData( s )
-      #cleanObj  = self.parseData( o )
+    for s in self.lookupTerms( self.subjectIndex, key_subj ) :
 
-      #print "Comparing key_subj = " + key_subj + " and cleanSubj = " + cleanSubj
-      #if cleanSubj.lower() == key_subj or cleanSubj == key_subj :
-      if key_subj in s :
+      ancestors = self.ancestors.get( s, () )
 
-        #print "Comparing key_obj = " + key_obj + " and cleanObj = " + cleanObj
-        #if cleanObj.lower() == key_obj or cleanObj == key_obj :
-        if key_obj in o :
+      for o in objs :
+        if o in ancestors :
           return True
 
     return False
@@ -406,23 +2271,7 @@ class OntoDS( object ) :
   ##################
   # get all subject strs matching the input value string
   def getSubjects( self, val ) :
-
-    allSubjects = []
-
-    for s in self.ontology.subjects( ) : 
-
-      orig_s = s
-
-      # grab subject from uri
-      s = self.parseData( s )
-
-      if val == s :
-        allSubjects.append( orig_s )
-
-      elif val == s.lower() :
-        allSubjects.append( orig_s )
-
-    return allSubjects
+    return [ self.store.term( s ) for s in self.lookupTerms( self.subjectIndex, val ) ]
 
 
   #################
@@ -430,21 +2279,7 @@ class OntoDS( object ) :
   #################
   # get all object strs matching the input value string
   def getObjects( self, val ) :
-
-    allObjects = []
-
-    for o in self.ontology.objects( ) : 
-
-      orig_o = o
-      obj = self.parseData( o )
-
-      if val == obj :
-        allObjects.append( orig_o )
-
-      elif val == obj.lower() :
-        allObjects.append( orig_o )
-
-    return allObjects
+    return [ self.store.term( o ) for o in self.lookupTerms( self.objectIndex, val ) ]
 
 
   ################
@@ -452,44 +2287,7 @@ class OntoDS( object ) :
   ################
   # parse the data string from the given uri
   def parseData( self, uri ) :
-
-    str_uri = uri.n3()
-    str_uri = str_uri.encode( 'utf-8' )
-    str_uri = str_uri.replace( ">", "" )
-    str_uri = str_uri.replace( "<", "" )
-
-    #print "uri = " + uri,
-    #print "type = " + str( type( uri ) )
-    #print "str_uri = " + str_uri,
-    #print "type = ",
-    #print type( str_uri )
-
-    # parse literals
-    if "'" in str_uri or '"' in str_uri :
-      str_uri = str_uri.replace( "'", "" )
-      str_uri = str_uri.replace( '"', "" )
-      return str_uri
-
-    # parse foaf
-    elif "foaf" in str_uri :
-      data = str_uri.split( "/" )
-      data = data[-1]
-      return data
-
-    # parse schema.org
-    elif "schema.org" in str_uri :
-      data = str_uri.split( "/" )
-      data = data[-1]
-      return data
-
-    # parse example.org
-    elif "example.org" in str_uri :
-      data = str_uri.split( "/" )
-      data = data[-1]
-      return data
-
-    else :
-      sys.exit( "  PARSE DATA : ERROR : unrecognized data type '" + str( type( str_uri ) ) + "' for string uri '" + str( str_uri ) + "'" )
+    return self.normalizer.normalize( uri )
 
 
 #########
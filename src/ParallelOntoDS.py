@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+
+##########################################################################
+# ParallelOntoDS usage notes:
+#
+# 1. Spreads OntoDS verification across a pool of worker processes.
+# 2. Every worker builds its own OntoDS, configured like the given one,
+#    and restores it from a snapshot of the loaded ontology, so changes
+#    made to the ontology after the pool starts are not seen by the workers.
+# 3. Verdicts come back in input order.
+#
+##########################################################################
+
+# -------------------------------------- #
+import collections, logging, multiprocessing
+
+# import sibling packages HERE!!!
+import OntoDS
+
+# -------------------------------------- #
+
+
+# the OntoDS instance owned by the current worker process
+WORKER_ONTODS = None
+
+
+#################
+#  INIT WORKER  #
+#################
+# build the worker process OntoDS instance from the given snapshot,
+# configured by the given OntoDS constructor keyword arguments.
+def initWorker( snapshot, config ) :
+
+  global WORKER_ONTODS
+
+  WORKER_ONTODS = OntoDS.OntoDS( snapshot[ "nosql_type" ], **config )
+  WORKER_ONTODS.restoreSnapshot( snapshot )
+
+
+##################
+#  VERIFY BATCH  #
+##################
+# verify a batch of insert/update queries in a worker process.
+def verifyBatch( args ) :
+
+  batch, ignoreList = args
+
+  return WORKER_ONTODS.verifyBatch( batch, ignoreList )
+
+
+###################
+#  EXPLAIN BATCH  #
+###################
+# verify a batch of insert/update queries in a worker process, explaining the failures.
+def explainBatch( args ) :
+
+  batch, ignoreList = args
+
+  return WORKER_ONTODS.explainBatch( batch, ignoreList )
+
+
+class ParallelOntoDS( object ) :
+
+
+  ################
+  #  ATTRIBUTES  #
+  ################
+  workers   = None   # the number of worker processes
+  maxQueued = None   # the maximum number of batches in flight at once
+  pool      = None   # a multiprocessing Pool of workers
+
+
+  ##########
+  #  INIT  #
+  ##########
+  # start a pool of workers verifying against the ontology
+  # currently loaded in the given OntoDS instance.
+  # workers defaults to the number of cpus.
+  def __init__( self, ontods, workers=None ) :
+
+    if workers is None :
+      workers = multiprocessing.cpu_count()
+
+    self.workers   = workers
+    self.maxQueued = 2 * workers
+    self.pool      = multiprocessing.Pool( workers, initWorker, ( ontods.snapshot(), ontods.getConfig() ) )
+
+    logging.debug( "  ...instantiated ParallelOntoDS instance with '%s' workers", workers )
+
+
+  #################
+  #  VERIFY MANY  #
+  #################
+  # lazily verify a stream of insert/update queries across the worker pool,
+  # yielding one verdict per query in input order.
+  # at most maxQueued batches are in flight, so the input stream is
+  # never read far ahead of the verdicts consumed.
+  def verifyMany( self, queryMaps, ignoreList, batchSize=1000 ) :
+    return self.mapBatches( verifyBatch, queryMaps, ignoreList, batchSize )
+
+
+  ##################
+  #  EXPLAIN MANY  #
+  ##################
+  # lazily verify a stream of insert/update queries like verifyMany,
+  # yielding one Verdict per query, explained in the workers.
+  def explainMany( self, queryMaps, ignoreList, batchSize=1000 ) :
+    return self.mapBatches( explainBatch, queryMaps, ignoreList, batchSize )
+
+
+  #################
+  #  MAP BATCHES  #
+  #################
+  # split a stream of insert/update queries into batches of batchSize,
+  # checked in the workers by the given batch check, yielding the
+  # results in input order.
+  def mapBatches( self, check, queryMaps, ignoreList, batchSize ) :
+
+    pending = collections.deque()
+    batch   = []
+
+    for queryMap in queryMaps :
+
+      batch.append( queryMap )
+
+      if len( batch ) >= batchSize :
+        pending.append( self.pool.apply_async( check, [ ( batch, ignoreList ) ] ) )
+        batch = []
+
+      # wait on the oldest batch once the pool is saturated
+      if len( pending ) >= self.maxQueued :
+        for verdict in pending.popleft().get() :
+          yield verdict
+
+    if batch :
+      pending.append( self.pool.apply_async( check, [ ( batch, ignoreList ) ] ) )
+
+    while pending :
+      for verdict in pending.popleft().get() :
+        yield verdict
+
+
+  ###########
+  #  CLOSE  #
+  ###########
+  # stop the worker pool once outstanding work completes.
+  def close( self ) :
+    self.pool.close()
+    self.pool.join()
+
+
+  ###########
+  #  ENTER  #
+  ###########
+  def __enter__( self ) :
+    return self
+
+
+  ##########
+  #  EXIT  #
+  ##########
+  def __exit__( self, excType, excVal, excTb ) :
+    self.close()
+
+
+#########
+#  EOF  #
+#########
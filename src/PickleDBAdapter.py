@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+
+##########################################################################
+# PickleDBAdapter usage notes:
+#
+# 1. Guarded writes into a pickledb database.
+# 2. Documents are stored under the string in their keyField, or under
+#    a fresh uuid if they have none. Update keys are converted to strings
+#    the same way, so documents with int keys can be updated by int.
+# 3. The database is dumped once per batch, so load it with auto_dump
+#    off, e.g. pickledb.load( path, False ).
+#
+##########################################################################
+
+# -------------------------------------- #
+import logging, uuid
+
+# import sibling packages HERE!!!
+import GuardedAdapter
+
+# -------------------------------------- #
+
+
+class PickleDBAdapter( GuardedAdapter.GuardedAdapter ) :
+
+
+  ################
+  #  ATTRIBUTES  #
+  ################
+  db       = None   # the pickledb database written to
+  keyField = None   # the document field holding its key
+
+
+  ##########
+  #  INIT  #
+  ##########
+  def __init__( self, ontods, ignoreList, db, keyField="_id", batchSize=1000, onReject=None ) :
+
+    GuardedAdapter.GuardedAdapter.__init__( self, ontods, ignoreList, batchSize, onReject )
+
+    self.db       = db
+    self.keyField = keyField
+
+
+  ###########
+  #  FETCH  #
+  ###########
+  def fetch( self, keys ) :
+
+    existingDocs = {}
+
+    for key in keys :
+      if self.db.exists( self.dbKey( key ) ) :
+        existingDocs[ key ] = self.db.get( self.dbKey( key ) )
+
+    return existingDocs
+
+
+  ###################
+  #  WRITE INSERTS  #
+  ###################
+  def writeInserts( self, docs ) :
+
+    for doc in docs :
+      key = doc.get( self.keyField )
+      if key is None :
+        key = uuid.uuid4().hex
+      self.db.set( self.dbKey( key ), doc )
+
+    self.db.dump()
+
+    return []
+
+
+  ###################
+  #  WRITE UPDATES  #
+  ###################
+  def writeUpdates( self, updates ) :
+
+    for key, patch in updates :
+      updatedDoc = dict( self.db.get( self.dbKey( key ) ) )
+      updatedDoc.update( patch )
+      self.db.set( self.dbKey( key ), updatedDoc )
+
+    self.db.dump()
+
+    return []
+
+
+  ############
+  #  DB KEY  #
+  ############
+  # return the database key of the given document key.
+  def dbKey( self, key ) :
+    return str( key )
+
+
+#########
+#  EOF  #
+#########
@@ -10,11 +10,30 @@ Test_ontods.py
 #  IMPORTS  #
 #############
 # standard python packages
-import inspect, logging, os, pickledb, pprint, random, rdflib, sqlite3, sys, unittest
+import csv, inspect, json, logging, os, pickle, pickledb, pprint, random, rdflib, shutil, sqlite3, sys, tempfile, threading, time, unittest
 from StringIO import StringIO
 from pymongo import MongoClient
 
-import OntoDS
+import AsyncOntoDS, GuardedAdapter, LRUCache, MongoDBAdapter, Normalizer, OntoDS, ontods_cli, ParallelOntoDS, PickleDBAdapter, VerdictStore, VersionedOntoDS
+
+# mongomock is only needed for the mongodb adapter test
+try :
+  import mongomock
+except ImportError :
+  mongomock = None
+
+# poll the given condition until it holds or the timeout in seconds runs out
+def waitFor( condition, timeout=10 ) :
+  deadline = time.time() + timeout
+  while not condition() and time.time() < deadline :
+    time.sleep( 0.01 )
+  return bool( condition() )
+
+# report the configuration of the OntoDS instance of a ParallelOntoDS worker
+def workerConfig() :
+  ontods = ParallelOntoDS.WORKER_ONTODS
+  return ontods.retainGraph, ontods.graph is None, ontods.backend, ontods.prefilter is not None, ontods.cacheSize
+
 
 SAVEPATH      = os.path.abspath( __file__ + "/../../../ontods/src" )
 
@@ -31,6 +50,1554 @@ class Test_ontods( unittest.TestCase ) :
   logging.basicConfig( format='%(levelname)s:%(message)s', level=logging.INFO )
 
 
+  ################
+  #  EXAMPLE 28  #
+  ################
+  # test the validate command line over JSON-lines and CSV files
+  def test_example28( self ) :
+
+    test_id = "test_example28"
+
+    logging.info( "  Running test " + test_id )
+
+    tmpDir = tempfile.mkdtemp()
+
+    try :
+
+      # --------------------------------------------------------------- #
+      # JSON-lines rows, malformed rows included, keep their input order
+
+      inPath = os.path.join( tmpDir, "rows.jsonl" )
+
+      fo = open( inPath, "w" )
+      fo.write( '{"name":"Elsa","age":21,"City":"arendelle","Country":"norway"}\n' )
+      fo.write( '{"name":"Anna","age":18,"City":"losangeles","Country":"norway"}\n' )
+      fo.write( 'not json\n' )
+      fo.write( '\n' )
+      fo.write( '{"name":"Kristoff","City":"arendelle"}\n' )
+      fo.write( '[1,2]\n' )
+      fo.close()
+
+      for workers in [ "1", "2" ] :
+
+        ontods_cli.main( [ "validate", "--ontology", "./example_ontology.ttl", "--ignore", "name,age",
+                           "--workers", workers, "--batch-size", "2", inPath ] )
+
+        accepted = [ json.loads( line ) for line in open( os.path.join( tmpDir, "rows.accepted.jsonl" ) ) ]
+        rejected = [ json.loads( line ) for line in open( os.path.join( tmpDir, "rows.rejected.jsonl" ) ) ]
+
+        self.assertEqual( [ row[ "name" ] for row in accepted ], [ "Elsa", "Kristoff" ] )
+        self.assertEqual( len( rejected ), 3 )
+        self.assertEqual( rejected[0][ "name" ], "Anna" )
+        self.assertTrue( rejected[0][ "_reason" ].startswith( "EXPLANATION" ) )
+        self.assertTrue( rejected[1][ "_reason" ].startswith( "MALFORMED" ) )
+        self.assertEqual( rejected[1][ "line" ], 3 )
+        self.assertEqual( rejected[2][ "line" ], 6 )
+
+      # --------------------------------------------------------------- #
+      # CSV rows gain a reason column when rejected
+
+      inPath = os.path.join( tmpDir, "rows.csv" )
+
+      fo = open( inPath, "w" )
+      fo.write( "name,City,Country\n" )
+      fo.write( "Elsa,arendelle,norway\n" )
+      fo.write( "Anna,losangeles,norway\n" )
+      fo.close()
+
+      acceptedPath = os.path.join( tmpDir, "ok.csv" )
+      rejectedPath = os.path.join( tmpDir, "bad.csv" )
+
+      stats = ontods_cli.validate( ontods_cli.parseArgs( [ "validate", "--ontology", "./example_ontology.ttl", "--ignore", "name",
+                                                           "--accepted", acceptedPath, "--rejected", rejectedPath,
+                                                           "--reason-field", "why", inPath ] ) )
+
+      self.assertEqual( stats, { "rows" : 2, "accepted" : 1, "rejected" : 1, "malformed" : 0 } )
+      self.assertEqual( list( csv.DictReader( open( acceptedPath ) ) ), [ { "name":"Elsa", "City":"arendelle", "Country":"norway" } ] )
+
+      rejected = list( csv.DictReader( open( rejectedPath ) ) )
+      self.assertEqual( rejected[0][ "name" ], "Anna" )
+      self.assertTrue( rejected[0][ "why" ] )
+
+      # --------------------------------------------------------------- #
+      # long runs of malformed rows are written in order among the rest
+
+      inPath = os.path.join( tmpDir, "runs.jsonl" )
+
+      fo = open( inPath, "w" )
+      fo.write( '{"name":"Anna","City":"losangeles","Country":"norway"}\n' )
+      for i in range( 50 ) :
+        fo.write( 'not json\n' )
+      fo.write( '{"name":"Elsa","City":"arendelle","Country":"norway"}\n' )
+      fo.close()
+
+      stats = ontods_cli.validate( ontods_cli.parseArgs( [ "validate", "--ontology", "./example_ontology.ttl", "--ignore", "name",
+                                                           "--batch-size", "4", inPath ] ) )
+
+      self.assertEqual( stats, { "rows" : 52, "accepted" : 1, "rejected" : 1, "malformed" : 50 } )
+
+      rejected = [ json.loads( line ) for line in open( os.path.join( tmpDir, "runs.rejected.jsonl" ) ) ]
+      self.assertEqual( rejected[0][ "name" ], "Anna" )
+      self.assertEqual( [ row[ "line" ] for row in rejected[1:] ], range( 2, 52 ) )
+
+    finally :
+      shutil.rmtree( tmpDir )
+
+    # --------------------------------------------------------------- #
+    # workers explain the rejected queries, matching verifyMany
+
+    ontods = OntoDS.OntoDS( "pickledb" )
+    ontods.loadOntology( "./example_ontology.ttl" )
+
+    queries = [ { "City" : "arendelle", "Country" : "norway" }, { "City" : "losangeles", "Country" : "norway" } ] * 3
+
+    verdicts = list( ontods.verifyMany( queries, [], 4 ) )
+
+    self.assertEqual( [ bool( v ) for v in ontods.explainMany( queries, [], 4 ) ], verdicts )
+
+    with ParallelOntoDS.ParallelOntoDS( ontods, 2 ) as pool :
+      explained = list( pool.explainMany( queries, [], 4 ) )
+
+    self.assertEqual( [ bool( v ) for v in explained ], verdicts )
+    self.assertEqual( explained[1].render(), ontods.verifyWithExplanation( queries[1], [] ).render() )
+
+    # --------------------------------------------------------------- #
+
+
+  ################
+  #  EXAMPLE 27  #
+  ################
+  # test adding and removing batches of triples in place
+  def test_example27( self ) :
+
+    test_id = "test_example27"
+
+    logging.info( "  Running test " + test_id )
+
+    inPlace = rdflib.URIRef( "http://www.schema.org/containedInPlace" )
+    place   = rdflib.URIRef( "http://example.org/losangeles" )
+    city    = rdflib.URIRef( "http://schema.org/City" )
+    norway  = rdflib.URIRef( "http://example.org/norway" )
+
+    tmpDir    = tempfile.mkdtemp()
+    deltaPath = os.path.join( tmpDir, "delta.nt" )
+
+    try :
+
+      fo = open( deltaPath, "w" )
+      fo.write( "<http://example.org/losangeles> <http://www.schema.org/containedInPlace> <http://schema.org/City> .\n" )
+      fo.write( "<http://example.org/losangeles> <http://www.schema.org/containedInPlace> <http://example.org/norway> .\n" )
+      fo.write( "<http://example.org/losangeles> <http://xmlns.com/foaf/0.1/name> \"losangeles\" .\n" )
+      fo.close()
+
+      badPath = os.path.join( tmpDir, "bad.nt" )
+
+      fo = open( badPath, "w" )
+      fo.write( "<http://example.org/losangeles> <http://www.schema.org/containedInPlace> <http://example.org/norway> .\n" )
+      fo.write( "<http://example.org/losangeles> not a triple\n" )
+      fo.close()
+
+      for backend in [ "dict", "array" ] :
+
+        # --------------------------------------------------------------- #
+        # create ontods instance
+        ontods = OntoDS.OntoDS( "pickledb", backend=backend )
+        logging.debug( "  " + test_id + " : instantiated OntoDS instance '" + str( ontods ) + "' with db type '" + ontods.nosql_type + "'"  )
+
+        # --------------------------------------------------------------- #
+        # input ontology
+
+        ontods.loadOntology( "./example_ontology.ttl" )
+        loadedHash = ontods.getContentHash()
+
+        anInsert = { "name":"Elsa", "age":21, "City":"losangeles", "Country":"norway" }
+        self.assertEqual( ontods.verify( anInsert, [ 'name', 'age' ] ), False )
+
+        # --------------------------------------------------------------- #
+        # a malformed delta file changes nothing
+
+        numTriples = len( ontods.store )
+        self.assertRaises( ValueError, ontods.addTriples, badPath )
+        self.assertEqual( len( ontods.store ), numTriples )
+        self.assertEqual( ontods.getContentHash(), loadedHash )
+
+        # --------------------------------------------------------------- #
+        # a delta file updates the indexes and the closure in place
+
+        self.assertEqual( ontods.addTriples( deltaPath ), 3 )
+        self.assertEqual( ontods.addTriples( deltaPath ), 0 )
+        self.assertEqual( ontods.verify( anInsert, [ 'name', 'age' ] ), True )
+        self.assertEqual( ontods.checkContainment( "losangeles", "Country" ), True )
+        self.assertEqual( ontods.getPredicates( "losangeles", "norway" ), [ inPlace ] )
+        self.assertNotEqual( ontods.getContentHash(), loadedHash )
+
+        # the running content hash matches one over the same triples loaded afresh
+        fresh = OntoDS.OntoDS( "pickledb", backend=backend, retainGraph=False )
+        fresh.addTriples( list( ontods.iterTriples() ) )
+        self.assertEqual( fresh.getContentHash(), ontods.getContentHash() )
+
+        # --------------------------------------------------------------- #
+        # removals undo it
+
+        self.assertEqual( ontods.removeTriples( [ ( place, inPlace, norway ), ( place, inPlace, rdflib.URIRef( "http://example.org/nowhere" ) ) ] ), 1 )
+        self.assertEqual( ontods.verify( anInsert, [ 'name', 'age' ] ), False )
+        self.assertEqual( ontods.getPredicates( "losangeles", "norway" ), [] )
+        self.assertEqual( ontods.checkContainment( "losangeles", "Country" ), True )
+
+        self.assertEqual( ontods.removeTriples( deltaPath ), 2 )
+        self.assertEqual( ontods.getSubjects( "losangeles" ), [] )
+        self.assertEqual( ontods.checkContainment( "losangeles", "Country" ), False )
+        self.assertEqual( len( ontods.store ), len( ontods.ontology ) )
+        self.assertEqual( ontods.getContentHash(), loadedHash )
+
+        # --------------------------------------------------------------- #
+        # loaded triples can be removed and added back, before and after compacting
+
+        loaded = sorted( ontods.ontology )[ :5 ]
+
+        self.assertEqual( ontods.removeTriples( loaded ), 5 )
+        self.assertEqual( ontods.removeTriples( loaded ), 0 )
+        self.assertEqual( len( ontods.store ), len( ontods.ontology ) )
+        self.assertEqual( set( ontods.iterTriples() ), set( ontods.ontology ) )
+
+        self.assertEqual( ontods.addTriples( loaded[ :2 ] ), 2 )
+        ontods.store.compact()
+        self.assertEqual( ontods.addTriples( loaded ), 3 )
+        self.assertEqual( len( ontods.store ), len( ontods.ontology ) )
+        self.assertEqual( set( ontods.iterTriples() ), set( ontods.ontology ) )
+        self.assertEqual( ontods.getContentHash(), loadedHash )
+
+        # --------------------------------------------------------------- #
+        # versioned instances publish deltas too
+
+        vods = VersionedOntoDS.VersionedOntoDS( "pickledb", backend=backend )
+        vods.loadOntology( "./example_ontology.ttl" )
+        vods.addTriples( deltaPath )
+        self.assertEqual( vods.verify( anInsert, [ 'name', 'age' ] ), True )
+        vods.removeTriples( [ ( place, inPlace, norway ) ] )
+        self.assertEqual( vods.verify( anInsert, [ 'name', 'age' ] ), False )
+        self.assertEqual( vods.getVersion(), 3 )
+
+    finally :
+      shutil.rmtree( tmpDir )
+
+    # --------------------------------------------------------------- #
+    # unknown backends are refused
+
+    self.assertRaises( ValueError, OntoDS.OntoDS, "pickledb", backend="btree" )
+
+    # --------------------------------------------------------------- #
+
+
+  ################
+  #  EXAMPLE 26  #
+  ################
+  # test the predicate index and configurable subsumption predicates
+  def test_example26( self ) :
+
+    test_id = "test_example26"
+
+    logging.info( "  Running test " + test_id )
+
+    inPlace = rdflib.URIRef( "http://www.schema.org/containedInPlace" )
+
+    # --------------------------------------------------------------- #
+    # create ontods instance
+    ontods = OntoDS.OntoDS( "pickledb" )
+    logging.debug( "  " + test_id + " : instantiated OntoDS instance '" + str( ontods ) + "' with db type '" + ontods.nosql_type + "'"  )
+
+    # --------------------------------------------------------------- #
+    # input ontology
+
+    ontods.loadOntology( "./example_ontology.ttl" )
+
+    # --------------------------------------------------------------- #
+    # predicates relating data strings, and none for unrelated ones
+
+    self.assertEqual( ontods.getPredicates( "arendelle", "norway" ), [ inPlace ] )
+    self.assertEqual( sorted( ontods.getPredicates( "arendelle", "City" ) ), sorted( [ inPlace, rdflib.RDF.type ] ) )
+    self.assertEqual( ontods.getPredicates( "arendelle", "losangeles" ), [] )
+    self.assertEqual( ontods.getPredicates( [ "arendelle" ], "norway" ), [] )
+
+    # --------------------------------------------------------------- #
+    # only the configured predicates make up the hierarchy
+
+    typesOnly = OntoDS.OntoDS( "pickledb", subsumptionPredicates=[ rdflib.RDF.type ] )
+    typesOnly.loadOntology( "./example_ontology.ttl" )
+
+    self.assertEqual( typesOnly.getPredicates( "arendelle", "norway" ), [] )
+    self.assertEqual( typesOnly.getPredicates( "arendelle", "City" ), [ rdflib.RDF.type ] )
+    self.assertEqual( typesOnly.checkContainment( "arendelle", "norway" ), False )
+    self.assertEqual( ontods.checkContainment( "arendelle", "norway" ), True )
+
+    # --------------------------------------------------------------- #
+    # snapshots carry the predicates they were built with
+
+    restored = OntoDS.OntoDS( "pickledb" )
+    restored.restoreSnapshot( typesOnly.snapshot() )
+    self.assertEqual( restored.getPredicates( "arendelle", "City" ), [ rdflib.RDF.type ] )
+    self.assertEqual( restored.checkContainment( "arendelle", "norway" ), False )
+
+    # --------------------------------------------------------------- #
+
+
+  ################
+  #  EXAMPLE 25  #
+  ################
+  # test check results persisted across instances
+  def test_example25( self ) :
+
+    test_id = "test_example25"
+
+    logging.info( "  Running test " + test_id )
+
+    tmpDir    = tempfile.mkdtemp()
+    storePath = os.path.join( tmpDir, "verdicts.db" )
+
+    try :
+
+      # --------------------------------------------------------------- #
+      # a first instance fills the store
+
+      store  = VerdictStore.VerdictStore( storePath )
+      ontods = OntoDS.OntoDS( "pickledb", verdictStore=store )
+      ontods.loadOntology( "./example_ontology.ttl" )
+
+      anInsert = { "name":"Elsa", "age":21, "City":"losangeles", "Country":"norway" }
+      self.assertEqual( ontods.verify( anInsert, [ 'name', 'age' ] ), False )
+      self.assertEqual( ontods.verify( { "City":"arendelle", "Country":"norway" }, [] ), True )
+      self.assertEqual( store.getStats()[ "hits" ], 0 )
+      store.close()
+
+      # --------------------------------------------------------------- #
+      # a fresh instance answers from the store
+
+      store  = VerdictStore.VerdictStore( storePath )
+      ontods = OntoDS.OntoDS( "pickledb", verdictStore=store )
+      ontods.loadOntology( "./example_ontology.ttl" )
+
+      self.assertEqual( ontods.verify( anInsert, [ 'name', 'age' ] ), False )
+      self.assertEqual( ontods.verify( { "City":"arendelle", "Country":"norway" }, [] ), True )
+      self.assertEqual( store.getStats()[ "misses" ], 0 )
+      self.assertTrue( store.getStats()[ "hits" ] > 0 )
+
+      # --------------------------------------------------------------- #
+      # a changed ontology never sees old results
+
+      ontods.addTriple( rdflib.URIRef( "http://example.org/losangeles" ), rdflib.URIRef( "http://schema.org/containedInPlace" ), rdflib.URIRef( "http://example.org/norway" ) )
+      self.assertEqual( ontods.checkContainment( "losangeles", "norway" ), True )
+      self.assertEqual( store.getStats()[ "misses" ], 1 )
+      store.close()
+
+    finally :
+      shutil.rmtree( tmpDir )
+
+    # --------------------------------------------------------------- #
+
+
+  ################
+  #  EXAMPLE 24  #
+  ################
+  # test the membership prefilter
+  def test_example24( self ) :
+
+    test_id = "test_example24"
+
+    logging.info( "  Running test " + test_id )
+
+    # --------------------------------------------------------------- #
+    # create ontods instances with and without the prefilter
+    ontods   = OntoDS.OntoDS( "pickledb", prefilterRate=0.01 )
+    baseline = OntoDS.OntoDS( "pickledb" )
+    logging.debug( "  " + test_id + " : instantiated OntoDS instance '" + str( ontods ) + "' with db type '" + ontods.nosql_type + "'"  )
+
+    self.assertEqual( baseline.getPrefilterStats(), None )
+
+    # --------------------------------------------------------------- #
+    # input ontology
+
+    ontods.loadOntology( "./example_ontology.ttl" )
+    baseline.loadOntology( "./example_ontology.ttl" )
+
+    stats = ontods.getPrefilterStats()
+    self.assertTrue( stats[ "count" ] > 0 )
+    self.assertTrue( stats[ "bytes" ] > 0 )
+    self.assertEqual( stats[ "errorRate" ], 0.01 )
+
+    # --------------------------------------------------------------- #
+    # verdicts agree with the full checks
+
+    queries = [ { "name":"Elsa", "age":21, "City":"losangeles", "Country":"norway" },
+                { "name":"Elsa", "age":21, "City":"arendelle", "Country":"norway" },
+                { "City":"norway" },
+                { "Country":"arendelle" },
+                { "City":"arendelle", "Country":[ "norway" ] } ]
+
+    for aQuery in queries :
+      self.assertEqual( ontods.verify( aQuery, [ 'name', 'age' ] ), baseline.verify( aQuery, [ 'name', 'age' ] ) )
+
+    self.assertEqual( ontods.checkContainment( "losangeles", "norway" ), False )
+    self.assertEqual( ontods.passesKVSubsumption( "City", "losangeles" ), True )
+
+    # --------------------------------------------------------------- #
+    # new triples reach the prefilter
+
+    ontods.addTriple( rdflib.URIRef( "http://example.org/losangeles" ), rdflib.URIRef( "http://schema.org/containedInPlace" ), rdflib.URIRef( "http://example.org/norway" ) )
+    self.assertEqual( ontods.checkContainment( "losangeles", "norway" ), True )
+    self.assertEqual( ontods.passesKVSubsumption( "City", "losangeles" ), False )
+
+    # --------------------------------------------------------------- #
+
+
+  ################
+  #  EXAMPLE 23  #
+  ################
+  # test term normalization over arbitrary vocabularies
+  def test_example23( self ) :
+
+    test_id = "test_example23"
+
+    logging.info( "  Running test " + test_id )
+
+    # --------------------------------------------------------------- #
+    # data strings of terms
+
+    normalizer = Normalizer.Normalizer()
+    self.assertEqual( normalizer.normalize( rdflib.URIRef( "http://schema.org/City" ) ), "City" )
+    self.assertEqual( normalizer.normalize( rdflib.URIRef( "http://gazetteer.net/ns#Region" ) ), "Region" )
+    self.assertEqual( normalizer.normalize( rdflib.Literal( "arendelle", lang="en" ) ), "arendelle" )
+
+    normalizer.addNamespace( "urn:place:", lambda rest : rest.replace( "-", "" ) )
+    self.assertEqual( normalizer.normalize( rdflib.URIRef( "urn:place:los-angeles" ) ), "losangeles" )
+
+    # --------------------------------------------------------------- #
+    # create ontods instance with the custom normalizer
+    ontods = OntoDS.OntoDS( "mongodb", normalizer=normalizer )
+    logging.debug( "  " + test_id + " : instantiated OntoDS instance '" + str( ontods ) + "' with db type '" + ontods.nosql_type + "'"  )
+
+    # --------------------------------------------------------------- #
+    # input ontology
+
+    ontods.loadOntology( "./example_ontology.ttl" )
+
+    # --------------------------------------------------------------- #
+    # triples outside the default namespaces are indexed, not fatal
+
+    inPlace = rdflib.URIRef( "http://schema.org/containedInPlace" )
+    ontods.addTriple( rdflib.URIRef( "urn:place:los-angeles" ), inPlace, rdflib.URIRef( "http://gazetteer.net/ns#Region" ) )
+    ontods.addTriple( rdflib.URIRef( "urn:place:los-angeles" ), inPlace, rdflib.URIRef( "http://schema.org/City" ) )
+
+    self.assertEqual( ontods.verify( { "Region":"losangeles" }, [] ), True )
+    self.assertEqual( ontods.verify( { "Region":"arendelle" }, [] ), False )
+    self.assertEqual( ontods.verify( { "City":"arendelle", "Country":"norway" }, [] ), True )
+
+    # --------------------------------------------------------------- #
+    # configurations with different rules never share data strings
+
+    other = Normalizer.Normalizer()
+    other.addNamespace( "urn:place:", lambda rest : rest.upper() )
+    self.assertNotEqual( other.fingerprint(), normalizer.fingerprint() )
+
+    same = Normalizer.Normalizer()
+    same.addNamespace( "urn:place:", dict( normalizer.namespaces )[ u"urn:place:" ] )
+    self.assertEqual( same.fingerprint(), normalizer.fingerprint() )
+
+    tmpDir = tempfile.mkdtemp()
+
+    try :
+
+      ontoPath     = os.path.join( tmpDir, "onto.ttl" )
+      compiledPath = os.path.join( tmpDir, "onto.compiled" )
+
+      fo = open( ontoPath, "w" )
+      fo.write( "<urn:place:oslo> <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> <http://schema.org/City> .\n" )
+      fo.close()
+
+      compiled = OntoDS.OntoDS( "pickledb", normalizer=normalizer )
+      compiled.compileOntology( ontoPath, compiledPath )
+      self.assertEqual( len( compiled.getSubjects( "oslo" ) ), 1 )
+
+      # a compiled ontology is stale for another normalizer
+      upper = OntoDS.OntoDS( "pickledb", normalizer=other )
+      self.assertEqual( upper.loadCompiledOntology( compiledPath, ontoPath ), False )
+      upper.loadOntology( ontoPath, compiledPath )
+      self.assertEqual( len( upper.getSubjects( "OSLO" ) ), 1 )
+
+      # and so is a snapshot, which is indexed afresh
+      restored = OntoDS.OntoDS( "pickledb", normalizer=other )
+      restored.restoreSnapshot( compiled.snapshot() )
+      self.assertEqual( len( restored.getSubjects( "OSLO" ) ), 1 )
+      self.assertNotEqual( restored.getContentHash(), compiled.getContentHash() )
+
+    finally :
+      shutil.rmtree( tmpDir )
+
+    # --------------------------------------------------------------- #
+
+
+  ################
+  #  EXAMPLE 22  #
+  ################
+  # test per stage metrics and their export
+  def test_example22( self ) :
+
+    test_id = "test_example22"
+
+    logging.info( "  Running test " + test_id )
+
+    # --------------------------------------------------------------- #
+    # create ontods instance
+    ontods = OntoDS.OntoDS( "mongodb" )
+    logging.debug( "  " + test_id + " : instantiated OntoDS instance '" + str( ontods ) + "' with db type '" + ontods.nosql_type + "'"  )
+
+    # --------------------------------------------------------------- #
+    # input ontology
+
+    ontods.loadOntology( "./example_ontology.ttl" )
+
+    # --------------------------------------------------------------- #
+    # metrics are off by default
+
+    self.assertEqual( ontods.getMetrics(), None )
+    self.assertEqual( ontods.verify( { "City":"arendelle", "Country":"norway" }, [] ), True )
+
+    # --------------------------------------------------------------- #
+    # stage counters, per key and overall
+
+    metrics = ontods.enableMetrics()
+    self.assertEqual( ontods.verify( { "City":"arendelle", "Country":"norway" }, [] ), True )
+    self.assertEqual( ontods.verify( { "City":"arendelle", "Country":"norway" }, [] ), True )
+
+    stats = metrics.asDict()
+    self.assertEqual( stats[ "stages" ][ "verify" ][ "calls" ], 2 )
+    self.assertEqual( stats[ "stages" ][ "passesKVSubsumption" ][ "calls" ], 4 )
+    self.assertEqual( stats[ "stages" ][ "passesKVSubsumption" ][ "keys" ][ "City" ][ "calls" ], 2 )
+    self.assertEqual( stats[ "stages" ][ "verify" ][ "buckets" ][ -1 ], ( float( "inf" ), 2 ) )
+    self.assertEqual( stats[ "cache" ][ "kv" ][ "hits" ], 4 )
+    self.assertEqual( stats[ "graphScans" ], 0 )
+
+    # data strings never become per key counters
+    self.assertEqual( stats[ "stages" ][ "checkContainment" ][ "keys" ], {} )
+
+    list( ontods.iterTriples() )
+    self.assertEqual( metrics.asDict()[ "graphScans" ], 1 )
+
+    text = metrics.toPrometheus()
+    self.assertTrue( 'ontods_stage_seconds_count{key="City",stage="passesKVSubsumption"} 2' in text )
+    self.assertTrue( "ontods_graph_scans_total 1" in text )
+
+    # keyword arguments reach the wrapped stages
+    self.assertEqual( ontods.verify( { "City":"arendelle" }, ignoreList=[] ), True )
+
+    # --------------------------------------------------------------- #
+    # profiling a single batch
+
+    with ontods.profile() as batchMetrics :
+      ontods.verifyBatch( [ { "City":"arendelle" }, { "City":"losangeles" } ], [] )
+
+    batchStats = batchMetrics.asDict()[ "stages" ]
+    self.assertEqual( batchStats[ "verifyBatch" ][ "calls" ], 1 )
+    self.assertEqual( batchStats[ "passesKVSubsumption" ][ "calls" ], 2 )
+    self.assertEqual( batchStats[ "computeKVSubsumption" ][ "keys" ][ "City" ][ "calls" ], 1 )
+    self.assertEqual( batchStats[ "lookupTerms" ][ "calls" ], 2 )
+    self.assertFalse( "verifyBatch" in metrics.asDict()[ "stages" ] )
+    self.assertTrue( ontods.getMetrics() is metrics )
+
+    ontods.disableMetrics()
+    self.assertEqual( ontods.getMetrics(), None )
+    self.assertFalse( "verify" in ontods.__dict__ )
+
+    # --------------------------------------------------------------- #
+
+
+  ################
+  #  EXAMPLE 21  #
+  ################
+  # test verification of nested maps and lists by dotted path
+  def test_example21( self ) :
+
+    test_id = "test_example21"
+
+    logging.info( "  Running test " + test_id )
+
+    # --------------------------------------------------------------- #
+    # create ontods instance
+    ontods = OntoDS.OntoDS( "mongodb" )
+    logging.debug( "  " + test_id + " : instantiated OntoDS instance '" + str( ontods ) + "' with db type '" + ontods.nosql_type + "'"  )
+
+    # --------------------------------------------------------------- #
+    # input ontology
+
+    ontods.loadOntology( "./example_ontology.ttl" )
+
+    # --------------------------------------------------------------- #
+    # nested maps are checked like flat queries
+
+    self.assertEqual( ontods.verify( { "name":"Elsa", "address":{ "City":"arendelle", "Country":"norway" } }, [ 'name' ] ), True )
+    self.assertEqual( ontods.verify( { "name":"Hans", "address":{ "City":"norway" } }, [ 'name' ] ), False )
+    self.assertEqual( ontods.verify( { "name":"Anna", "address":{ "City":"losangeles", "Country":"norway" } }, [ 'name' ] ), False )
+
+    # fields in different maps are not related
+    self.assertEqual( ontods.verify( { "City":"arendelle", "home":{ "Country":"norway" } }, [] ), True )
+
+    # --------------------------------------------------------------- #
+    # lists of data strings and maps
+
+    self.assertEqual( ontods.verify( { "City":[ "arendelle", "arendelle" ], "Country":"norway" }, [] ), True )
+    self.assertEqual( ontods.verify( { "City":[ "arendelle", "norway" ] }, [] ), False )
+    self.assertEqual( ontods.verify( { "Country":[ "norway", [ "norway" ] ] }, [] ), True )
+    self.assertEqual( ontods.verify( { "places":[ { "City":"arendelle", "Country":"norway" }, { "City":"norway" } ] }, [] ), False )
+    self.assertEqual( ontods.verify( { "places":[ { "City":"arendelle", "Country":"norway" }, { "Country":"norway" } ] }, [] ), True )
+
+    # --------------------------------------------------------------- #
+    # path patterns in the ignore list
+
+    anInsert = { "name":"Hans", "meta":{ "City":"norway" }, "places":[ { "id":"x", "City":"arendelle" } ] }
+    self.assertEqual( ontods.verify( anInsert, [ 'name', '*.id' ] ), False )
+    self.assertEqual( ontods.verify( anInsert, [ 'name', '*.id', 'meta' ] ), True )
+    self.assertEqual( ontods.verify( anInsert, [ 'n*', 'meta.*', 'places.id' ] ), True )
+    self.assertEqual( ontods.verify( { "name":"Hans", "age":3 }, [ 'n*', 'a*' ] ), True )
+
+    # --------------------------------------------------------------- #
+    # batches and explanations agree
+
+    verdict = ontods.verifyWithExplanation( anInsert, [ 'name', '*.id' ] )
+    self.assertEqual( ( verdict.reason, verdict.key, verdict.val ), ( OntoDS.REASON_KV, "meta.City", "norway" ) )
+
+    verdict = ontods.verifyWithExplanation( { "places":[ { "City":"losangeles", "Country":"norway" } ] }, [] )
+    self.assertEqual( ( verdict.reason, verdict.key, verdict.otherKey ), ( OntoDS.REASON_MULTI_KEY, "places.City", "places.Country" ) )
+
+    self.assertEqual( ontods.verifyBatch( [ { "City":( "arendelle", "norway" ) }, { "address":{ "City":"arendelle" } } ], [] ), [ False, True ] )
+    self.assertEqual( ontods.verifyUpdate( { "address":{ "City":"arendelle" } }, { "address":{ "City":"norway" } }, [] ), False )
+
+    # explain walks the same paths
+    self.assertEqual( ontods.explain( anInsert, [ 'name', '*.id' ] ), [ "EXPLANATION : no predicates map subject 'norway' to object 'City'" ] )
+    self.assertEqual( ontods.explain( anInsert, [ 'name', '*.id', 'meta' ] ), [] )
+    self.assertEqual( ontods.explain( { "places":[ { "City":"losangeles", "Country":"norway" } ] }, [] ),
+                      [ "EXPLANATION : no predicates map subject 'losangeles' at 'places.City' to the data of 'places.Country' : ['norway']" ] )
+
+    # --------------------------------------------------------------- #
+
+
+  ################
+  #  EXAMPLE 20  #
+  ################
+  # test guarded bulk writes into a mongodb collection
+  def test_example20( self ) :
+
+    test_id = "test_example20"
+
+    logging.info( "  Running test " + test_id )
+
+    if mongomock is None :
+      self.skipTest( "mongomock is not installed" )
+
+    # --------------------------------------------------------------- #
+    # create ontods instance
+    ontods = OntoDS.OntoDS( "mongodb" )
+    logging.debug( "  " + test_id + " : instantiated OntoDS instance '" + str( ontods ) + "' with db type '" + ontods.nosql_type + "'"  )
+
+    # --------------------------------------------------------------- #
+    # input ontology
+
+    ontods.loadOntology( "./example_ontology.ttl" )
+
+    # --------------------------------------------------------------- #
+    # insert in bulk, routing verification failures and duplicate ids to the side channel
+
+    collection = mongomock.MongoClient().testdb.testdb
+    rejects    = []
+    adapter    = MongoDBAdapter.MongoDBAdapter( ontods, [ '_id', 'name' ], collection, batchSize=3, onReject=lambda item, reason : rejects.append( ( item, reason ) ) )
+
+    stats = adapter.insertMany( [ { "_id":1, "name":"Elsa", "City":"arendelle", "Country":"norway" },
+                                  { "_id":2, "name":"Anna", "City":"losangeles", "Country":"norway" },
+                                  { "_id":3, "name":"Hans", "Country":"norway" },
+                                  { "_id":1, "name":"Olaf", "Country":"norway" } ] )
+
+    self.assertEqual( stats, { "accepted" : 2, "rejected" : 2 } )
+    self.assertEqual( sorted( doc[ "_id" ] for doc in collection.find() ), [ 1, 3 ] )
+    self.assertEqual( [ item[ "_id" ] for item, reason in rejects ], [ 2, 1 ] )
+    self.assertEqual( rejects[0][1].reason, OntoDS.REASON_MULTI_KEY )
+    self.assertEqual( rejects[1][1][ "index" ], 0 )
+
+    # --------------------------------------------------------------- #
+    # update in bulk
+
+    stats = adapter.updateMany( [ ( 3, { "City":"arendelle" } ), ( 1, { "City":"norway" } ), ( 9, { "City":"arendelle" } ) ] )
+
+    self.assertEqual( stats, { "accepted" : 1, "rejected" : 2 } )
+    self.assertEqual( collection.find_one( { "_id":3 } )[ "City" ], "arendelle" )
+    self.assertEqual( collection.find_one( { "_id":1 } )[ "City" ], "arendelle" )
+    self.assertEqual( rejects[2][1].reason, OntoDS.REASON_KV )
+
+    # --------------------------------------------------------------- #
+
+
+  ################
+  #  EXAMPLE 19  #
+  ################
+  # test guarded bulk writes into a pickledb database
+  def test_example19( self ) :
+
+    test_id = "test_example19"
+
+    logging.info( "  Running test " + test_id )
+
+    # --------------------------------------------------------------- #
+    # create ontods instance
+    ontods = OntoDS.OntoDS( "pickledb" )
+    logging.debug( "  " + test_id + " : instantiated OntoDS instance '" + str( ontods ) + "' with db type '" + ontods.nosql_type + "'"  )
+
+    # --------------------------------------------------------------- #
+    # input ontology
+
+    ontods.loadOntology( "./example_ontology.ttl" )
+
+    # --------------------------------------------------------------- #
+    # insert and update in bulk
+
+    tmpDir = tempfile.mkdtemp()
+    try :
+      dbPath  = os.path.join( tmpDir, "guarded.db" )
+      adapter = PickleDBAdapter.PickleDBAdapter( ontods, [ 'id', 'name' ], pickledb.load( dbPath, False ), keyField="id", batchSize=2 )
+
+      stats = adapter.insertMany( [ { "id":"elsa", "name":"Elsa", "City":"arendelle", "Country":"norway" },
+                                    { "id":"anna", "name":"Anna", "City":"losangeles", "Country":"norway" },
+                                    { "id":"hans", "name":"Hans", "City":"norway" } ] )
+
+      self.assertEqual( stats, { "accepted" : 1, "rejected" : 2 } )
+      self.assertEqual( [ doc[ "id" ] for doc, verdict in adapter.rejects ], [ "anna", "hans" ] )
+      self.assertEqual( [ verdict.reason for doc, verdict in adapter.rejects ], [ OntoDS.REASON_MULTI_KEY, OntoDS.REASON_KV ] )
+      self.assertEqual( adapter.insertOne( { "id":"olaf", "name":"Olaf", "Country":"norway" } ), True )
+
+      stats = adapter.updateMany( [ ( "olaf", { "City":"arendelle" } ), ( "elsa", { "Country":"arendelle" } ), ( "kristoff", { "City":"arendelle" } ) ] )
+      self.assertEqual( stats, { "accepted" : 1, "rejected" : 2 } )
+
+      # every batch was dumped to disk
+      dbInst = pickledb.load( dbPath, False )
+      self.assertEqual( sorted( dbInst.getall() ), [ "elsa", "olaf" ] )
+      self.assertEqual( dbInst.get( "olaf" )[ "City" ], "arendelle" )
+      self.assertEqual( dbInst.get( "elsa" )[ "Country" ], "norway" )
+
+      # non string keys are stored and updated under their strings
+      self.assertEqual( adapter.insertOne( { "id":7, "name":"Sven", "Country":"norway" } ), True )
+      self.assertEqual( adapter.updateMany( [ ( 7, { "City":"arendelle" } ) ] ), { "accepted" : 1, "rejected" : 0 } )
+      self.assertEqual( pickledb.load( dbPath, False ).get( "7" )[ "City" ], "arendelle" )
+
+      # patches to one key in a batch are verified against each other :
+      # either is fine alone, but together they put arendelle in itself
+      self.assertEqual( adapter.insertOne( { "id":"sven", "name":"Sven", "Country":"norway" } ), True )
+      stats = adapter.updateMany( [ ( "sven", { "City":"arendelle" } ), ( "sven", { "Country":"arendelle" } ) ] )
+      self.assertEqual( stats, { "accepted" : 1, "rejected" : 1 } )
+      self.assertEqual( pickledb.load( dbPath, False ).get( "sven" ), { "id":"sven", "name":"Sven", "City":"arendelle", "Country":"norway" } )
+    finally :
+      shutil.rmtree( tmpDir )
+
+    # --------------------------------------------------------------- #
+    # the base adapter leaves the database writes to subclasses
+
+    adapter = GuardedAdapter.GuardedAdapter( ontods, [ 'name' ] )
+    self.assertRaises( NotImplementedError, adapter.insertOne, { "name":"Elsa", "City":"arendelle", "Country":"norway" } )
+    self.assertRaises( NotImplementedError, adapter.updateMany, [ ( "elsa", { "City":"arendelle" } ) ] )
+
+    # --------------------------------------------------------------- #
+
+
+  ################
+  #  EXAMPLE 18  #
+  ################
+  # test publishing new ontology versions under concurrent readers
+  def test_example18( self ) :
+
+    test_id = "test_example18"
+
+    logging.info( "  Running test " + test_id )
+
+    # --------------------------------------------------------------- #
+    # create versioned ontods instance
+    vods = VersionedOntoDS.VersionedOntoDS( "pickledb" )
+    logging.debug( "  " + test_id + " : instantiated VersionedOntoDS instance '" + str( vods ) + "' with db type '" + vods.nosql_type + "'"  )
+
+    # --------------------------------------------------------------- #
+    # input ontology
+
+    self.assertEqual( vods.loadOntology( "./example_ontology.ttl" ), 1 )
+
+    oldOntods = vods.pin()
+    self.assertEqual( vods.verify( { "City":"norway" }, [] ), False )
+    self.assertEqual( vods.verify( { "City":"arendelle", "Country":"norway" }, [] ), True )
+
+    # --------------------------------------------------------------- #
+    # publish a delta while readers keep verifying
+
+    stop     = threading.Event()
+    verdicts = []
+    errors   = []
+
+    def reader() :
+      try :
+        while not stop.is_set() :
+          ontods = vods.pin()
+          verdicts.append( ontods.verifyBatch( [ { "City":"norway" }, { "City":"arendelle", "Country":"norway" } ], [] ) )
+      except Exception as e :
+        errors.append( e )
+
+    readers = [ threading.Thread( target=reader ) for i in range( 4 ) ]
+    for t in readers :
+      t.start()
+
+    norway = rdflib.URIRef( "http://example.org/norway" )
+    city   = rdflib.URIRef( "http://schema.org/City" )
+    writer = vods.addTriples( [ ( norway, rdflib.URIRef( "http://www.schema.org/containedInPlace" ), city ) ], background=True )
+    writer.join()
+
+    stop.set()
+    for t in readers :
+      t.join()
+
+    self.assertEqual( errors, [] )
+    for verdict in verdicts :
+      self.assertTrue( verdict in ( [ False, True ], [ True, True ] ) )
+
+    # --------------------------------------------------------------- #
+    # the new version is current, and the pinned version is unchanged
+
+    self.assertEqual( vods.getVersion(), 2 )
+    self.assertEqual( vods.verify( { "City":"norway" }, [] ), True )
+    self.assertEqual( oldOntods.verify( { "City":"norway" }, [] ), False )
+    self.assertEqual( len( vods.pin().store ), len( oldOntods.store ) + 1 )
+
+    # --------------------------------------------------------------- #
+
+
+  ################
+  #  EXAMPLE 17  #
+  ################
+  # test single pass verification with structured explanations
+  def test_example17( self ) :
+
+    test_id = "test_example17"
+
+    logging.info( "  Running test " + test_id )
+
+    # --------------------------------------------------------------- #
+    # create ontods instance
+    ontods = OntoDS.OntoDS( "pickledb" )
+    logging.debug( "  " + test_id + " : instantiated OntoDS instance '" + str( ontods ) + "' with db type '" + ontods.nosql_type + "'"  )
+
+    # --------------------------------------------------------------- #
+    # input ontology
+
+    ontods.loadOntology( "./example_ontology.ttl" )
+
+    # --------------------------------------------------------------- #
+    # passing query
+
+    verdict = ontods.verifyWithExplanation( { "name":"Elsa", "age":21, "City":"arendelle", "Country":"norway" }, [ 'name', 'age' ] )
+    self.assertTrue( verdict )
+    self.assertEqual( verdict.reason, OntoDS.REASON_OK )
+    self.assertEqual( verdict.render(), "EXPLANATION : query adheres to all relevant predicates." )
+
+    # --------------------------------------------------------------- #
+    # kv failure
+
+    verdict = ontods.verifyWithExplanation( { "name":"Hans", "City":"norway" }, [ 'name' ] )
+    self.assertFalse( verdict )
+    self.assertEqual( verdict.reason, OntoDS.REASON_KV )
+    self.assertEqual( ( verdict.key, verdict.val ), ( "City", "norway" ) )
+    self.assertEqual( verdict.subjects, ontods.getSubjects( "norway" ) )
+    self.assertEqual( verdict.objects, ontods.getObjects( "City" ) )
+    self.assertTrue( verdict.failedSubject in verdict.subjects )
+    self.assertTrue( str( verdict ).startswith( "EXPLANATION : no predicates map subject 'norway' to object 'City'" ) )
+
+    # --------------------------------------------------------------- #
+    # multi key failure
+
+    verdict = ontods.verifyWithExplanation( { "name":"Anna", "City":"losangeles", "Country":"norway" }, [ 'name' ] )
+    self.assertFalse( verdict )
+    self.assertEqual( verdict.reason, OntoDS.REASON_MULTI_KEY )
+    self.assertEqual( verdict.asDict()[ "key" ], "City" )
+    self.assertEqual( ( verdict.val, verdict.otherKey, verdict.otherVal ), ( "losangeles", "Country", "norway" ) )
+
+    # --------------------------------------------------------------- #
+    # verdicts agree with verify
+
+    inserts = [ { "name":"Elsa", "age":21, "City":"arendelle", "Country":"norway" },
+                { "name":"Anna", "age":18, "City":"losangeles", "Country":"norway" },
+                { "name":"Hans", "City":"norway", "Country":"norway" },
+                { "Country":"arendelle" } ]
+
+    for anInsert in inserts :
+      self.assertEqual( bool( ontods.verifyWithExplanation( anInsert, [ 'name', 'age' ] ) ), ontods.verify( anInsert, [ 'name', 'age' ] ) )
+
+    # --------------------------------------------------------------- #
+
+
+  ################
+  #  EXAMPLE 16  #
+  ################
+  # test constraint plans are shared per key set and match per key checks
+  def test_example16( self ) :
+
+    test_id = "test_example16"
+
+    logging.info( "  Running test " + test_id )
+
+    # --------------------------------------------------------------- #
+    # create ontods instance
+    ontods = OntoDS.OntoDS( "pickledb" )
+    logging.debug( "  " + test_id + " : instantiated OntoDS instance '" + str( ontods ) + "' with db type '" + ontods.nosql_type + "'"  )
+
+    # --------------------------------------------------------------- #
+    # input ontology
+
+    ontods.loadOntology( "./example_ontology.ttl" )
+
+    # --------------------------------------------------------------- #
+    # compile a plan once per key set
+
+    checked, pairs = ontods.getPlan( { "name":"Elsa", "City":"arendelle", "Country":"norway" }, [ 'name' ] )
+    self.assertEqual( sorted( checked ), [ "City", "Country" ] )
+    self.assertEqual( pairs, ( ( "City", "Country" ), ) )
+
+    plan = ontods.getPlan( { "Country":"norway", "City":"losangeles", "name":"Anna" }, [ 'name' ] )
+    self.assertTrue( plan is ontods.getPlan( { "name":"Elsa", "City":"arendelle", "Country":"norway" }, [ 'name' ] ) )
+
+    # the ignore list is part of the plan
+    checked, pairs = ontods.getPlan( { "name":"Elsa", "City":"arendelle", "Country":"norway" }, [ 'name', 'City' ] )
+    self.assertEqual( checked, ( "Country", ) )
+    self.assertEqual( pairs, () )
+
+    # --------------------------------------------------------------- #
+    # verdicts match checking every key against every other key
+
+    inserts = [ { "name":"Elsa", "age":21, "City":"arendelle", "Country":"norway" },
+                { "name":"Anna", "age":18, "City":"losangeles", "Country":"norway" },
+                { "name":"Anna", "City":"arendelle" },
+                { "Country":"arendelle" } ]
+
+    for ignoreList in [ [ 'name', 'age' ], [ 'name', 'age', 'City' ], [ 'name' ] ] :
+      for anInsert in inserts :
+        expected = True
+        for k in anInsert :
+          if not k in ignoreList :
+            if not ontods.passesKVSubsumption( k, anInsert[ k ] ) or not ontods.passesMultiKeySubsumption( k, anInsert[ k ], anInsert ) :
+              expected = False
+        self.assertEqual( ontods.verify( anInsert, ignoreList ), expected )
+        self.assertEqual( ontods.verifyBatch( [ anInsert ], ignoreList ), [ expected ] )
+
+    # --------------------------------------------------------------- #
+    # changing the ontology drops stale plans
+
+    ontods.addTriple( rdflib.URIRef( "http://example.org/Country" ), rdflib.URIRef( "http://schema.org/containedInPlace" ), rdflib.URIRef( "http://example.org/City" ) )
+    self.assertFalse( plan is ontods.getPlan( { "name":"Elsa", "City":"arendelle", "Country":"norway" }, [ 'name' ] ) )
+
+    # --------------------------------------------------------------- #
+
+
+  ################
+  #  EXAMPLE 15  #
+  ################
+  # test guarded inserts into pickledb through the async gateway
+  def test_example15( self ) :
+
+    test_id = "test_example15"
+
+    logging.info( "  Running test " + test_id )
+
+    # --------------------------------------------------------------- #
+    # create ontods instance
+    ontods = OntoDS.OntoDS( "pickledb" )
+    logging.debug( "  " + test_id + " : instantiated OntoDS instance '" + str( ontods ) + "' with db type '" + ontods.nosql_type + "'"  )
+
+    # --------------------------------------------------------------- #
+    # input ontology
+
+    ontods.loadOntology( "./example_ontology.ttl" )
+
+    # --------------------------------------------------------------- #
+    # write only the accepted inserts
+
+    tmpDir = tempfile.mkdtemp()
+    dbInst = pickledb.load( os.path.join( tmpDir, "guarded.db" ), False )
+
+    def writer( docs ) :
+      for doc in docs :
+        dbInst.set( doc[ "id" ], doc )
+      dbInst.dump()
+
+    inserts = []
+    for i in range( 60 ) :
+      if i % 3 == 0 :
+        inserts.append( { "id":str( i ), "name":"Anna", "City":"losangeles", "Country":"norway" } )
+      else :
+        inserts.append( { "id":str( i ), "name":"Elsa", "City":"arendelle", "Country":"norway" } )
+
+    rejects = []
+    try :
+      with AsyncOntoDS.AsyncOntoDS( ontods, workers=2, maxPending=2 ) as gateway :
+        self.assertEqual( gateway.verifyAsync( inserts[ 1 ], [ 'id', 'name' ] ).get(), True )
+        self.assertEqual( gateway.verifyAsync( inserts[ 0 ], [ 'id', 'name' ] ).get(), False )
+
+        stats = gateway.guardedInsert( iter( inserts ), [ 'id', 'name' ], writer, batchSize=7, onReject=rejects.append ).get()
+
+      self.assertEqual( stats, { "accepted" : 40, "rejected" : 20 } )
+      self.assertEqual( [ doc[ "id" ] for doc in rejects ], [ str( i ) for i in range( 0, 60, 3 ) ] )
+      self.assertEqual( sorted( dbInst.getall() ), sorted( str( i ) for i in range( 60 ) if i % 3 ) )
+    finally :
+      shutil.rmtree( tmpDir )
+
+    # --------------------------------------------------------------- #
+    # the caller gets the handle back while the first write is still
+    # running, and the next batch is verified during that write
+
+    release  = threading.Event()
+    verified = []
+    written  = []
+    overlaps = []
+
+    def slowWriter( docs ) :
+      if not written :
+        overlaps.append( waitFor( lambda : len( verified ) >= 2 ) )
+        release.wait( 10 )
+      written.append( len( docs ) )
+
+    with AsyncOntoDS.AsyncOntoDS( ontods, workers=2, maxPending=2 ) as gateway :
+
+      verifyBatchAsync = gateway.verifyBatchAsync
+      gateway.verifyBatchAsync = lambda batch, ignoreList : verifyBatchAsync( batch, ignoreList, callback=verified.append )
+
+      done   = []
+      handle = gateway.guardedInsert( iter( inserts[ :21 ] ), [ 'id', 'name' ], slowWriter, batchSize=7, callback=done.append )
+
+      self.assertFalse( handle.ready() )
+      self.assertTrue( waitFor( lambda : overlaps ) )
+      release.set()
+
+      self.assertEqual( handle.get( 10 ), { "accepted" : 14, "rejected" : 7 } )
+      self.assertEqual( overlaps, [ True ] )
+      self.assertEqual( written, [ 4, 5, 5 ] )
+      self.assertEqual( done, [ handle.get() ] )
+
+      # writer errors reach the caller through the handle
+      def failingWriter( docs ) :
+        raise IOError( "disk full" )
+
+      self.assertRaises( IOError, gateway.guardedInsert( iter( inserts ), [ 'id', 'name' ], failingWriter, batchSize=7 ).get, 10 )
+
+    # --------------------------------------------------------------- #
+
+
+  ################
+  #  EXAMPLE 14  #
+  ################
+  # test incremental verification of updates
+  def test_example14( self ) :
+
+    test_id = "test_example14"
+
+    logging.info( "  Running test " + test_id )
+
+    # --------------------------------------------------------------- #
+    # create ontods instance
+    ontods = OntoDS.OntoDS( "pickledb" )
+    logging.debug( "  " + test_id + " : instantiated OntoDS instance '" + str( ontods ) + "' with db type '" + ontods.nosql_type + "'"  )
+
+    # --------------------------------------------------------------- #
+    # input ontology
+
+    ontods.loadOntology( "./example_ontology.ttl" )
+
+    # --------------------------------------------------------------- #
+    # verify updates to a passing document
+
+    existingDoc = { "name":"Elsa", "age":21, "City":"arendelle", "Country":"norway" }
+    self.assertEqual( ontods.verify( existingDoc, [ 'name', 'age' ] ), True )
+
+    self.assertEqual( ontods.verifyUpdate( existingDoc, { "age":22 }, [ 'name', 'age' ] ), True )
+    self.assertEqual( ontods.verifyUpdate( existingDoc, { "City":"arendelle", "name":"Anna" }, [ 'name', 'age' ] ), True )
+    self.assertEqual( ontods.verifyUpdate( existingDoc, { "City":"losangeles" }, [ 'name', 'age' ] ), False )
+    self.assertEqual( ontods.verifyUpdate( existingDoc, { "Country":"arendelle" }, [ 'name', 'age' ] ), False )
+    self.assertEqual( ontods.verifyUpdate( { "name":"Elsa", "City":"arendelle" }, { "Country":"norway" }, [ 'name' ] ), True )
+
+    # --------------------------------------------------------------- #
+
+
+  ################
+  #  EXAMPLE 13  #
+  ################
+  # test columnar verification
+  def test_example13( self ) :
+
+    test_id = "test_example13"
+
+    logging.info( "  Running test " + test_id )
+
+    # --------------------------------------------------------------- #
+    # create ontods instance
+    ontods = OntoDS.OntoDS( "pickledb" )
+    logging.debug( "  " + test_id + " : instantiated OntoDS instance '" + str( ontods ) + "' with db type '" + ontods.nosql_type + "'"  )
+
+    # --------------------------------------------------------------- #
+    # input ontology
+
+    ontods.loadOntology( "./example_ontology.ttl" )
+
+    # --------------------------------------------------------------- #
+    # verify columns
+
+    columns = { "name"    : [ "Elsa", "Anna", "Olaf", "Hans", "Kristoff" ],
+                "City"    : [ "arendelle", "losangeles", "arendelle", "norway", "arendelle" ],
+                "Country" : [ "norway", "norway", "norway", "norway", "arendelle" ] }
+
+    mask, reasons = ontods.verifyColumns( columns, [ 'name' ] )
+
+    rows = [ dict( ( k, columns[ k ][ i ] ) for k in columns ) for i in range( 5 ) ]
+    self.assertEqual( mask.tolist(), [ ontods.verify( row, [ 'name' ] ) for row in rows ] )
+    self.assertEqual( reasons.tolist(), [ OntoDS.REASON_OK, OntoDS.REASON_MULTI_KEY, OntoDS.REASON_OK, OntoDS.REASON_KV, OntoDS.REASON_MULTI_KEY ] )
+
+    # --------------------------------------------------------------- #
+    # columns of different lengths are refused
+
+    columns[ "Country" ] = columns[ "Country" ][ :4 ]
+    self.assertRaises( ValueError, ontods.verifyColumns, columns, [ 'name' ] )
+
+    # --------------------------------------------------------------- #
+
+
+  ################
+  #  EXAMPLE 12  #
+  ################
+  # test verification over the array triple store backend
+  def test_example12( self ) :
+
+    test_id = "test_example12"
+
+    logging.info( "  Running test " + test_id )
+
+    # --------------------------------------------------------------- #
+    # create ontods instance
+    ontods = OntoDS.OntoDS( "pickledb", retainGraph=False, backend="array" )
+    logging.debug( "  " + test_id + " : instantiated OntoDS instance '" + str( ontods ) + "' with db type '" + ontods.nosql_type + "'"  )
+
+    # --------------------------------------------------------------- #
+    # input ontology
+
+    ontods.loadOntology( "./example_ontology.ttl" )
+
+    self.assertEqual( len( ontods.store ), 11 )
+    self.assertEqual( ontods.getSubjects( "arendelle" ), [ rdflib.URIRef( "http://example.org/arendelle" ) ] )
+    self.assertEqual( ontods.checkContainment( "arendelle", "Country" ), True )
+
+    # --------------------------------------------------------------- #
+    # verify inserts
+
+    anInsert = { "name":"Elsa", "age":21, "City":"arendelle", "Country":"norway" }
+    self.assertEqual( ontods.verify( anInsert, [ 'name', 'age' ] ), True )
+
+    anInsert = { "name":"Elsa", "age":21, "City":"losangeles", "Country":"norway" }
+    self.assertEqual( ontods.verify( anInsert, [ 'name', 'age' ] ), False )
+    self.assertEqual( ontods.explain( anInsert, [ 'name', 'age' ] ), ["EXPLANATION : no predicates map subject 'losangeles' to object 'City'"] )
+
+    # --------------------------------------------------------------- #
+    # extend ontology so the insert passes
+
+    losangeles = rdflib.URIRef( "http://example.org/losangeles" )
+    ontods.addTriple( losangeles, rdflib.RDF.type, rdflib.URIRef( "http://schema.org/City" ) )
+    ontods.addTriple( losangeles, rdflib.URIRef( "http://www.schema.org/containedInPlace" ), rdflib.URIRef( "http://example.org/norway" ) )
+    ontods.addTriple( losangeles, rdflib.RDF.type, rdflib.URIRef( "http://schema.org/City" ) )
+
+    self.assertEqual( len( ontods.store ), 13 )
+    self.assertEqual( ontods.verify( anInsert, [ 'name', 'age' ] ), True )
+
+    # --------------------------------------------------------------- #
+    # restore a snapshot into the other backend
+
+    restored = OntoDS.OntoDS( "pickledb" )
+    restored.restoreSnapshot( ontods.snapshot() )
+
+    self.assertEqual( sorted( restored.iterTriples() ), sorted( ontods.iterTriples() ) )
+    self.assertEqual( restored.verify( anInsert, [ 'name', 'age' ] ), True )
+
+    # --------------------------------------------------------------- #
+
+
+  ################
+  #  EXAMPLE 11  #
+  ################
+  # test streaming an ontology without retaining an rdflib graph
+  def test_example11( self ) :
+
+    test_id = "test_example11"
+
+    logging.info( "  Running test " + test_id )
+
+    tmpDir = tempfile.mkdtemp()
+    try :
+
+      # --------------------------------------------------------------- #
+      # extend the example ontology with triples verification ignores
+
+      ontoPath = os.path.join( tmpDir, "onto.ttl" )
+      shutil.copy( "./example_ontology.ttl", ontoPath )
+
+      fo = open( ontoPath, "a" )
+      fo.write( "# irrelevant triples\n" )
+      fo.write( "<http://example.org/norway> <http://schema.org/population> \"5295619\"^^<http://www.w3.org/2001/XMLSchema#integer> .\n" )
+      fo.write( "<http://example.org/norway> <http://www.w3.org/2000/01/rdf-schema#label> \"Norge \\u00f8\"@no .\n" )
+      fo.close()
+
+      # --------------------------------------------------------------- #
+      # create ontods instance and stream ontology
+
+      ontods = OntoDS.OntoDS( "pickledb", retainGraph=False )
+      ontods.loadOntology( ontoPath )
+
+      self.assertEqual( ontods.ontology, None )
+      self.assertEqual( len( list( ontods.iterTriples() ) ), 12 )
+      self.assertTrue( ( rdflib.URIRef( "http://example.org/norway" ), rdflib.RDFS.label, rdflib.Literal( u"Norge \u00f8", lang="no" ) ) in ontods.iterTriples() )
+
+      # --------------------------------------------------------------- #
+      # verify inserts
+
+      anInsert = { "name":"Elsa", "age":21, "City":"arendelle", "Country":"norway" }
+      self.assertEqual( ontods.verify( anInsert, [ 'name', 'age' ] ), True )
+
+      anInsert = { "name":"Elsa", "age":21, "City":"losangeles", "Country":"norway" }
+      self.assertEqual( ontods.verify( anInsert, [ 'name', 'age' ] ), False )
+      self.assertEqual( ontods.explain( anInsert, [ 'name', 'age' ] ), ["EXPLANATION : no predicates map subject 'losangeles' to object 'City'"] )
+
+    finally :
+      shutil.rmtree( tmpDir )
+
+    # --------------------------------------------------------------- #
+
+
+  ################
+  #  EXAMPLE 10  #
+  ################
+  # test compiling an ontology and reloading it while fresh
+  def test_example10( self ) :
+
+    test_id = "test_example10"
+
+    logging.info( "  Running test " + test_id )
+
+    tmpDir = tempfile.mkdtemp()
+    try :
+
+      # --------------------------------------------------------------- #
+      # compile ontology
+
+      ontoPath     = os.path.join( tmpDir, "onto.ttl" )
+      compiledPath = os.path.join( tmpDir, "onto.compiled" )
+      shutil.copy( "./example_ontology.ttl", ontoPath )
+
+      ontods = OntoDS.OntoDS( "pickledb" )
+      ontods.compileOntology( ontoPath, compiledPath )
+
+      # --------------------------------------------------------------- #
+      # load compiled ontology
+
+      compiled = OntoDS.OntoDS( "pickledb" )
+      self.assertEqual( compiled.loadCompiledOntology( compiledPath, ontoPath ), True )
+
+      # the graph is only built on first use
+      self.assertEqual( compiled.graph, None )
+      self.assertEqual( len( compiled.ontology ), len( ontods.ontology ) )
+
+      anInsert = { "name":"Elsa", "age":21, "City":"arendelle", "Country":"norway" }
+      self.assertEqual( compiled.verify( anInsert, [ 'name', 'age' ] ), True )
+
+      # --------------------------------------------------------------- #
+      # change the ontology file so the compiled ontology goes stale
+
+      fo = open( ontoPath, "a" )
+      fo.write( "<http://example.org/losangeles> <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> <http://schema.org/City> .\n" )
+      fo.close()
+
+      stale = OntoDS.OntoDS( "pickledb" )
+      self.assertEqual( stale.loadCompiledOntology( compiledPath, ontoPath ), False )
+
+      # loading through the compiled path recompiles
+      stale.loadOntology( ontoPath, compiledPath )
+      self.assertEqual( len( stale.getSubjects( "losangeles" ) ), 1 )
+
+      fresh = OntoDS.OntoDS( "pickledb" )
+      self.assertEqual( fresh.loadCompiledOntology( compiledPath, ontoPath ), True )
+      self.assertEqual( len( fresh.getSubjects( "losangeles" ) ), 1 )
+
+      # a payload not matching its header sha1 is never unpickled
+      corruptPath = os.path.join( tmpDir, "corrupt.compiled" )
+      data = bytearray( open( compiledPath, "rb" ).read() )
+      data[ -2 ] ^= 0xff
+      open( corruptPath, "wb" ).write( data )
+      self.assertEqual( OntoDS.OntoDS( "pickledb" ).loadCompiledOntology( corruptPath ), False )
+
+      open( corruptPath, "wb" ).write( data[ :-10 ] )
+      self.assertEqual( OntoDS.OntoDS( "pickledb" ).loadCompiledOntology( corruptPath ), False )
+
+      # --------------------------------------------------------------- #
+      # loading into a non empty ontology leaves the compiled ontology alone
+
+      otherPath = os.path.join( tmpDir, "other.ttl" )
+      fo = open( otherPath, "w" )
+      fo.write( "<http://example.org/oslo> <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> <http://schema.org/City> .\n" )
+      fo.close()
+
+      otherCompiledPath = os.path.join( tmpDir, "other.compiled" )
+      fresh.loadOntology( otherPath, otherCompiledPath )
+      self.assertEqual( os.path.exists( otherCompiledPath ), False )
+
+      other = OntoDS.OntoDS( "pickledb" )
+      other.loadOntology( otherPath, otherCompiledPath )
+      self.assertEqual( len( other.ontology ), 1 )
+      self.assertEqual( os.path.exists( otherCompiledPath ), True )
+
+    finally :
+      shutil.rmtree( tmpDir )
+
+    # --------------------------------------------------------------- #
+
+
+  ###############
+  #  EXAMPLE 9  #
+  ###############
+  # test snapshots and parallel verification across worker processes
+  def test_example9( self ) :
+
+    test_id = "test_example9"
+
+    logging.info( "  Running test " + test_id )
+
+    # --------------------------------------------------------------- #
+    # create ontods instance
+    ontods = OntoDS.OntoDS( "pickledb" )
+    logging.debug( "  " + test_id + " : instantiated OntoDS instance '" + str( ontods ) + "' with db type '" + ontods.nosql_type + "'"  )
+
+    # --------------------------------------------------------------- #
+    # input ontology
+
+    ontods.loadOntology( "./example_ontology.ttl" )
+
+    # --------------------------------------------------------------- #
+    # restore a pickled snapshot into a fresh instance
+
+    snapshot = pickle.loads( pickle.dumps( ontods.snapshot(), pickle.HIGHEST_PROTOCOL ) )
+    restored = OntoDS.OntoDS( "pickledb" )
+    restored.restoreSnapshot( snapshot )
+
+    self.assertEqual( len( restored.ontology ), len( ontods.ontology ) )
+    self.assertEqual( restored.getSubjects( "arendelle" ), ontods.getSubjects( "arendelle" ) )
+    self.assertEqual( restored.checkContainment( "arendelle", "Country" ), True )
+
+    # --------------------------------------------------------------- #
+    # verify a stream of inserts in parallel
+
+    inserts = [ { "name":"Elsa", "age":21, "City":"arendelle", "Country":"norway" },
+                { "name":"Anna", "age":18, "City":"losangeles", "Country":"norway" } ] * 50
+
+    expected = [ ontods.verify( anInsert, [ 'name', 'age' ] ) for anInsert in inserts ]
+
+    with ParallelOntoDS.ParallelOntoDS( ontods, workers=2 ) as pods :
+      verdicts = list( pods.verifyMany( iter( inserts ), [ 'name', 'age' ], batchSize=7 ) )
+
+    self.assertEqual( verdicts, expected )
+
+    # --------------------------------------------------------------- #
+    # workers are configured like the given instance
+
+    compact = OntoDS.OntoDS( "pickledb", cacheSize=64, retainGraph=False, backend="array", prefilterRate=0.01 )
+    compact.loadOntology( "./example_ontology.ttl" )
+
+    with ParallelOntoDS.ParallelOntoDS( compact, workers=1 ) as pods :
+      self.assertEqual( pods.pool.apply( workerConfig ), ( False, True, "array", True, 64 ) )
+      self.assertEqual( list( pods.verifyMany( iter( inserts ), [ 'name', 'age' ], batchSize=7 ) ), expected )
+
+    # --------------------------------------------------------------- #
+
+
+  ###############
+  #  EXAMPLE 8  #
+  ###############
+  # test the check result cache counts hits and drops stale results
+  def test_example8( self ) :
+
+    test_id = "test_example8"
+
+    logging.info( "  Running test " + test_id )
+
+    # --------------------------------------------------------------- #
+    # create ontods instance
+    ontods = OntoDS.OntoDS( "pickledb", cacheSize=16 )
+    logging.debug( "  " + test_id + " : instantiated OntoDS instance '" + str( ontods ) + "' with db type '" + ontods.nosql_type + "'"  )
+
+    # --------------------------------------------------------------- #
+    # input ontology
+
+    ontods.loadOntology( "./example_ontology.ttl" )
+
+    # --------------------------------------------------------------- #
+    # repeat a failing insert
+
+    anInsert = { "name":"Anna", "City":"losangeles", "Country":"norway" }
+
+    self.assertEqual( ontods.verify( anInsert, [ 'name' ] ), False )
+    misses = ontods.getCacheStats()[ "misses" ]
+    self.assertEqual( ontods.verify( anInsert, [ 'name' ] ), False )
+
+    stats = ontods.getCacheStats()
+    self.assertEqual( stats[ "misses" ], misses )
+    self.assertTrue( stats[ "hits" ] > 0 )
+    self.assertTrue( stats[ "entries" ] <= 16 )
+
+    # --------------------------------------------------------------- #
+    # extend ontology so the insert passes
+
+    losangeles = rdflib.URIRef( "http://example.org/losangeles" )
+    ontods.addTriple( losangeles, rdflib.RDF.type, rdflib.URIRef( "http://schema.org/City" ) )
+    ontods.addTriple( losangeles, rdflib.URIRef( "http://www.schema.org/containedInPlace" ), rdflib.URIRef( "http://example.org/norway" ) )
+
+    self.assertEqual( ontods.getCacheStats()[ "entries" ], 0 )
+    self.assertEqual( ontods.verify( anInsert, [ 'name' ] ), True )
+
+    # --------------------------------------------------------------- #
+    # a full cache evicts an entry not read since it was cached
+
+    cache = LRUCache.LRUCache( 2 )
+    cache.put( "a", 1 )
+    cache.put( "b", 2 )
+    self.assertEqual( cache.get( "a" ), 1 )
+    cache.put( "c", 3 )
+
+    self.assertEqual( cache.get( "b" ), None )
+    self.assertEqual( [ cache.get( k ) for k in [ "a", "c" ] ], [ 1, 3 ] )
+    self.assertEqual( cache.getStats()[ "evictions" ], 1 )
+
+    # --------------------------------------------------------------- #
+
+
+  ###############
+  #  EXAMPLE 7  #
+  ###############
+  # test batch verification over a stream of inserts
+  def test_example7( self ) :
+
+    test_id = "test_example7"
+
+    logging.info( "  Running test " + test_id )
+
+    # --------------------------------------------------------------- #
+    # create ontods instance
+    ontods = OntoDS.OntoDS( "pickledb" )
+    logging.debug( "  " + test_id + " : instantiated OntoDS instance '" + str( ontods ) + "' with db type '" + ontods.nosql_type + "'"  )
+
+    # --------------------------------------------------------------- #
+    # input ontology
+
+    ontods.loadOntology( "./example_ontology.ttl" )
+
+    # --------------------------------------------------------------- #
+    # verify a stream of inserts
+
+    inserts = [ { "name":"Elsa", "age":21, "City":"arendelle", "Country":"norway" },
+                { "name":"Anna", "age":18, "City":"losangeles", "Country":"norway" },
+                { "name":"Olaf", "City":"arendelle" },
+                { "name":"Hans", "age":23, "City":"arendelle", "Country":"norway", "pets":[ "sven" ] } ]
+
+    expected = [ ontods.verify( anInsert, [ 'name', 'age', 'pets' ] ) for anInsert in inserts ]
+    self.assertEqual( expected, [ True, False, True, True ] )
+
+    verdicts = ontods.verifyMany( ( anInsert for anInsert in inserts * 3 ), [ 'name', 'age', 'pets' ], batchSize=5 )
+    self.assertEqual( list( verdicts ), expected * 3 )
+
+    # --------------------------------------------------------------- #
+
+
+  ###############
+  #  EXAMPLE 6  #
+  ###############
+  # test transitive containment through the subsumption hierarchy
+  def test_example6( self ) :
+
+    test_id = "test_example6"
+
+    logging.info( "  Running test " + test_id )
+
+    # --------------------------------------------------------------- #
+    # create ontods instance
+    ontods = OntoDS.OntoDS( "pickledb" )
+    logging.debug( "  " + test_id + " : instantiated OntoDS instance '" + str( ontods ) + "' with db type '" + ontods.nosql_type + "'"  )
+
+    # --------------------------------------------------------------- #
+    # input ontology with only direct edges between neighbouring levels
+
+    contained   = rdflib.URIRef( "http://schema.org/containedInPlace" )
+    city        = rdflib.URIRef( "http://schema.org/City" )
+    state       = rdflib.URIRef( "http://schema.org/State" )
+    country     = rdflib.URIRef( "http://schema.org/Country" )
+    springfield = rdflib.URIRef( "http://example.org/springfield" )
+    illinois    = rdflib.URIRef( "http://example.org/illinois" )
+    usa         = rdflib.URIRef( "http://example.org/usa" )
+
+    ontods.addTriple( city, contained, state )
+    ontods.addTriple( state, contained, country )
+    ontods.addTriple( springfield, rdflib.RDF.type, city )
+    ontods.addTriple( illinois, rdflib.RDF.type, state )
+    ontods.addTriple( usa, rdflib.RDF.type, country )
+    ontods.addTriple( springfield, contained, illinois )
+    ontods.addTriple( illinois, contained, usa )
+
+    self.assertEqual( ontods.checkContainment( "City", "Country" ), True )
+    self.assertEqual( ontods.checkContainment( "springfield", "usa" ), True )
+    self.assertEqual( ontods.checkContainment( "usa", "springfield" ), False )
+    self.assertEqual( ontods.checkContainment( "City", "City" ), False )
+
+    # --------------------------------------------------------------- #
+    # verify inserts
+
+    self.assertEqual( ontods.verify( { "name":"Bart", "City":"springfield", "Country":"usa" }, [ 'name' ] ), True )
+    self.assertEqual( ontods.verify( { "name":"Bart", "City":"springfield", "State":"usa" }, [ 'name' ] ), False )
+
+    # --------------------------------------------------------------- #
+
+
+  ###############
+  #  EXAMPLE 5  #
+  ###############
+  # test data string indexes track loads and added triples
+  def test_example5( self ) :
+
+    test_id = "test_example5"
+
+    logging.info( "  Running test " + test_id )
+
+    # --------------------------------------------------------------- #
+    # create ontods instance
+    ontods = OntoDS.OntoDS( "pickledb" )
+    logging.debug( "  " + test_id + " : instantiated OntoDS instance '" + str( ontods ) + "' with db type '" + ontods.nosql_type + "'"  )
+
+    # --------------------------------------------------------------- #
+    # input ontology
+
+    ontods.loadOntology( "./example_ontology.ttl" )
+
+    self.assertEqual( ontods.getSubjects( "arendelle" ), [ rdflib.URIRef( "http://example.org/arendelle" ) ] )
+    self.assertEqual( ontods.getObjects( "city" ), [ rdflib.URIRef( "http://schema.org/City" ) ] )
+    self.assertEqual( ontods.getSubjects( "losangeles" ), [] )
+
+    # --------------------------------------------------------------- #
+    # extend ontology
+
+    oslo = rdflib.URIRef( "http://example.org/Oslo" )
+    ontods.addTriple( oslo, rdflib.RDF.type, rdflib.URIRef( "http://schema.org/City" ) )
+
+    self.assertEqual( ontods.getSubjects( "Oslo" ), [ oslo ] )
+    self.assertEqual( ontods.getSubjects( "oslo" ), [ oslo ] )
+
+    # --------------------------------------------------------------- #
+
+
   ###############
   #  EXAMPLE 4  #
   ###############
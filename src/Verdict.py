@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+
+##########################################################################
+# Verdict usage notes:
+#
+# 1. The structured result of OntoDS.verifyWithExplanation.
+# 2. Truthy when the query passes, so it can stand in for a verify verdict.
+# 3. Holds the evidence gathered during verification. The human readable
+#    explanation is only built when render is called.
+#
+##########################################################################
+
+# -------------------------------------- #
+import logging
+
+# -------------------------------------- #
+
+
+# failure reasons, shared with OntoDS.verifyColumns
+REASON_OK        = 0   # query passes
+REASON_KV        = 1   # some kv pair fails kv subsumption
+REASON_MULTI_KEY = 2   # every kv pair passes, but some related key pair fails multi key subsumption
+
+
+class Verdict( object ) :
+
+  ################
+  #  ATTRIBUTES  #
+  ################
+  reason        = None   # the REASON_* code of the verdict
+  key           = None   # the failing key, None on a pass
+  val           = None   # the value of the failing key, None on a pass
+  otherKey      = None   # the key subsuming key, for multi key failures
+  otherVal      = None   # the value of otherKey, for multi key failures
+  subjects      = ()     # the ontology terms matching val
+  objects       = ()     # the ontology terms matching key, or otherVal for multi key failures
+  failedSubject = None   # the term in subjects not subsumed by any term in objects
+
+  FIELDS = ( "reason", "key", "val", "otherKey", "otherVal", "subjects", "objects", "failedSubject" )
+
+
+  ##########
+  #  INIT  #
+  ##########
+  def __init__( self, reason, key=None, val=None, otherKey=None, otherVal=None, subjects=(), objects=(), failedSubject=None ) :
+
+    self.reason        = reason
+    self.key           = key
+    self.val           = val
+    self.otherKey      = otherKey
+    self.otherVal      = otherVal
+    self.subjects      = subjects
+    self.objects       = objects
+    self.failedSubject = failedSubject
+
+
+  #############
+  #  NONZERO  #
+  #############
+  def __nonzero__( self ) :
+    return self.reason == REASON_OK
+
+  __bool__ = __nonzero__
+
+
+  #############
+  #  AS DICT  #
+  #############
+  # return the verdict as a map of attribute names to values.
+  def asDict( self ) :
+    return dict( ( attr, getattr( self, attr ) ) for attr in self.FIELDS )
+
+
+  ############
+  #  RENDER  #
+  ############
+  # return the human readable explanation of the verdict.
+  def render( self ) :
+
+    if self.reason == REASON_OK :
+      return "EXPLANATION : query adheres to all relevant predicates."
+
+    elif self.reason == REASON_KV :
+      if self.failedSubject is None :
+        return "EXPLANATION : no predicates map subject '" + str( self.val ) + "' to object '" + str( self.key ) + "'"
+      return "EXPLANATION : no predicates map subject '" + str( self.val ) + "' to object '" + str( self.key ) + "' : subject '" + str( self.failedSubject ) + "' is not subsumed by any of " + str( list( self.objects ) )
+
+    elif self.reason == REASON_MULTI_KEY :
+      return "EXPLANATION : key '" + str( self.key ) + "' is subsumed by key '" + str( self.otherKey ) + "', but subject '" + str( self.val ) + "' is not subsumed by object '" + str( self.otherVal ) + "'"
+
+    # WTF???
+    else :
+      logging.warning( "  RENDER : unrecognized reason '%s'", self.reason )
+      return "EXPLANATION : unrecognized reason '" + str( self.reason ) + "'"
+
+
+  #########
+  #  STR  #
+  #########
+  def __str__( self ) :
+    return self.render()
+
+
+  ##########
+  #  REPR  #
+  ##########
+  def __repr__( self ) :
+    return "Verdict( " + ", ".join( attr + "=" + repr( getattr( self, attr ) ) for attr in self.FIELDS ) + " )"
+
+
+#########
+#  EOF  #
+#########
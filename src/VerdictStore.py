@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+
+##########################################################################
+# VerdictStore usage notes:
+#
+# 1. Persists the boolean check results of OntoDS in a sqlite3 file, so
+#    every OntoDS process on a host, and every restart, shares them.
+# 2. Results are keyed by the content hash of the ontology plus the
+#    check and its arguments, so results for other ontologies or other
+#    versions of the same ontology never mix. Processes sharing a file
+#    must also share their Normalizer configuration.
+# 3. Holds at most maxEntries results, evicting the least recently used.
+#    Writes and use times are buffered and flushed every flushEvery
+#    writes, on flush or close, and at interpreter exit.
+# 4. Safe to share across threads. Processes forked after the store is
+#    opened reconnect on first use.
+#
+##########################################################################
+
+# -------------------------------------- #
+import atexit, hashlib, logging, os, sqlite3, threading, time
+
+# -------------------------------------- #
+
+
+# argument types whose results can be persisted, with the tag naming each in keys
+KEY_TYPES = { str : "s", unicode : "u", int : "i", long : "i", float : "f", bool : "b", type( None ) : "n" }
+
+# seconds to wait on a file locked by another process
+LOCK_TIMEOUT = 30.0
+
+
+class VerdictStore( object ) :
+
+
+  ################
+  #  ATTRIBUTES  #
+  ################
+  path       = None   # the path of the sqlite3 file
+  maxEntries = None   # the maximum number of results kept in the file
+  flushEvery = None   # the number of buffered writes triggering a flush
+  conn       = None   # the sqlite3 connection, None until first use
+  pid        = None   # the process owning conn
+  pending    = None   # map of keys to results written since the last flush
+  touched    = None   # map of keys to use times read since the last flush
+  hits       = 0      # the number of lookups answered from the file
+  misses     = 0      # the number of lookups not answered from the file
+  lock       = None   # serializes access to conn across threads
+
+
+  ##########
+  #  INIT  #
+  ##########
+  def __init__( self, path, maxEntries=1000000, flushEvery=256 ) :
+
+    self.path       = path
+    self.maxEntries = maxEntries
+    self.flushEvery = flushEvery
+    self.pending    = {}
+    self.touched    = {}
+    self.lock       = threading.Lock()
+
+    logging.debug( "  ...instantiated VerdictStore instance at '%s'", path )
+
+
+  ###############
+  #  GET STATE  #
+  ###############
+  # only the configuration is pickled, so stores can be handed to worker processes.
+  def __getstate__( self ) :
+    return { "path" : self.path, "maxEntries" : self.maxEntries, "flushEvery" : self.flushEvery }
+
+
+  ###############
+  #  SET STATE  #
+  ###############
+  def __setstate__( self, state ) :
+    self.__init__( state[ "path" ], state[ "maxEntries" ], state[ "flushEvery" ] )
+
+
+  #############
+  #  CONNECT  #
+  #############
+  # return the connection of the current process, opening it on first use.
+  def connect( self ) :
+
+    if self.conn is not None and self.pid == os.getpid() :
+      return self.conn
+
+    # a connection inherited across a fork is never touched again
+    self.pending = {}
+    self.touched = {}
+
+    conn = sqlite3.connect( self.path, timeout=LOCK_TIMEOUT, check_same_thread=False )
+    conn.execute( "PRAGMA journal_mode=WAL" )
+    conn.execute( "PRAGMA synchronous=NORMAL" )
+    conn.execute( "CREATE TABLE IF NOT EXISTS verdicts ( key TEXT PRIMARY KEY, verdict INTEGER NOT NULL, used REAL NOT NULL )" )
+    conn.execute( "CREATE INDEX IF NOT EXISTS verdicts_used ON verdicts ( used )" )
+    conn.commit()
+
+    # only the first connection of a process registers for exit
+    if self.pid != os.getpid() :
+      atexit.register( self.close )
+
+    self.conn = conn
+    self.pid  = os.getpid()
+
+    return conn
+
+
+  ##############
+  #  MAKE KEY  #
+  ##############
+  # return the key of the given check on the given arguments against the
+  # ontology with the given content hash, or None if the arguments
+  # cannot be persisted.
+  def makeKey( self, contentHash, tag, args ) :
+
+    sha1 = hashlib.sha1( contentHash )
+    sha1.update( tag )
+
+    for arg in args :
+
+      typeTag = KEY_TYPES.get( type( arg ) )
+      if typeTag is None :
+        return None
+
+      if isinstance( arg, unicode ) :
+        arg = arg.encode( "utf-8" )
+
+      val = str( arg ) if typeTag != "f" else repr( arg )
+      sha1.update( "\0" + typeTag + str( len( val ) ) + ":" + val )
+
+    return sha1.hexdigest()
+
+
+  #########
+  #  GET  #
+  #########
+  # return the persisted result for the given key, or None if there is none.
+  def get( self, key ) :
+
+    with self.lock :
+
+      if key in self.pending :
+        self.hits += 1
+        return self.pending[ key ]
+
+      row = self.connect().execute( "SELECT verdict FROM verdicts WHERE key = ?", ( key, ) ).fetchone()
+
+      if row is None :
+        self.misses += 1
+        return None
+
+      self.hits += 1
+      self.touched[ key ] = time.time()
+      return bool( row[0] )
+
+
+  #########
+  #  PUT  #
+  #########
+  # persist the given result for the given key.
+  def put( self, key, verdict ) :
+
+    with self.lock :
+
+      self.connect()
+      self.pending[ key ] = bool( verdict )
+
+      if len( self.pending ) + len( self.touched ) >= self.flushEvery :
+        self.flushLocked()
+
+
+  ###########
+  #  FLUSH  #
+  ###########
+  # write the buffered results and use times to the file.
+  def flush( self ) :
+
+    with self.lock :
+      self.flushLocked()
+
+
+  ##################
+  #  FLUSH LOCKED  #
+  ##################
+  def flushLocked( self ) :
+
+    if not self.pending and not self.touched :
+      return
+
+    conn = self.connect()
+    now  = time.time()
+
+    with conn :
+      conn.executemany( "UPDATE verdicts SET used = ? WHERE key = ?", [ ( self.touched[ key ], key ) for key in self.touched ] )
+      conn.executemany( "INSERT OR REPLACE INTO verdicts ( key, verdict, used ) VALUES ( ?, ?, ? )",
+                        [ ( key, int( self.pending[ key ] ), now ) for key in self.pending ] )
+
+      # drop the least recently used results past the size bound
+      excess = conn.execute( "SELECT COUNT(*) FROM verdicts" ).fetchone()[0] - self.maxEntries
+      if excess > 0 :
+        conn.execute( "DELETE FROM verdicts WHERE key IN ( SELECT key FROM verdicts ORDER BY used LIMIT ? )", ( excess, ) )
+        logging.debug( "  VERDICT STORE FLUSH : evicted %s results from '%s'", excess, self.path )
+
+    self.pending = {}
+    self.touched = {}
+
+
+  ###########
+  #  CLOSE  #
+  ###########
+  # flush and close the connection of the current process.
+  def close( self ) :
+
+    with self.lock :
+
+      if self.conn is None or self.pid != os.getpid() :
+        return
+
+      self.flushLocked()
+      self.conn.close()
+      self.conn = None
+
+
+  ###############
+  #  GET STATS  #
+  ###############
+  def getStats( self ) :
+
+    with self.lock :
+      lookups = self.hits + self.misses
+      return { "hits"    : self.hits,
+               "misses"  : self.misses,
+               "hitRate" : float( self.hits ) / lookups if lookups else 0.0,
+               "pending" : len( self.pending ) }
+
+
+#########
+#  EOF  #
+#########
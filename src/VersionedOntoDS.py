@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+
+##########################################################################
+# VersionedOntoDS usage notes:
+#
+# 1. Publishes the ontology as a series of immutable, versioned OntoDS
+#    instances, so verification can go on while the ontology changes.
+# 2. Readers pin the current instance with a single attribute read and
+#    never wait on writers. A pinned instance never changes, even after
+#    newer versions are published.
+# 3. Writers build the next version, indexes and closure included, off
+#    to the side, then swap it in at once. Writers are serialized.
+# 4. Never call addTriple or loadOntology on a published instance.
+# 5. Every addTriples or removeTriples copies the whole current instance
+#    through a snapshot before applying the delta, since published
+#    instances are never changed in place. Each push costs time in the
+#    size of the ontology, not the delta, about 3 to 5 seconds for 133k
+#    triples, and holds two full copies in memory until the old version
+#    is unpinned. Batch small deltas into one call rather than pushing
+#    them one at a time.
+#
+##########################################################################
+
+# -------------------------------------- #
+import logging, threading
+
+# import sibling packages HERE!!!
+import OntoDS
+
+# -------------------------------------- #
+
+
+class VersionedOntoDS( object ) :
+
+
+  ################
+  #  ATTRIBUTES  #
+  ################
+  nosql_type            = None   # the type of nosql database under consideration
+  cacheSize             = None   # the check result cache size of each published instance
+  retainGraph           = None   # whether published instances keep an rdflib Graph
+  backend               = None   # the triple store backend of each published instance
+  normalizer            = None   # the Normalizer shared by every published instance
+  prefilterRate         = None   # the membership prefilter false positive rate of each published instance
+  subsumptionPredicates = None   # the subsumption predicates of each published instance
+  published             = None   # the ( version, OntoDS ) pair readers currently see
+  writeLock             = None   # serializes writers building the next version
+
+
+  ##########
+  #  INIT  #
+  ##########
+  # cacheSize, retainGraph, backend, normalizer, prefilterRate, and
+  # subsumptionPredicates configure every published OntoDS instance.
+  def __init__( self, nosql_type, cacheSize=10000, retainGraph=True, backend="dict", normalizer=None, prefilterRate=None, subsumptionPredicates=None ) :
+
+    self.nosql_type            = nosql_type
+    self.cacheSize             = cacheSize
+    self.retainGraph           = retainGraph
+    self.backend               = backend
+    self.normalizer            = normalizer
+    self.prefilterRate         = prefilterRate
+    self.subsumptionPredicates = subsumptionPredicates
+    self.writeLock             = threading.Lock()
+
+    self.published = ( 0, self.seal( self.newOntoDS() ) )
+
+    logging.debug( "  ...instantiated VersionedOntoDS instance with db type '%s'", nosql_type )
+
+
+  #########
+  #  PIN  #
+  #########
+  # return the current OntoDS instance. it stays valid for as long as
+  # the caller holds it, whatever is published afterwards.
+  def pin( self ) :
+    return self.published[ 1 ]
+
+
+  #################
+  #  GET VERSION  #
+  #################
+  # return the version of the current OntoDS instance.
+  def getVersion( self ) :
+    return self.published[ 0 ]
+
+
+  ############
+  #  VERIFY  #
+  ############
+  # verify an insert/update query against the current ontology.
+  def verify( self, queryMap, ignoreList ) :
+    return self.pin().verify( queryMap, ignoreList )
+
+
+  ##################
+  #  VERIFY BATCH  #
+  ##################
+  # verify a list of insert/update queries, all against the same version of the ontology.
+  def verifyBatch( self, batch, ignoreList ) :
+    return self.pin().verifyBatch( batch, ignoreList )
+
+
+  ###################
+  #  LOAD ONTOLOGY  #
+  ###################
+  # publish a new version holding only the ontology at the given file path.
+  # if background is True, build it on a new thread and return the thread,
+  # otherwise return the published version.
+  def loadOntology( self, ontoPath, background=False ) :
+    return self.publish( self.buildFromFile, background, ontoPath )
+
+
+  #################
+  #  ADD TRIPLES  #
+  #################
+  # publish a new version holding the current ontology plus the given triples,
+  # given as an iterable or the path of an N-Triples delta file.
+  # if background is True, build it on a new thread and return the thread,
+  # otherwise return the published version.
+  def addTriples( self, triples, background=False ) :
+    return self.publish( self.buildWithTriples, background, self.materialize( triples ) )
+
+
+  ####################
+  #  REMOVE TRIPLES  #
+  ####################
+  # publish a new version holding the current ontology minus the given triples,
+  # given like the triples of addTriples.
+  def removeTriples( self, triples, background=False ) :
+    return self.publish( self.buildWithoutTriples, background, self.materialize( triples ) )
+
+
+  #################
+  #  MATERIALIZE  #
+  #################
+  # read iterables of triples up front, so background builds never share
+  # an iterator with the caller. delta file paths are passed through.
+  def materialize( self, triples ) :
+
+    if isinstance( triples, basestring ) :
+      return triples
+
+    return list( triples )
+
+
+  #############
+  #  PUBLISH  #
+  #############
+  # build the next version with the given build function and swap it in.
+  def publish( self, build, background, *args ) :
+
+    if background :
+      thread = threading.Thread( target=self.publish, args=( build, False ) + args )
+      thread.daemon = True
+      thread.start()
+      return thread
+
+    with self.writeLock :
+      ontods  = self.seal( build( *args ) )
+      version = self.published[ 0 ] + 1
+
+      # readers see either the old pair or the new one, never a mix
+      self.published = ( version, ontods )
+
+    logging.debug( "  PUBLISH : published ontology version %s", version )
+
+    return version
+
+
+  #####################
+  #  BUILD FROM FILE  #
+  #####################
+  def buildFromFile( self, ontoPath ) :
+
+    ontods = self.newOntoDS()
+    ontods.loadOntology( ontoPath )
+
+    return ontods
+
+
+  ########################
+  #  BUILD WITH TRIPLES  #
+  ########################
+  # copy the current instance through a snapshot, then add the triples to the copy.
+  # the copy costs time and memory in the size of the ontology, see usage note 5.
+  def buildWithTriples( self, triples ) :
+
+    ontods = self.newOntoDS()
+    ontods.restoreSnapshot( self.pin().snapshot() )
+    ontods.addTriples( triples )
+
+    return ontods
+
+
+  ###########################
+  #  BUILD WITHOUT TRIPLES  #
+  ###########################
+  # copy the current instance through a snapshot, then remove the triples from the copy.
+  # the copy costs time and memory in the size of the ontology, see usage note 5.
+  def buildWithoutTriples( self, triples ) :
+
+    ontods = self.newOntoDS()
+    ontods.restoreSnapshot( self.pin().snapshot() )
+    ontods.removeTriples( triples )
+
+    return ontods
+
+
+  ################
+  #  NEW ONTODS  #
+  ################
+  def newOntoDS( self ) :
+    return OntoDS.OntoDS( self.nosql_type, self.cacheSize, self.retainGraph, self.backend, self.normalizer, self.prefilterRate,
+                          subsumptionPredicates=self.subsumptionPredicates )
+
+
+  ##########
+  #  SEAL  #
+  ##########
+  # finish every lazily built structure of the given instance, so
+  # readers only ever read its indexes.
+  def seal( self, ontods ) :
+
+    ontods.store.compact()
+
+    ontods.refreshClosure()
+
+    return ontods
+
+
+#########
+#  EOF  #
+#########
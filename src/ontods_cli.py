@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+
+##########################################################################
+# ontods_cli usage notes:
+#
+# 1. Command line entry point for OntoDS. The validate command streams a
+#    JSON-lines or CSV file of documents through verification, writing
+#    accepted rows and rejected rows, with the reason for each rejection,
+#    to separate files in the input format.
+# 2. Rows are read, verified, and written a batch at a time, so memory
+#    use does not grow with the input. Rows are written in input order.
+#    Rejected rows are explained where they are verified, in the worker
+#    processes when --workers is given.
+# 3. Progress and throughput are reported on stderr, so accepted rows
+#    can be written to stdout.
+#
+#    ontods validate --ontology X.nt --ignore name,age input.jsonl
+#    ontods validate --ontology X.nt --workers 8 --accepted - --rejected bad.csv input.csv
+#
+#    bin/ontods runs this module with src/ on the path.
+#
+##########################################################################
+
+# -------------------------------------- #
+import argparse, collections, csv, json, logging, os, sys, time
+
+# import sibling packages HERE!!!
+import OntoDS, ParallelOntoDS
+
+# -------------------------------------- #
+
+# input formats, by file extension
+FORMATS = { ".jsonl" : "jsonl", ".json" : "jsonl", ".ndjson" : "jsonl", ".csv" : "csv" }
+
+
+################
+#  PARSE ARGS  #
+################
+def parseArgs( argv ) :
+
+  parser     = argparse.ArgumentParser( prog="ontods", description="verify documents against domain subsumption constraints" )
+  subparsers = parser.add_subparsers( dest="command" )
+
+  validate = subparsers.add_parser( "validate", help="stream a JSON-lines or CSV file through verification" )
+
+  validate.add_argument( "input",                                              help="the JSON-lines or CSV file to validate, - for stdin" )
+  validate.add_argument( "--ontology",       required=True,                    help="the N-Triples ontology to verify against" )
+  validate.add_argument( "--compiled",       default=None,                     help="a compiled ontology cache, (re)written when stale" )
+  validate.add_argument( "--ignore",         default="",                       help="comma separated keys or path patterns to ignore" )
+  validate.add_argument( "--format",         default=None, choices=[ "jsonl", "csv" ], help="the input format, guessed from the extension by default" )
+  validate.add_argument( "--accepted",       default=None,                     help="where to write accepted rows, - for stdout" )
+  validate.add_argument( "--rejected",       default=None,                     help="where to write rejected rows with their reasons" )
+  validate.add_argument( "--reason-field",   default="_reason",                help="the field holding the reason of rejected rows" )
+  validate.add_argument( "--workers",        type=int, default=1,              help="worker processes verifying rows" )
+  validate.add_argument( "--batch-size",     type=int, default=1000,           help="rows per verification batch" )
+  validate.add_argument( "--progress-every", type=int, default=100000,         help="rows between progress reports, 0 for none" )
+  validate.add_argument( "--backend",        default="dict", choices=[ "dict", "array" ] )
+
+  args = parser.parse_args( argv )
+
+  if args.format is None :
+    args.format = FORMATS.get( os.path.splitext( args.input )[1].lower() )
+    if args.format is None :
+      parser.error( "cannot guess the format of '" + args.input + "', pass --format" )
+
+  # outputs default to siblings of the input file
+  for name in [ "accepted", "rejected" ] :
+    if getattr( args, name ) is None :
+      if args.input == "-" :
+        parser.error( "--" + name + " is required when reading stdin" )
+      base, ext = os.path.splitext( args.input )
+      setattr( args, name, base + "." + name + ext )
+
+  if args.workers < 1 :
+    parser.error( "--workers must be at least 1" )
+
+  return args
+
+
+###############
+#  OPEN FILE  #
+###############
+# open the file at the given path, or stdin/stdout for -.
+def openFile( path, mode ) :
+
+  if path == "-" :
+    return sys.stdin if "r" in mode else sys.stdout
+
+  return open( path, mode )
+
+
+############
+#  TO STR  #
+############
+# encode the unicode strings in the given parsed JSON value as utf-8 strs,
+# matching the data strings of the ontology.
+def toStr( val ) :
+
+  if isinstance( val, unicode ) :
+    return val.encode( "utf-8" )
+
+  elif isinstance( val, dict ) :
+    return dict( ( toStr( k ), toStr( v ) ) for ( k, v ) in val.iteritems() )
+
+  elif isinstance( val, list ) :
+    return [ toStr( v ) for v in val ]
+
+  return val
+
+
+###############
+#  READ ROWS  #
+###############
+# yield ( row, reason ) pairs for the rows of the given file, one at a time.
+# reason is None for rows to verify, and explains why malformed rows are
+# rejected without verification.
+def readRows( fo, fmt ) :
+
+  if fmt == "csv" :
+    for row in csv.DictReader( fo ) :
+      yield row, None
+    return
+
+  for lineNum, line in enumerate( fo, 1 ) :
+
+    if not line.strip() :
+      continue
+
+    try :
+      row = toStr( json.loads( line ) )
+    except ValueError as e :
+      yield { "line" : lineNum, "text" : line.rstrip( "\r\n" ) }, "MALFORMED : invalid JSON on line " + str( lineNum ) + " : " + str( e )
+      continue
+
+    if not isinstance( row, dict ) :
+      yield { "line" : lineNum, "text" : line.rstrip( "\r\n" ) }, "MALFORMED : line " + str( lineNum ) + " is not a JSON object"
+      continue
+
+    yield row, None
+
+
+################
+#  ROW WRITER  #
+################
+# write rows to the given file in the given format. CSV headers
+# come from the first row written, plus the reason field if given.
+class RowWriter( object ) :
+
+  def __init__( self, fo, fmt, reasonField=None ) :
+    self.fo          = fo
+    self.fmt         = fmt
+    self.reasonField = reasonField
+    self.writer      = None
+
+  def write( self, row, reason=None ) :
+
+    if self.reasonField is not None :
+      row = dict( row )
+      row[ self.reasonField ] = reason
+
+    if self.fmt == "jsonl" :
+      self.fo.write( json.dumps( row, sort_keys=True ) + "\n" )
+      return
+
+    if self.writer is None :
+      self.writer = csv.DictWriter( self.fo, sorted( row ), extrasaction="ignore" )
+      self.writer.writeheader()
+
+    self.writer.writerow( row )
+
+
+##############
+#  PROGRESS  #
+##############
+# report the given row counts and throughput on stderr.
+def progress( stats, start, final=False ) :
+
+  elapsed = time.time() - start
+  rate    = stats[ "rows" ] / elapsed if elapsed > 0 else 0.0
+
+  sys.stderr.write( "%s %d rows in %.1fs (%.0f rows/s) : %d accepted, %d rejected, %d malformed\n"
+                    % ( "validated" if final else "validating...", stats[ "rows" ], elapsed, rate,
+                        stats[ "accepted" ], stats[ "rejected" ], stats[ "malformed" ] ) )
+  sys.stderr.flush()
+
+
+##############
+#  VALIDATE  #
+##############
+# stream the input rows through verification, writing each to the accepted
+# or rejected output in input order. at most a few batches of rows are held
+# in memory at once, however large the input.
+# return the map of row counts.
+def validate( args ) :
+
+  ignoreList = [ k.strip() for k in args.ignore.split( "," ) if k.strip() ]
+
+  ontods = OntoDS.OntoDS( "pickledb", retainGraph=False, backend=args.backend )
+  ontods.loadOntology( args.ontology, args.compiled )
+
+  stats   = { "rows" : 0, "accepted" : 0, "rejected" : 0, "malformed" : 0 }
+  pending = collections.deque()   # ( row, reason ) pairs read but not yet written
+  pool    = None
+
+  # queue every row, handing an empty placeholder to verification for
+  # malformed rows so pending never holds more than the rows in flight
+  def feed( rows ) :
+    for ( row, reason ) in rows :
+      pending.append( ( row, reason ) )
+      yield row if reason is None else {}
+
+  inFile   = openFile( args.input, "rb" if args.format == "csv" else "r" )
+  accepted = openFile( args.accepted, "wb" if args.format == "csv" else "w" )
+  rejected = openFile( args.rejected, "wb" if args.format == "csv" else "w" )
+
+  acceptedWriter = RowWriter( accepted, args.format )
+  rejectedWriter = RowWriter( rejected, args.format, args.reason_field )
+
+  start = time.time()
+
+  try :
+
+    rows = feed( readRows( inFile, args.format ) )
+
+    if args.workers > 1 :
+      pool     = ParallelOntoDS.ParallelOntoDS( ontods, args.workers )
+      verdicts = pool.explainMany( rows, ignoreList, args.batch_size )
+    else :
+      verdicts = ontods.explainMany( rows, ignoreList, args.batch_size )
+
+    for verdict in verdicts :
+
+      row, reason = pending.popleft()
+
+      if reason is not None :
+        rejectedWriter.write( row, reason )
+        stats[ "malformed" ] += 1
+      elif verdict :
+        acceptedWriter.write( row )
+        stats[ "accepted" ] += 1
+      else :
+        rejectedWriter.write( row, verdict.render() )
+        stats[ "rejected" ] += 1
+
+      stats[ "rows" ] += 1
+      if args.progress_every and stats[ "rows" ] % args.progress_every == 0 :
+        progress( stats, start )
+
+  finally :
+
+    if pool is not None :
+      pool.close()
+
+    for fo in [ inFile, accepted, rejected ] :
+      if fo is sys.stdout :
+        fo.flush()
+      elif fo is not sys.stdin :
+        fo.close()
+
+  progress( stats, start, final=True )
+
+  return stats
+
+
+##########
+#  MAIN  #
+##########
+def main( argv ) :
+
+  logging.basicConfig( format='%(levelname)s:%(message)s', level=logging.WARNING )
+
+  args = parseArgs( argv )
+
+  if args.command == "validate" :
+    validate( args )
+
+  return 0
+
+
+#########################
+#  THREAD OF EXECUTION  #
+#########################
+if __name__ == "__main__" :
+  sys.exit( main( sys.argv[ 1: ] ) )
+
+
+#########
+#  EOF  #
+#########
@@ -18,6 +18,30 @@ def unittest_driver() :
   os.system( "python -m unittest Test_ontods.Test_ontods.test_example2" )
   os.system( "python -m unittest Test_ontods.Test_ontods.test_example3" )
   os.system( "python -m unittest Test_ontods.Test_ontods.test_example4" )
+  os.system( "python -m unittest Test_ontods.Test_ontods.test_example5" )
+  os.system( "python -m unittest Test_ontods.Test_ontods.test_example6" )
+  os.system( "python -m unittest Test_ontods.Test_ontods.test_example7" )
+  os.system( "python -m unittest Test_ontods.Test_ontods.test_example8" )
+  os.system( "python -m unittest Test_ontods.Test_ontods.test_example9" )
+  os.system( "python -m unittest Test_ontods.Test_ontods.test_example10" )
+  os.system( "python -m unittest Test_ontods.Test_ontods.test_example11" )
+  os.system( "python -m unittest Test_ontods.Test_ontods.test_example12" )
+  os.system( "python -m unittest Test_ontods.Test_ontods.test_example13" )
+  os.system( "python -m unittest Test_ontods.Test_ontods.test_example14" )
+  os.system( "python -m unittest Test_ontods.Test_ontods.test_example15" )
+  os.system( "python -m unittest Test_ontods.Test_ontods.test_example16" )
+  os.system( "python -m unittest Test_ontods.Test_ontods.test_example17" )
+  os.system( "python -m unittest Test_ontods.Test_ontods.test_example18" )
+  os.system( "python -m unittest Test_ontods.Test_ontods.test_example19" )
+  os.system( "python -m unittest Test_ontods.Test_ontods.test_example20" )
+  os.system( "python -m unittest Test_ontods.Test_ontods.test_example21" )
+  os.system( "python -m unittest Test_ontods.Test_ontods.test_example22" )
+  os.system( "python -m unittest Test_ontods.Test_ontods.test_example23" )
+  os.system( "python -m unittest Test_ontods.Test_ontods.test_example24" )
+  os.system( "python -m unittest Test_ontods.Test_ontods.test_example25" )
+  os.system( "python -m unittest Test_ontods.Test_ontods.test_example26" )
+  os.system( "python -m unittest Test_ontods.Test_ontods.test_example27" )
+  os.system( "python -m unittest Test_ontods.Test_ontods.test_example28" )
 
 
 #########################